@@ -0,0 +1,255 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, RegressorMixin, clone, is_classifier
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, mean_absolute_error
+
+from Feature_Encoder import FeatureEncoder
+import Finish_Predictor
+import Time_Predictor
+
+# Trees added to a warm-started forest for every new race in the training window
+DEFAULT_TREES_PER_RACE = 10
+# Largest forest the growing strategy keeps before it refits from scratch on the current window
+DEFAULT_MAX_TREES = 300
+
+
+class IncrementalRidge(RegressorMixin, BaseEstimator):
+    """
+    Ridge regression that is updated race by race from its sufficient statistics.
+
+    partial_fit only adds the X^T X and X^T y of the new rows, so extending the training
+    window costs O(new rows * features^2) plus one small solve, and the result equals a Ridge
+    fitted on every row seen so far. The intercept is not penalised, as in sklearn's Ridge.
+
+    Parameters:
+    alpha (float): L2 penalty on the coefficients
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+
+    def partial_fit(self, X, y):
+        """
+        Add rows to the fit.
+
+        Parameters:
+        X (np.ndarray, pd.DataFrame or scipy.sparse matrix): Features of the new rows
+        y (np.ndarray or pd.Series): Target of the new rows
+
+        Returns:
+        IncrementalRidge: The updated model
+        """
+        ones = np.ones((X.shape[0], 1))
+        if sparse.issparse(X):
+            X_aug = sparse.hstack([X, ones], format='csr')
+            gram = (X_aug.T @ X_aug).toarray()
+        else:
+            X_aug = np.hstack([np.asarray(X, dtype=np.float64), ones])
+            gram = X_aug.T @ X_aug
+        if not hasattr(self, 'xtx_'):
+            self.xtx_ = np.zeros_like(gram)
+            self.xty_ = np.zeros(gram.shape[0])
+        self.xtx_ += gram
+        self.xty_ += X_aug.T @ np.asarray(y, dtype=np.float64)
+
+        penalty = self.alpha * np.eye(len(self.xty_))
+        penalty[-1, -1] = 0
+        weights = np.linalg.lstsq(self.xtx_ + penalty, self.xty_, rcond=None)[0]
+        self.coef_, self.intercept_ = weights[:-1], weights[-1]
+        self.n_features_in_ = len(self.coef_)
+        return self
+
+    def fit(self, X, y):
+        """
+        Fit from scratch on the given rows.
+
+        Parameters:
+        X (np.ndarray, pd.DataFrame or scipy.sparse matrix): Training features
+        y (np.ndarray or pd.Series): Training target
+
+        Returns:
+        IncrementalRidge: The fitted model
+        """
+        for attr in ('xtx_', 'xty_'):
+            self.__dict__.pop(attr, None)
+        return self.partial_fit(X, y)
+
+    def predict(self, X):
+        """
+        Predict the target.
+
+        Parameters:
+        X (np.ndarray, pd.DataFrame or scipy.sparse matrix): Features
+
+        Returns:
+        np.ndarray: Predictions
+        """
+        X = X if sparse.issparse(X) else np.asarray(X, dtype=np.float64)
+        return np.asarray(X @ self.coef_).ravel() + self.intercept_
+
+
+def update_strategy(estimator):
+    """
+    Pick how an estimator is brought up to date when the training window grows by one race.
+
+    Parameters:
+    estimator: Unfitted estimator
+
+    Returns:
+    str: 'partial_fit' (feed only the new rows), 'grow' (warm-start more trees on the window),
+         'warm_start' (refit from the previous solution) or 'refit' (fit from scratch)
+    """
+    params = estimator.get_params()
+    if hasattr(estimator, 'partial_fit'):
+        return 'partial_fit'
+    if 'warm_start' in params and 'n_estimators' in params:
+        return 'grow'
+    if 'warm_start' in params:
+        return 'warm_start'
+    return 'refit'
+
+
+def race_bounds(race_dates):
+    """
+    Order the rows chronologically and find where every race starts.
+
+    Parameters:
+    race_dates (pd.Series): Date of the race of every row
+
+    Returns:
+    tuple: Row order (np.ndarray), race start offsets into the ordered rows with a final end
+           offset (np.ndarray), the race dates in order (pd.DatetimeIndex)
+    """
+    codes, dates = pd.factorize(pd.to_datetime(race_dates, errors='coerce'), sort=True)
+    if (codes < 0).any():
+        raise ValueError(f"{(codes < 0).sum()} rows have no valid RaceDate")
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(dates) + 1))
+    return order, bounds, dates
+
+
+def _rows(X, start, stop):
+    """
+    Slice a block of consecutive rows from a frame, array or sparse matrix.
+
+    Parameters:
+    X (pd.DataFrame, np.ndarray or scipy.sparse matrix): The ordered features or target
+    start (int): First row
+    stop (int): Row after the last one
+
+    Returns:
+    The rows start..stop-1
+    """
+    return X.iloc[start:stop] if isinstance(X, (pd.DataFrame, pd.Series)) else X[start:stop]
+
+
+def backtest(estimator, X, y, race_dates, metrics, min_train_races=10, trees_per_race=DEFAULT_TREES_PER_RACE,
+             max_trees=DEFAULT_MAX_TREES, encoder=None):
+    """
+    Rolling-origin backtest: for every race k, train on the races before k and score race k.
+
+    The model is carried from one step to the next instead of being refitted on the whole
+    window each time (see update_strategy): incremental models only see the rows of the race
+    that just joined the window, warm-started forests add `trees_per_race` trees fitted on the
+    current window, and other warm-startable models restart from their previous solution. The
+    total work therefore grows linearly with the number of races rather than quadratically.
+
+    A grown forest is capped at `max_trees`: once another batch of trees would exceed it, the
+    forest is refitted from scratch on the current window with the estimator's own n_estimators
+    and grows again from there. This bounds its memory and predict cost and drops the trees
+    fitted on early, short windows, at the price of one full fit every
+    (max_trees - n_estimators) / trees_per_race races.
+
+    Parameters:
+    estimator: Unfitted estimator
+    X (pd.DataFrame): Features, one row per driver and race
+    y (pd.Series): Target
+    race_dates (pd.Series): RaceDate of every row, races are ordered and grouped by it
+    metrics (dict): Metric name -> function(y_true, y_pred), e.g. {'MAE': mean_absolute_error}
+    min_train_races (int): Races in the first training window, the first scored race follows them
+    trees_per_race (int): Trees added to a warm-started forest per step
+    max_trees (int): Most trees a warm-started forest may hold before it is refitted from scratch
+    encoder (FeatureEncoder): Unfitted encoder, fitted on the category vocabulary of all rows so
+                              the feature layout stays fixed across steps (no target information is used)
+
+    Returns:
+    pd.DataFrame: One row per scored race with its date, the training window size, the metrics,
+                  the update time, the strategy used ('refit' on the steps where a capped forest restarts)
+                  and, for a grown forest, its number of trees
+    """
+    order, bounds, dates = race_bounds(race_dates)
+    X, y = X.iloc[order], y.iloc[order]
+    if encoder is not None:
+        X = encoder.fit_transform(X)
+
+    model = clone(estimator)
+    strategy = update_strategy(model)
+    if strategy in ('grow', 'warm_start'):
+        model.set_params(warm_start=True)
+    fit_kwargs = {'classes': np.unique(y)} if strategy == 'partial_fit' and is_classifier(model) else {}
+
+    rows = []
+    seen = 0
+    for k in range(min_train_races, len(dates)):
+        test_start, test_stop = bounds[k], bounds[k + 1]
+        t0 = time.perf_counter()
+        step = strategy
+        if strategy == 'partial_fit':
+            model.partial_fit(_rows(X, seen, test_start), _rows(y, seen, test_start), **fit_kwargs)
+        else:
+            if strategy == 'grow' and seen:
+                if model.n_estimators + trees_per_race <= max_trees:
+                    model.set_params(n_estimators=model.n_estimators + trees_per_race)
+                else:
+                    model, step = clone(estimator).set_params(warm_start=True), 'refit'
+            elif strategy == 'refit':
+                model = clone(estimator)
+            model.fit(_rows(X, 0, test_start), _rows(y, 0, test_start))
+        fit_seconds = time.perf_counter() - t0
+        seen = test_start
+
+        y_test = _rows(y, test_start, test_stop)
+        predictions = model.predict(_rows(X, test_start, test_stop))
+        row = {'RaceDate': dates[k], 'TrainRaces': k, 'TrainRows': test_start, 'TestRows': test_stop - test_start}
+        for name, metric in metrics.items():
+            row[name] = metric(y_test, predictions)
+        row['FitSeconds'] = fit_seconds
+        row['Strategy'] = step
+        if strategy == 'grow':
+            row['Trees'] = len(model.estimators_)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    filepath = './data/f1_data_processed.csv'
+    categorical_cols = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+    # Finished: the Finish_Predictor features, forest grown race by race
+    columns = ['DriverId', 'TeamId', 'GridPosition', 'Year', 'Position_Qual', 'AirTemp', 'Humidity', 'Pressure',
+               'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'RaceName', 'Finished', 'RaceDate']
+    df = Finish_Predictor.data_loader(filepath, columns, categorical_cols, encode=False)
+    finished = backtest(RandomForestClassifier(random_state=42), df.drop(columns=['Finished', 'RaceDate']),
+                        df['Finished'], df['RaceDate'], {'Accuracy': accuracy_score},
+                        encoder=FeatureEncoder(categorical_cols))
+    print(finished.to_string(index=False))
+    print(f"Mean Finished accuracy: {finished['Accuracy'].mean():.4f} ({finished['FitSeconds'].sum():.1f} s)")
+
+    # Time: the Time_Predictor features, forest grown race by race against an exact incremental ridge
+    columns = ['DriverId', 'TeamId', 'GridPosition', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual', 'AirTemp',
+               'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year', 'RaceName',
+               'TotalLength', 'Time', 'RaceDate']
+    df = Time_Predictor.data_loader(filepath, columns, categorical_cols, encode=False).dropna()
+    for model in (RandomForestRegressor(random_state=42), IncrementalRidge(alpha=1.0)):
+        times = backtest(model, df.drop(columns=['Time', 'RaceDate']), df['Time'], df['RaceDate'],
+                         {'MAE': mean_absolute_error}, encoder=FeatureEncoder(categorical_cols))
+        print(f"{type(model).__name__} mean Time MAE: {times['MAE'].mean():.2f} s "
+              f"over {len(times)} races ({times['FitSeconds'].sum():.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import os
+import sys
+
+import pandas as pd
+
+# Columns holding durations, stored as text like '0 days 00:01:23.348000' in the CSVs
+DURATION_COLUMNS = ['Time', 'Q1_Race', 'Q2_Race', 'Q3_Race', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual']
+
+# Low-cardinality string columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = ['DriverId', 'TeamId', 'TeamName', 'TeamColor', 'FullName', 'BroadcastName',
+                       'Abbreviation', 'FirstName', 'LastName', 'CountryCode', 'HeadshotUrl',
+                       'ClassifiedPosition', 'Status', 'CircuitId', 'RaceName']
+
+DATETIME_COLUMNS = ['RaceDate']
+
+# Whole-number columns, stored in the smallest integer type that holds them (float32 if values are missing)
+INTEGER_COLUMNS = ['DriverNumber', 'Position_Race', 'GridPosition', 'Position_Qual', 'TotalLaps', 'LapLength',
+                   'TotalLength', 'Year', 'Finished', 'DNF', 'DriverRaces']
+
+# Target type of every known column: 'duration' and 'datetime' parse text, 'integer' is downcast as above.
+# Columns not listed are inferred by compact: float64 becomes float32, int64 the smallest integer type and
+# repetitive text a categorical, so the lap-level and rating features are compacted too
+SCHEMA = {
+    **{col: 'duration' for col in DURATION_COLUMNS},
+    **{col: 'datetime' for col in DATETIME_COLUMNS},
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'integer' for col in INTEGER_COLUMNS},
+}
+
+# Text columns with at most this share of distinct values are inferred as categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+
+
+def _is_text(series):
+    """
+    Check whether a column still holds unparsed text.
+
+    Parameters:
+    series (pd.Series): The column to check
+
+    Returns:
+    bool: True for object or string columns
+    """
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _integer(series):
+    """
+    Smallest integer type holding a whole-number column, float32 if values are missing.
+
+    Parameters:
+    series (pd.Series): Numeric column
+
+    Returns:
+    pd.Series: The downcast column
+    """
+    if series.isna().any():
+        return series.astype('float32')
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _compact_column(series, kind, downcast_floats=True):
+    """
+    Convert one column to the type of its schema entry, or an inferred compact type.
+
+    Parameters:
+    series (pd.Series): The column
+    kind (str): Schema entry, None to infer
+    downcast_floats (bool): Convert unlisted float64 columns to float32
+
+    Returns:
+    pd.Series: The converted column, the same object if it is already compact
+    """
+    dtype = series.dtype
+    if kind == 'duration':
+        # Duration columns that already hold seconds (as in the processed files) are left numeric
+        return pd.to_timedelta(series, errors='coerce') if _is_text(series) else series
+    if kind == 'datetime':
+        return pd.to_datetime(series, errors='coerce') if _is_text(series) else series
+    if kind == 'category':
+        return series.astype('category') if _is_text(series) else series
+    if kind == 'integer':
+        return _integer(series) if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) \
+            else series
+    if dtype == 'float64':
+        return series.astype('float32') if downcast_floats else series
+    if dtype == 'int64':
+        return pd.to_numeric(series, downcast='integer')
+    if _is_text(series) and len(series) and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+        return series.astype('category')
+    return series
+
+
+def compact(df, schema=None, downcast_floats=True):
+    """
+    Convert a frame to compact in-memory types driven by the column schema.
+
+    Listed columns get the type of their schema entry; other float64 columns become float32,
+    int64 columns the smallest integer type and repetitive text columns categoricals. Grouping
+    and joining on the categorical keys compares integer codes instead of Python strings.
+    Converting a frame that is already compact returns it unchanged, so every stage of the
+    pipeline can apply it to what it reads or builds.
+
+    Only the float32 conversion loses information. Frames that are written to disk are
+    converted with downcast_floats=False, so the files keep full precision and the downcast
+    happens when they are loaded into memory.
+
+    Parameters:
+    df (pd.DataFrame): The frame to convert
+    schema (dict): Column -> 'duration', 'datetime', 'category' or 'integer', defaults to SCHEMA
+    downcast_floats (bool): Convert unlisted float64 columns to float32
+
+    Returns:
+    pd.DataFrame: A compact copy of the frame
+    """
+    schema = SCHEMA if schema is None else schema
+    df = df.drop(columns=[col for col in df.columns if str(col).startswith('Unnamed:')])
+    columns = {col: _compact_column(df[col], schema.get(col), downcast_floats) for col in df.columns}
+    return pd.DataFrame(columns, index=df.index)
+
+
+def to_columnar(df):
+    """
+    Convert a frame read from CSV into typed columns: native durations, datetimes, categoricals
+    and downcast numbers, see compact.
+
+    Parameters:
+    df (pd.DataFrame): The frame to convert
+
+    Returns:
+    pd.DataFrame: A typed copy of the frame
+    """
+    return compact(df)
+
+
+def memory_report(before, after):
+    """
+    Compare the memory of every column of a frame before and after compaction.
+
+    Parameters:
+    before (pd.DataFrame): The frame as loaded
+    after (pd.DataFrame): The compacted frame
+
+    Returns:
+    pd.DataFrame: Dtype and bytes of every column before and after, and the reduction factor,
+                  with a 'Total' row
+    """
+    columns = [col for col in before.columns if col in after.columns]
+    report = pd.DataFrame({
+        'DtypeBefore': before[columns].dtypes.astype(str),
+        'DtypeAfter': after[columns].dtypes.astype(str),
+        'BytesBefore': before[columns].memory_usage(index=False, deep=True),
+        'BytesAfter': after[columns].memory_usage(index=False, deep=True),
+    })
+    report.loc['Total'] = ['', '', before.memory_usage(deep=True).sum(), after.memory_usage(deep=True).sum()]
+    report['Reduction'] = (report['BytesBefore'] / report['BytesAfter']).astype(float).round(2)
+    return report
+
+
+def write_columnar(df, path):
+    """
+    Write a frame as typed Parquet or Arrow IPC, chosen by the file extension.
+
+    The columns get the types of compact, except that floats keep their precision (read_table
+    downcasts them on load). Arrow IPC files are written uncompressed so they can be
+    memory-mapped without copying.
+
+    Parameters:
+    df (pd.DataFrame): The frame to write
+    path (str): Destination path ending in .parquet or .arrow/.feather
+    """
+    df = compact(df, downcast_floats=False)
+    if path.endswith(PARQUET_SUFFIXES):
+        df.to_parquet(path, index=False)
+    elif path.endswith(ARROW_SUFFIXES):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path,
+                              compression='uncompressed')
+    else:
+        raise ValueError(f"Unsupported columnar format for '{path}'")
+
+
+def read_table(path, columns=None, compact_types=True):
+    """
+    Load only the requested columns from a CSV, Parquet or Arrow IPC file.
+
+    Parquet and Arrow files are memory-mapped and only the requested columns are decoded;
+    CSV files are parsed with `usecols` so the other columns are skipped, and the categorical
+    columns are parsed straight into categoricals.
+
+    Parameters:
+    path (str): The path to the data file
+    columns (list): Columns to load, all columns if None
+    compact_types (bool): Convert to the compact types of SCHEMA (see compact), False keeps the parsed types
+
+    Returns:
+    pd.DataFrame: The loaded columns, in the requested order
+    """
+    if path.endswith(PARQUET_SUFFIXES):
+        df = pd.read_parquet(path, columns=columns, memory_map=True)
+    elif path.endswith(ARROW_SUFFIXES):
+        import pyarrow.feather as feather
+        df = feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    else:
+        dtype = {col: 'category' for col in CATEGORICAL_COLUMNS if columns is None or col in columns} \
+            if compact_types else None
+        df = pd.read_csv(path, sep=csv_separator(path), usecols=columns, dtype=dtype)
+    df = df if columns is None else df[columns]
+    return compact(df) if compact_types else df
+
+
+def drop_unused_categories(df, columns):
+    """
+    Drop categories that no longer occur, e.g. after rows were filtered out.
+
+    Categoricals read from columnar files keep their full vocabulary, which would otherwise
+    show up as all-zero columns in `pd.get_dummies`.
+
+    Parameters:
+    df (pd.DataFrame): The frame to update in place
+    columns (list): Columns to check
+    """
+    for col in columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+
+
+def csv_separator(path):
+    """
+    Detect whether a CSV uses commas or semicolons (the '_semi-colon' files).
+
+    Parameters:
+    path (str): The path to the CSV file
+
+    Returns:
+    str: The separator
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        header = f.readline()
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def convert_csv(csv_path, fmt='parquet'):
+    """
+    Write a typed columnar copy next to an existing CSV file.
+
+    Parameters:
+    csv_path (str): The path to the CSV file
+    fmt (str): 'parquet' or 'arrow'
+
+    Returns:
+    str: The path of the written file
+    """
+    out_path = f'{os.path.splitext(csv_path)[0]}.{fmt}'
+    write_columnar(pd.read_csv(csv_path, sep=csv_separator(csv_path)), out_path)
+    return out_path
+
+
+if __name__ == "__main__":
+    # Example usage: python Columnar_Storage.py ./data/f1_data_processed.csv [parquet|arrow]
+    fmt = sys.argv[2] if len(sys.argv) > 2 else 'parquet'
+    print(f"Written '{convert_csv(sys.argv[1], fmt)}'.")
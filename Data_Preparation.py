@@ -1,16 +1,62 @@
 import fastf1
 import os
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from fastf1 import utils
-fastf1.ergast.interface.BASE_URL = "https://api.jolpi.ca/ergast/f1"
+from Columnar_Storage import compact, write_columnar
+from Profiling import stage
+from Data_Wrangling import NOT_FINISHED_CODES, RACE_KEYS, first_in_group
+from History_Store import update_history
+from Lap_Features import release_laps, session_lap_features
+from Shard_Store import ShardStore
+
+# Ergast mirror the schedules and results are fetched from
+ERGAST_URL = "https://api.jolpi.ca/ergast/f1"
 
 # Determine the path to the cache folder
 script_directory = os.path.dirname(os.path.abspath(__file__))  # Directory of the script
 parent_directory = os.path.abspath(os.path.join(script_directory, '..'))  # Parent directory
 cache_directory = os.path.join(parent_directory, 'f1_data_cache')  # Path to the cache folder
 
-# Enable the cache for faster data retrieval
-fastf1.Cache.enable_cache(cache_directory) 
+# Whether FastF1 has been pointed at the Ergast mirror and the cache, see configure
+FASTF1_CONFIGURED = False
+# Arguments of the last configure call, replayed in every worker process of iter_event_frames
+FASTF1_SETTINGS = None
+
+
+def configure(cache_dir=cache_directory, ergast_url=ERGAST_URL, ignore_version=False, use_requests_cache=True):
+    """
+    Point FastF1 at the Ergast mirror and enable its on-disk cache for faster data retrieval.
+
+    Importing this module changes no global state: configure is called explicitly by the
+    CLI, or on the first session or schedule load with the defaults.
+
+    Parameters:
+    cache_dir (str): Folder of the FastF1 cache, created if missing
+    ergast_url (str): Base URL of the Ergast API
+    ignore_version (bool): Use cached data written by other FastF1 versions
+    use_requests_cache (bool): Cache raw HTTP responses as well as the parsed data
+    """
+    global FASTF1_CONFIGURED, FASTF1_SETTINGS
+    fastf1.ergast.interface.BASE_URL = ergast_url
+    # The legacy Ergast helpers (used for schedules) keep their own copy of the base URL
+    fastf1.ergast.legacy.base_url = ergast_url
+    os.makedirs(cache_dir, exist_ok=True)
+    fastf1.Cache.enable_cache(cache_dir, ignore_version=ignore_version, use_requests_cache=use_requests_cache)
+    FASTF1_CONFIGURED = True
+    FASTF1_SETTINGS = {'cache_dir': cache_dir, 'ergast_url': ergast_url, 'ignore_version': ignore_version,
+                       'use_requests_cache': use_requests_cache}
+
+
+def ensure_configured():
+    """
+    Apply the default configuration unless configure (or Offline_Replay) already set FastF1 up.
+    """
+    if not FASTF1_CONFIGURED:
+        configure()
+
 # Circuit length mapping (in meters) for circuits used after 2017
 CIRCUIT_LENGTHS = {
     "adelaide": 3780,
@@ -96,7 +142,122 @@ CIRCUIT_LENGTHS = {
 }
 
 
-def update_times(results):
+def normalize_circuit_keys(names):
+    """
+    Normalize circuit or location names for matching: no accents, case, spaces or punctuation.
+
+    Parameters:
+    names (pd.Index or pd.Series): Names such as 'São Paulo' or 'Spa-Francorchamps'
+
+    Returns:
+    pd.Index or pd.Series: Normalized keys such as 'saopaulo' or 'spafrancorchamps'
+    """
+    return (names.str.normalize('NFKD')
+            .str.encode('ascii', errors='ignore').str.decode('ascii')
+            .str.lower()
+            .str.replace(r'[^a-z0-9]', '', regex=True))
+
+
+# Circuit lengths indexed by normalized key, built once so lookups are a single reindex
+CIRCUIT_INDEX = pd.Series(list(CIRCUIT_LENGTHS.values()),
+                          index=normalize_circuit_keys(pd.Index(list(CIRCUIT_LENGTHS.keys()))),
+                          name='LapLength')
+CIRCUIT_INDEX = CIRCUIT_INDEX[~CIRCUIT_INDEX.index.duplicated()]
+
+# Data source for schedules and sessions, None uses FastF1's default (Offline_Replay switches to 'ergast')
+FASTF1_BACKEND = None
+
+# Number of session loads the extractors performed per event before sessions were shared
+# (race results, qualifying results and weather each loaded their own session)
+UNSHARED_LOADS_PER_EVENT = 3
+
+
+class SessionCache:
+    """
+    Bounded in-process LRU of loaded FastF1 sessions, keyed by (year, race_name, identifier).
+
+    Every session is loaded at most once while it stays in the cache, so the race results,
+    qualifying results and weather extractors can share one loaded object, and re-running
+    a notebook cell does not deserialize the same session again.
+
+    Parameters:
+    maxsize (int): Maximum number of loaded sessions kept in memory
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._sessions = OrderedDict()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, year, race_name, identifier):
+        """
+        Return the loaded session, loading it only if it is not cached yet.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+        identifier (str): The session identifier (e.g., 'R' or 'Q')
+
+        Returns:
+        fastf1.core.Session: The loaded session
+        """
+        key = (year, race_name, identifier)
+        if key in self._sessions:
+            self._sessions.move_to_end(key)
+            self.hits += 1
+            return self._sessions[key]
+
+        ensure_configured()
+        with stage('session.load', session=identifier):
+            session = fastf1.get_session(year, race_name, identifier, backend=FASTF1_BACKEND)
+            session.load(telemetry=False)  # Load session data
+        self.loads += 1
+
+        self._sessions[key] = session
+        if len(self._sessions) > self.maxsize:
+            self._sessions.popitem(last=False)  # Evict the least recently used session
+        return session
+
+    def clear(self):
+        """
+        Drop all cached sessions and reset the counters.
+        """
+        self._sessions.clear()
+        self.loads = 0
+        self.hits = 0
+
+    def stats(self):
+        """
+        Summarize the cache activity.
+
+        Returns:
+        dict: Number of loads, cache hits and currently cached sessions
+        """
+        return {'loads': self.loads, 'hits': self.hits, 'cached': len(self._sessions)}
+
+
+# Shared cache used by the extractors when no session is handed in
+SESSION_CACHE = SessionCache()
+
+
+def load_event(year, race_name, cache=None):
+    """
+    Load the race and qualifying sessions of an event, each exactly once.
+
+    Parameters:
+    year (int): The year of the race
+    race_name (str): The name of the race (e.g., 'British Grand Prix')
+    cache (SessionCache): Session cache to use, defaults to the module-level SESSION_CACHE
+
+    Returns:
+    tuple: The loaded race session and qualifying session
+    """
+    cache = cache if cache is not None else SESSION_CACHE
+    return cache.get(year, race_name, 'R'), cache.get(year, race_name, 'Q')
+
+
+def update_times(results, keys=None):
     """
     Update the Time column in the race results DataFrame to reflect the complete race time for each driver.
 
@@ -104,91 +265,148 @@ def update_times(results):
     results (pd.DataFrame): A DataFrame containing race results, including a Time column. The Time column
                             contains the complete time for the first-position driver and time differences
                             for other drivers.
+    keys (list): Columns identifying a race when results holds several races, None for a single race
 
     Returns:
     pd.DataFrame: The updated DataFrame where the Time column now contains the actual complete race time
                   for each driver.
     """
-    if 'Time' not in results.columns or pd.isnull(results.iloc[0]['Time']):
+    if 'Time' not in results.columns or len(results) == 0:
         return results
-    
-    # Extract the time of the first-position driver
-    base_time = results.iloc[0]['Time']
-    
-    # Update the Time column for all other drivers
-    results['Time'] = results['Time'].apply(
-        lambda x: base_time + x if pd.notnull(x) and x != base_time else x
-    )
+
+    # Extract the time of the first-position driver of each race
+    times = results['Time']
+    if keys is None:
+        base_time = pd.Series(times.iloc[0], index=results.index)
+    else:
+        base_time = pd.Series(first_in_group(results, 'Time', keys), index=results.index)
+        base_time = base_time.astype(times.dtype)
+
+    # Races whose leader has no time are left as they are, as are the leaders themselves
+    keep = times.isna() | base_time.isna() | (times == base_time)
+    results['Time'] = times.where(keep, base_time + times)
     return results
 
 
-def get_race_results(year, race_name):
+def circuit_lengths(circuit_ids):
+    """
+    Look up the lap length of every row through the normalized circuit index.
+
+    Parameters:
+    circuit_ids (pd.Series): Circuit ids or locations, e.g. 'melbourne' or 'São Paulo'
+
+    Returns:
+    np.ndarray: Lap length in meters, NaN where the circuit is unknown
+    """
+    codes, uniques = pd.factorize(circuit_ids)
+    lengths = CIRCUIT_INDEX.reindex(normalize_circuit_keys(pd.Index(uniques))).to_numpy()
+    if (codes < 0).any():
+        lengths = np.append(lengths.astype(float), np.nan)  # code -1 picks the trailing NaN
+    return lengths[codes]
+
+
+def postprocess_results(df, keys=RACE_KEYS):
+    """
+    Vectorized post-processing of merged race and qualifying results, for one or many events.
+
+    Turns leader gaps into complete race times, joins the lap length by CircuitId, derives
+    the Finished/DNF flags from ClassifiedPosition and adds the qualifying times in seconds.
+    It runs once over the assembled table rather than per event, as the per-call overhead
+    of the column operations outweighs the work on a single 20-driver event.
+
+    Parameters:
+    df (pd.DataFrame): Merged results with Time, CircuitId, ClassifiedPosition and Q*_Qual columns
+    keys (list): Columns identifying a race
+
+    Returns:
+    pd.DataFrame: The updated DataFrame
+    """
+    keys = [key for key in keys if key in df.columns] or None
+    if df['Time'].dtype == object:
+        # Times read back from CSV shards are text
+        df['Time'] = pd.to_timedelta(df['Time'], errors='coerce')
+    df = update_times(df, keys)
+
+    lap_length = circuit_lengths(df['CircuitId'])
+    if 'LapLength' in df.columns:
+        df['LapLength'] = lap_length
+    else:
+        df.insert(df.columns.get_loc('CircuitId'), 'LapLength', lap_length)
+
+    df['Finished'] = (~df['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    df['DNF'] = 1 - df['Finished']
+    for col in ['Q1_Qual', 'Q2_Qual', 'Q3_Qual']:
+        if col in df.columns:
+            df[f'{col}_Seconds'] = pd.to_timedelta(df[col], errors='coerce').dt.total_seconds()
+    return df
+
+
+def get_race_results(year, race_name, session=None):
     """
     Fetch the race results for a specific race and year.
 
+    The Time column holds the winner's time and the gaps to the winner, and LapLength is not
+    joined yet; postprocess_results completes both for one or many events at once.
+
     Parameters:
     year (int): The year of the race
     race_name (str): The name of the race (e.g., 'British Grand Prix')
+    session (fastf1.core.Session): Already loaded race session, fetched through SESSION_CACHE if omitted
 
     Returns:
     pd.DataFrame: A DataFrame containing the race results, including driver positions, lap times, and more.
                   The DataFrame contains various columns like Driver, Position, Team, etc.
     """
-    session = fastf1.get_session(year, race_name, 'R')
-    session.load(telemetry=False)  # Load session data
-    # session.load()  # Load session data
-    results = session.results
+    if session is None:
+        session = SESSION_CACHE.get(year, race_name, 'R')
+    results = session.results.copy()  # Keep the cached session untouched
     race_date = session.date  # Get the race date
     total_laps = session.total_laps  # Get the total number of laps
 
-    # Update the Time column to the actual complete time
-    results = update_times(results)
-
-    # Get the circuit length using the CIRCUIT_LENGTHS dictionary
-    circuit_id = session.event['Location'].lower().replace(' ', '')
-    track_length = CIRCUIT_LENGTHS.get(circuit_id, None)  # None if not found
-
     # Add the race data to the results DataFrame
     results['RaceDate'] = race_date  
     results['TotalLaps'] = total_laps
-    results['LapLength'] = track_length
-    results['CircuitId'] = circuit_id
+    results['CircuitId'] = session.event['Location'].lower().replace(' ', '')
     return results
 
 
-def get_qualifying_results(year, race_name):
+def get_qualifying_results(year, race_name, session=None):
     """
     Fetch qualifying results for a specific race.
 
     Parameters:
     year (int): The year of the race
     race_name (str): The name of the race (e.g., 'British Grand Prix')
+    session (fastf1.core.Session): Already loaded qualifying session, fetched through SESSION_CACHE if omitted
 
     Returns:
     pd.DataFrame: A DataFrame containing qualifying results, including qualifying positions and Q times
     """
-    qualifying = fastf1.get_session(year, race_name, 'Q')
-    qualifying.load(telemetry=False)  # Load session data
+    qualifying = session if session is not None else SESSION_CACHE.get(year, race_name, 'Q')
     qual_results = qualifying.results
     # return qual_results[['DriverId', 'Position', 'Q1', 'Q2', 'Q3']]
     return qual_results[['FullName', 'Position', 'Q1', 'Q2', 'Q3']]
 
 
-def get_weather_data(year, race_name):
+def get_weather_data(year, race_name, session=None):
     """
-    Fetch weather data for a specific race.
+    Fetch the session mean weather of a specific race.
+
+    The phase-aligned weather of every driver (start, final third, wet laps and stints) comes
+    from Weather_Features through session_lap_features.
 
     Parameters:
     year (int): The year of the race
     race_name (str): The name of the race (e.g., 'British Grand Prix')
+    session (fastf1.core.Session): Already loaded race session, fetched through SESSION_CACHE if omitted
 
     Returns:
     pd.DataFrame: A DataFrame containing weather data for the specified race, 
                   including columns like 'AirTemp', 'TrackTemp', 'Humidity', 
                   'WindSpeed', 'WindDirection', and 'Rainfall'
     """
-    session = fastf1.get_session(year, race_name, 'R')
-    session.load(telemetry=False)  # Load session data
+    if session is None:
+        session = SESSION_CACHE.get(year, race_name, 'R')
     weather_data = session.weather_data.drop(columns=['Time'])
     avg_weather = weather_data.mean()  # Taking average weather conditions
     return avg_weather.to_frame().T  # Return as DataFrame for consistency
@@ -206,45 +424,223 @@ def merge_race_and_qualifying(race_results, qual_results):
     pd.DataFrame: A DataFrame combining race and qualifying results
     """
     # Merge on common columns, used to be 'DriverId'
-    merged_results = pd.merge(race_results, qual_results, on='FullName', how='left', suffixes=('_Race', '_Qual'))
+    with stage('merge') as record:
+        merged_results = pd.merge(race_results, qual_results, on='FullName', how='left', suffixes=('_Race', '_Qual'))
+        record.set(rows=len(merged_results))
     return merged_results
 
 
-def prepare_f1_data(start_year, end_year, file_path):
+def prepare_event(year, race_name, cache=None):
+    """
+    Build the merged race, qualifying and weather frame for a single event.
+
+    Parameters:
+    year (int): The year of the race
+    race_name (str): The name of the race (e.g., 'British Grand Prix')
+    cache (SessionCache): Session cache to use, defaults to the module-level SESSION_CACHE
+
+    Returns:
+    pd.DataFrame: One row per driver with race, qualifying and weather data, before postprocess_results
+    """
+    cache = cache if cache is not None else SESSION_CACHE
+    with stage('prepare_event', event=f'{year} {race_name}') as record:
+        loads_before, hits_before = cache.loads, cache.hits
+        # Load each session once and share it between the extractors
+        race_session, qual_session = load_event(year, race_name, cache)
+        race_results = get_race_results(year, race_name, session=race_session)
+        qual_results = get_qualifying_results(year, race_name, session=qual_session)
+        release_laps(qual_session)
+        with stage('weather_mean'):
+            weather_data = get_weather_data(year, race_name, session=race_session)
+        merged_results = merge_race_and_qualifying(race_results, qual_results)
+
+        # Reduce the race laps to per-driver aggregates and lap-aligned weather, the raw laps are released
+        # right away; the session means are constant per event and set in the same pass
+        with stage('lap_features'):
+            lap_data = session_lap_features(race_session)
+        with stage('join_features'):
+            driver_features = lap_data.set_index('Abbreviation').reindex(merged_results['Abbreviation'])
+            session_weather = np.repeat(weather_data.to_numpy(), len(merged_results), axis=0)
+            merged_results = pd.concat([merged_results, driver_features.set_axis(merged_results.index),
+                                        pd.DataFrame(session_weather, columns=weather_data.columns,
+                                                     index=merged_results.index)], axis=1)
+
+        merged_results['Year'] = year
+        merged_results['RaceName'] = race_name
+        record.set(rows=len(merged_results), session_loads=cache.loads - loads_before,
+                   session_hits=cache.hits - hits_before)
+    return merged_results
+
+
+def _prepare_event_job(year, race_name):
+    """
+    Run prepare_event inside a worker process without letting a failure escape.
+
+    Parameters:
+    year (int): The year of the race
+    race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+    Returns:
+    tuple: The merged event frame (None on failure), the error message (None on success)
+           and the number of sessions loaded by the worker for this event
+    """
+    loads_before = SESSION_CACHE.loads
+    try:
+        merged_results = prepare_event(year, race_name)
+        error = None
+    except Exception as exc:
+        merged_results = None
+        error = f"{type(exc).__name__}: {exc}"
+    return merged_results, error, SESSION_CACHE.loads - loads_before
+
+
+def _configure_worker(settings, backend):
+    """
+    Set a worker process up like the process that started the pool.
+
+    Workers started with spawn (the default on macOS and Windows) import this module afresh
+    and inherit none of the configuration, so it is passed to them explicitly.
+
+    Parameters:
+    settings (dict): FASTF1_SETTINGS of the parent, None if it was not configured
+    backend (str): FASTF1_BACKEND of the parent
+    """
+    global FASTF1_BACKEND
+    FASTF1_BACKEND = backend
+    if settings is not None:
+        configure(**settings)
+
+
+def list_events(start_year, end_year):
+    """
+    List the events of every season in the range, in schedule order.
+
+    Parameters:
+    start_year (int): The first year to include
+    end_year (int): The last year to include
+
+    Returns:
+    list: (year, race_name) tuples
+    """
+    ensure_configured()
+    events = []
+    for year in range(start_year, end_year + 1):
+        schedule = fastf1.get_event_schedule(year, backend=FASTF1_BACKEND)
+        events.extend((year, race) for race in schedule['EventName'])
+    return events
+
+
+def iter_event_frames(events, n_jobs=1, mp_context=None):
+    """
+    Prepare the given events and yield their frames as soon as each one is ready.
+
+    With n_jobs > 1 the events are fanned out over a process pool, so frames arrive in
+    completion order; the position of the event in `events` is yielded alongside the
+    frame so callers can restore schedule order. An event that fails is reported and
+    yielded with a None frame instead of aborting the build.
+
+    Every worker is configured with the FastF1 settings and backend of the calling process,
+    whatever the start method of the pool.
+
+    Parameters:
+    events (list): (year, race_name) tuples, e.g. from list_events
+    n_jobs (int): Number of worker processes, 1 runs in the current process
+    mp_context (multiprocessing.context.BaseContext): Start method of the pool, the platform default if None
+
+    Yields:
+    tuple: Index into events, merged event frame (None on failure), error message,
+           number of sessions loaded for the event
+    """
+    if n_jobs <= 1:
+        for idx, (year, race) in enumerate(events):
+            yield (idx,) + _prepare_event_job(year, race)
+        return
+
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp_context, initializer=_configure_worker,
+                             initargs=(FASTF1_SETTINGS, FASTF1_BACKEND)) as executor:
+        futures = {executor.submit(_prepare_event_job, year, race): idx
+                   for idx, (year, race) in enumerate(events)}
+        for future in as_completed(futures):
+            yield (futures[future],) + future.result()
+
+
+def prepare_f1_data(start_year, end_year, file_path, n_jobs=1, refresh=None):
     """
     This function retrieves race history data from the specified start year to end year, 
     merges it with qualifying results, and outputs a single dataset for each race.
 
+    Each event is stored as a shard under '<file_path>/shards' and recorded in a manifest,
+    so a rebuild only fetches events that are missing or stale and then assembles the
+    final table from the shards. Failed events are recorded in the manifest and only
+    fetched again after a backoff (see ShardStore) or when listed in `refresh`.
+
     Parameters:
     start_year (int): The first year to include in the data
     end_year (int): The last year to include in the data
+    file_path (str): The folder the output CSV and the shards are written to
+    n_jobs (int): Number of worker processes used to ingest events in parallel, -1 uses all cores
+    refresh (list): (year, race_name) tuples to fetch again even if their shard is current
 
     Outputs:
     - 'f1_data_<start_year>_<end_year>.csv': CSV file containing merged race and qualifying data for all races within the specified year range
+    - 'f1_data_<start_year>_<end_year>.parquet': The same data with native durations, datetimes and categoricals
+    - The History_Store checkpoint, extended with the races it has not seen yet
     """
-    all_data = []
-    for year in range(start_year, end_year + 1):
-        schedule = fastf1.get_event_schedule(year)
-        for race in schedule['EventName']:
-            race_results = get_race_results(year, race)
-            qual_results = get_qualifying_results(year, race)
-            weather_data = get_weather_data(year, race)
-            merged_results = merge_race_and_qualifying(race_results, qual_results)
-            
-            # Adding weather data to each driver's record
-            for col in weather_data.columns:
-                merged_results[col] = weather_data[col].iloc[0]
-                
-            merged_results['Year'] = year
-            merged_results['RaceName'] = race
-            all_data.append(merged_results)
-    
-    final_data = pd.concat(all_data, ignore_index=True)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    store = ShardStore(os.path.join(file_path, 'shards'))
+    with stage('list_events'):
+        events = list_events(start_year, end_year)
+    pending = store.pending(events, refresh)
+    waiting = store.backing_off(events, refresh)
+    print(f"{len(events) - len(pending) - len(waiting)} of {len(events)} events already built, "
+          f"fetching {len(pending)}.")
+    if waiting:
+        print(f"{len(waiting)} events failed recently and wait for their retry: {waiting}")
+
+    failed = []
+    loads = 0
+    for idx, merged_results, error, event_loads in iter_event_frames(pending, n_jobs):
+        year, race = pending[idx]
+        loads += event_loads
+        if error is not None:
+            print(f"Skipping {year} {race}: {error}")
+            store.record_failure(year, race, error)
+            failed.append((year, race))
+            continue
+        with stage('shard_write', event=f'{year} {race}', rows=len(merged_results)):
+            store.write(year, race, merged_results)
+
+    n_built = len(pending) - len(failed)
+    saved = UNSHARED_LOADS_PER_EVENT * n_built - loads
+    print(f"Loaded {loads} sessions for {n_built} events ({saved} session loads saved).")
+    if failed:
+        print(f"{len(failed)} events failed and were left out: {failed}")
+
+    # Assemble in schedule order regardless of the order the workers finished in
+    with stage('assemble') as record:
+        final_data = store.assemble(events)
+        record.set(rows=len(final_data))
+    # Categorical keys, native durations and downcast integers before any grouping or joining.
+    # Floats keep their precision, the frame is written to the data files below
+    with stage('compact', rows=len(final_data)):
+        final_data = compact(final_data, downcast_floats=False)
+    with stage('postprocess', rows=len(final_data)):
+        final_data = compact(postprocess_results(final_data), downcast_floats=False)
+    # Only the races the history store has not seen are added to its aggregates
+    with stage('history', rows=len(final_data)) as record:
+        history, _ = update_history(final_data)
+        record.set(races=len(history.races))
     output_filename = f'{file_path}/f1_data_{start_year}_{end_year}.csv'
-    final_data.to_csv(output_filename, index=False)
+    with stage('write_csv', rows=len(final_data)):
+        final_data.to_csv(output_filename, index=False)
+    with stage('write_parquet', rows=len(final_data)):
+        write_columnar(final_data, f'{file_path}/f1_data_{start_year}_{end_year}.parquet')
     print(f"Data preparation complete. File saved as '{output_filename}'.")
 
 if __name__ == "__main__":
     # Example usage: Prepare data from 2013 to 2023
+    configure()
     data_path = './data'
-    prepare_f1_data(2018, 2023, data_path)
\ No newline at end of file
+    prepare_f1_data(2018, 2023, data_path)
@@ -0,0 +1,277 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Rows are grouped per race for every race-level statistic
+RACE_KEYS = ['Year', 'RaceName']
+
+# Columns dropped from the raw prepare_f1_data output before wrangling
+COLUMNS_TO_DROP = ['Q1_Race', 'Q2_Race', 'Q3_Race', 'CountryCode', 'FirstName', 'LastName', 'CircuitId',
+                   'DriverNumber', 'BroadcastName', 'Abbreviation', 'Points', 'HeadshotUrl', 'TeamColor']
+
+# ClassifiedPosition values of drivers that did not finish (Retired, Withdrew, Disqualified)
+NOT_FINISHED_CODES = ['R', 'W', 'D']
+
+OUTPUT_COLUMNS = ['RaceDate', 'Year', 'RaceName', 'FullName', 'DriverId',
+                  'TeamName', 'TeamId', 'GridPosition', 'Position_Race', 'Podium_Finish',
+                  'TotalLength', 'MaxQualSpeed', 'Time', 'Speed', 'Finished']
+
+
+def race_codes(df, keys=RACE_KEYS):
+    """
+    Number every row by its race, so the race statistics share one grouping pass.
+
+    Parameters:
+    df (pd.DataFrame): The data
+    keys (list): The columns identifying a race
+
+    Returns:
+    tuple: Race number of every row (np.ndarray, in order of first appearance), number of races
+    """
+    codes = df.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+    return codes, int(codes.max()) + 1 if len(codes) else 0
+
+
+def group_extreme(codes, values, n_groups, ufunc=np.fmax):
+    """
+    Maximum (or minimum) of the values of every group, ignoring NaN, broadcast back to every row.
+
+    Parameters:
+    codes (np.ndarray): Group code of every value, from race_codes
+    values (np.ndarray): Values to reduce
+    n_groups (int): Number of groups
+    ufunc (np.ufunc): np.fmax for the maximum, np.fmin for the minimum
+
+    Returns:
+    np.ndarray: The extreme of the row's group for every row, NaN for groups without any value
+    """
+    # fmax/fmin skip NaN, so a group starting from NaN ends on its extreme or stays NaN
+    extremes = np.full(n_groups, np.nan)
+    ufunc.at(extremes, codes, values)
+    return extremes[codes]
+
+
+def first_in_group(df, column, keys, codes=None):
+    """
+    Broadcast the first value of a column within each race to all rows of that race.
+
+    Unlike groupby 'first', missing values are not skipped, matching `race[column].iloc[0]`.
+
+    Parameters:
+    df (pd.DataFrame): The data
+    column (str): The column to take the first value from
+    keys (list): The grouping columns
+    codes (np.ndarray): Race number of every row from race_codes, computed if not given
+
+    Returns:
+    np.ndarray: The first value of the row's race, for every row
+    """
+    if codes is None:
+        codes, _ = race_codes(df, keys)
+    _, first_positions = np.unique(codes, return_index=True)
+    return df[column].to_numpy()[first_positions][codes]
+
+
+def parse_laps_behind(status):
+    """
+    Extract n from '+n Lap(s)' statuses.
+
+    Status only has a few dozen distinct values, so each distinct value is parsed once
+    and the result is broadcast back through the factorized codes.
+
+    Parameters:
+    status (pd.Series): The Status column
+
+    Returns:
+    pd.Series: Number of laps behind the leader, NaN for any other status
+    """
+    codes, uniques = pd.factorize(status)
+    laps = pd.Series(uniques, dtype='string').str.extract(r'^\+([+-]?\d+)(?:\s|$)', expand=False)
+    laps = pd.to_numeric(laps, errors='coerce').to_numpy(dtype=float)
+    # Missing statuses get code -1 and stay NaN
+    return pd.Series(np.where(codes >= 0, laps[codes], np.nan), index=status.index)
+
+
+def sort_by_race(df, keys=RACE_KEYS):
+    """
+    Order rows by race and renumber them, as `groupby(keys).apply(...).reset_index(drop=True)` does.
+
+    Parameters:
+    df (pd.DataFrame): The data
+    keys (list): The grouping columns
+
+    Returns:
+    pd.DataFrame: The rows sorted by race, keeping the original order within each race
+    """
+    return df.sort_values(keys, kind='stable').reset_index(drop=True)
+
+
+def impute_qual(df, keys=RACE_KEYS, codes=None):
+    """
+    Time imputation for Qualify rounds.
+
+    A missing MinQualTime is replaced by 5% over the slowest qualifying time of the race.
+
+    Parameters:
+    df (pd.DataFrame): All races, with a MinQualTime column
+    keys (list): The columns identifying a race
+    codes (tuple): Output of race_codes for df, computed if not given
+
+    Returns:
+    pd.DataFrame: Imputed copy of the data, rows in their original order
+    """
+    codes, n_races = race_codes(df, keys) if codes is None else codes
+    qual_time = df['MinQualTime'].to_numpy(dtype=float)
+    max_time = group_extreme(codes, qual_time, n_races, np.fmax)
+    # Shallow copy: only the replaced column is new, the other columns are shared
+    df = df.copy(deep=False)
+    df['MinQualTime'] = np.where(np.isnan(qual_time), max_time * 1.05, qual_time)
+    return df
+
+
+def impute_time(df, keys=RACE_KEYS, codes=None):
+    """
+    Time imputation for finished racers.
+
+    Drivers classified '+n Lap(s)' without a Time get the slowest race time scaled by the laps
+    they were behind, plus the winner's time, and never less than the slowest time.
+
+    Parameters:
+    df (pd.DataFrame): All races, with Time (seconds), Status and TotalLaps columns
+    keys (list): The columns identifying a race
+    codes (tuple): Output of race_codes for df, computed if not given
+
+    Returns:
+    pd.DataFrame: Imputed copy of the data, rows in their original order
+    """
+    codes, n_races = race_codes(df, keys) if codes is None else codes
+    time = df['Time'].to_numpy(dtype=float)
+    max_time = group_extreme(codes, time, n_races, np.fmax)
+    min_time = group_extreme(codes, time, n_races, np.fmin)
+    total_laps = first_in_group(df, 'TotalLaps', keys, codes)
+    n_laps = parse_laps_behind(df['Status']).to_numpy()
+
+    imputed_time = max_time / total_laps * n_laps + min_time
+    # Ensure the imputed time is greater than the maximum time
+    imputed_time = np.where(imputed_time <= max_time, max_time, imputed_time)
+
+    time = np.where(np.isnan(time) & ~np.isnan(n_laps), imputed_time, time)
+
+    # Shallow copy: only the replaced column is new, the other columns are shared
+    df = df.copy(deep=False)
+    df['Time'] = time
+    return df
+
+
+def clean_results(data_df):
+    """
+    Drop the unused columns and the rows without a race position, and convert the times to seconds.
+
+    Also adds TotalLength and Podium_Finish, ranks drivers without qualifying last and moves
+    pit lane starts (GridPosition 0) to the back of the grid.
+
+    Parameters:
+    data_df (pd.DataFrame): The raw data, e.g. data/f1_data_2018_2023.csv
+
+    Returns:
+    pd.DataFrame: The cleaned data, rows in their original order
+    """
+    data_df = data_df.drop(columns=COLUMNS_TO_DROP)
+    data_df = data_df[~data_df['Position_Race'].isna()].copy()
+
+    # change Time into timedelta object, and then convert to total seconds
+    for col in ['Time', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual']:
+        data_df[col] = pd.to_timedelta(data_df[col], errors='coerce').dt.total_seconds()
+
+    # Lap counts and lengths may be compacted to int8/int16 (float32 with missing values),
+    # their product needs 64 bits
+    laps, lap_length = data_df['TotalLaps'], data_df['LapLength']
+    wide = 'int64' if pd.api.types.is_integer_dtype(laps) and pd.api.types.is_integer_dtype(lap_length) \
+        else 'float64'
+    data_df['TotalLength'] = laps.astype(wide) * lap_length.astype(wide)
+
+    # Drivers without qualifying rank last, GridPosition 0 means pit lane start
+    data_df['Position_Qual'] = data_df['Position_Qual'].fillna(20)
+    data_df['GridPosition'] = data_df['GridPosition'].replace(0, 20)
+    data_df['Podium_Finish'] = (data_df['Position_Race'] <= 3).astype(int)
+    return data_df
+
+
+def add_finished(df, not_finished_codes=NOT_FINISHED_CODES):
+    """
+    Flag the drivers that finished the race.
+
+    Parameters:
+    df (pd.DataFrame): The data, with a ClassifiedPosition column
+    not_finished_codes (list): ClassifiedPosition values of drivers that did not finish
+
+    Returns:
+    pd.DataFrame: Copy of the data with a Finished column
+    """
+    # Shallow copy: only the new column is added, the other columns are shared
+    df = df.copy(deep=False)
+    df['Finished'] = (~df['ClassifiedPosition'].isin(not_finished_codes)).astype(int)
+    return df
+
+
+def impute_times(df, keys=RACE_KEYS):
+    """
+    Impute the missing qualifying and race times per race, see impute_qual and impute_time.
+
+    Parameters:
+    df (pd.DataFrame): The cleaned data, times in seconds
+    keys (list): The columns identifying a race
+
+    Returns:
+    pd.DataFrame: The imputed data with a MinQualTime column, sorted by race
+    """
+    # Shallow copy: only the new column is added, the other columns are shared
+    df = df.copy(deep=False)
+    df['MinQualTime'] = df[['Q1_Qual', 'Q2_Qual', 'Q3_Qual']].min(axis=1, skipna=True)
+    df = sort_by_race(df, keys)
+    # Imputing keeps the row order, so both steps share the race numbers
+    codes = race_codes(df, keys)
+    return impute_time(impute_qual(df, keys, codes), keys, codes)
+
+
+def add_speed(df):
+    """
+    Add the race and qualifying speeds and keep the modelling columns.
+
+    Parameters:
+    df (pd.DataFrame): The imputed data
+
+    Returns:
+    pd.DataFrame: The processed data with OUTPUT_COLUMNS
+    """
+    df = df.copy(deep=False)
+    df['MaxQualSpeed'] = df['LapLength'] / df['MinQualTime']
+    # Add speed variable (meter per sec)
+    df['Speed'] = df['TotalLength'] / df['Time']
+    return df[OUTPUT_COLUMNS]
+
+
+def wrangle(data_df):
+    """
+    Turn the raw prepare_f1_data output into the processed, imputed modelling table.
+
+    This is the chain from DataWrangling_FeatureSelection.ipynb: it converts times to seconds,
+    adds the Finished, Podium_Finish, Speed and MaxQualSpeed columns and imputes the missing
+    qualifying and race times per race. Dataset_Graph runs the same steps one by one and
+    caches the output of each.
+
+    Parameters:
+    data_df (pd.DataFrame): The raw data, e.g. data/f1_data_2018_2023.csv
+
+    Returns:
+    pd.DataFrame: The processed data with OUTPUT_COLUMNS, sorted by race
+    """
+    return add_speed(impute_times(add_finished(clean_results(data_df))))
+
+
+if __name__ == "__main__":
+    # Example usage: python Data_Wrangling.py ./data/f1_data_2018_2023.csv ./data/f1_data_processed_full_imputed.csv
+    output_df = wrangle(pd.read_csv(sys.argv[1]))
+    output_df.to_csv(sys.argv[2], index=False)
+    print(f"Wrangling complete. File saved as '{sys.argv[2]}'.")
@@ -0,0 +1,421 @@
+"""
+Derived datasets as a graph of cached steps, from the raw prepare_f1_data output to the files in data/.
+
+Every step declares its inputs and parameters. Its output is stored once under the hash of
+its content, and it is looked up by a key made of the source of the step and of the helpers
+it declares, the module constants they read, its parameters and the content hashes of its inputs. Changing a step, or a file it reads, therefore recomputes
+that step and the steps downstream of it only. A step whose output comes out unchanged stops
+the recompute right there, since the steps after it see the same input hashes.
+
+Writing a CSV is an export of a node rather than a step of its own. The semicolon twins and
+other byte-identical copies are never written: an export whose bytes another export of the
+same run already writes is recorded as an alias. A target file that already holds the exact
+bytes is left untouched.
+
+Usage:
+python Dataset_Graph.py [--raw data/f1_data_2018_2023.csv] [--data-dir ./data] [--refresh]
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from collections import Counter
+from datetime import datetime, timezone
+
+from Columnar_Storage import read_table
+from Data_Wrangling import (add_finished, add_speed, clean_results, first_in_group, group_extreme, impute_qual,
+                            impute_time, impute_times, parse_laps_behind, race_codes, sort_by_race)
+from Model_Registry import _atomic_pickle, fingerprint_frame
+from Profiling import stage
+from Shard_Store import _atomic_write_bytes, file_sha256
+import Rating_Engine
+
+# Bump when the layout of the cache changes so every node is rebuilt once
+CACHE_VERSION = 1
+DERIVED_DIR = './data/derived'
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_RAW = './data/f1_data_2018_2023.csv'
+
+
+class Source:
+    """
+    A data file the graph starts from, identified by the SHA-256 of its bytes.
+
+    Parameters:
+    path (str): The path to the CSV, Parquet or Arrow file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.inputs = []
+
+    def key(self, input_hashes):
+        return file_sha256(self.path)
+
+    def run(self):
+        return read_table(self.path, compact_types=False)
+
+
+def _canonical(value):
+    """
+    Order-independent, JSON-serializable form of a constant, so its hash is stable across runs.
+
+    Parameters:
+    value: A module constant or default argument value
+
+    Returns:
+    The value with sets sorted, mappings as sorted pairs and arrays as lists
+    """
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(item) for item in value), key=repr)
+    if isinstance(value, dict):
+        return sorted(([_canonical(key), _canonical(item)] for key, item in value.items()), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+
+
+def _global_names(code):
+    # Names a function reads, including those of its nested functions and comprehensions
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def referenced_constants(func):
+    """
+    Values of the module constants a function reads and of its default arguments.
+
+    The source of a function only names them, `codes=NOT_FINISHED_CODES` hashes the same
+    whatever the list holds, so their values are part of the cache key too. Functions,
+    classes and modules it reads are left out, those are listed as helpers.
+
+    Parameters:
+    func (callable): A function, or a class whose methods are scanned
+
+    Returns:
+    dict: Name -> canonical value, defaults as '<function>(<argument>)'
+    """
+    if inspect.isclass(func):
+        constants = {}
+        for method in vars(func).values():
+            if inspect.isfunction(method):
+                constants.update(referenced_constants(method))
+        return constants
+    if not inspect.isfunction(func):
+        return {}
+    constants = {}
+    for name in sorted(_global_names(func.__code__)):
+        value = func.__globals__.get(name)
+        if name in func.__globals__ and not (callable(value) or inspect.ismodule(value)):
+            constants[name] = _canonical(value)
+    signature = inspect.signature(func)
+    for name, parameter in signature.parameters.items():
+        if parameter.default is not inspect.Parameter.empty:
+            constants[f'{func.__qualname__}({name})'] = _canonical(parameter.default)
+    return constants
+
+
+class Step:
+    """
+    A derivation: a function of the frames of its inputs and of keyword parameters.
+
+    The function must not modify its input frames, which may be shared with other steps.
+
+    Only the source of func itself is hashed, so the functions, classes or modules it delegates
+    to must be listed in helpers, otherwise editing them would not invalidate the cached output.
+    The values of the module constants and default arguments that func and its helpers read
+    are hashed with the sources.
+
+    Parameters:
+    func (callable): Called as func(*input_frames, **params), returns a pd.DataFrame
+    inputs (list): Names of the nodes whose outputs are passed to func, in order
+    params (dict): Keyword parameters of func, part of the cache key
+    helpers (list): Functions, classes or modules func calls, their source is part of the cache key
+    """
+
+    def __init__(self, func, inputs, params=None, helpers=None):
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.helpers = list(helpers or [])
+
+    def code_hash(self):
+        """
+        Hash of the source of func and of its helpers, and of the constants they read.
+
+        Returns:
+        str: Hex digest of the SHA-256 of the sources and constants
+        """
+        digest = hashlib.sha256()
+        for obj in [self.func] + self.helpers:
+            digest.update(inspect.getsource(obj).encode('utf-8'))
+            constants = json.dumps(referenced_constants(obj), sort_keys=True, default=repr)
+            digest.update(constants.encode('utf-8'))
+        return digest.hexdigest()
+
+    def key(self, input_hashes):
+        """
+        Cache key of the step for the given input contents.
+
+        Parameters:
+        input_hashes (list): Content hash of every input, in the order of inputs
+
+        Returns:
+        str: Hex digest of the SHA-256 of the step's code, parameters and input hashes
+        """
+        payload = json.dumps({'func': f'{self.func.__module__}.{self.func.__qualname__}', 'code': self.code_hash(),
+                              'params': self.params, 'inputs': list(input_hashes)}, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def run(self, *frames):
+        return self.func(*frames, **self.params)
+
+
+class DatasetGraph:
+    """
+    Named Sources and Steps, with the outputs of the steps cached by content hash.
+
+    Objects are pickled under '<cache_dir>/objects/<content hash>.pkl', so two steps with equal
+    outputs share one object. The manifest maps the key of every built step to its content
+    hash and records the exports.
+
+    Parameters:
+    cache_dir (str): Folder holding the objects and the manifest
+    """
+
+    def __init__(self, cache_dir=DERIVED_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.nodes = {}
+        self.manifest = self._load_manifest()
+        self.stats = Counter()
+        self._hashes = {}
+        self._frames = {}
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == CACHE_VERSION:
+                return manifest
+        return {'version': CACHE_VERSION, 'nodes': {}, 'exports': {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = json.dumps(self.manifest, indent=2, sort_keys=True).encode('utf-8')
+        _atomic_write_bytes(self.manifest_path, data)
+
+    def object_path(self, content_hash):
+        """
+        Path of a cached output.
+
+        Parameters:
+        content_hash (str): Content hash of the output, from fingerprint_frame
+
+        Returns:
+        str: Path such as './data/derived/objects/<hash>.pkl'
+        """
+        return os.path.join(self.cache_dir, 'objects', f'{content_hash}.pkl')
+
+    def add(self, name, node):
+        """
+        Add a node, replacing any node of the same name.
+
+        Parameters:
+        name (str): Name the other steps refer to the node by
+        node (Source or Step): The node
+
+        Returns:
+        DatasetGraph: The graph, for chaining
+        """
+        missing = [dep for dep in node.inputs if dep not in self.nodes]
+        if missing:
+            raise KeyError(f"Inputs {missing} of '{name}' must be added before it")
+        self.nodes[name] = node
+        return self
+
+    def resolve(self, name, refresh=False):
+        """
+        Content hash of a node's output, building the node and its inputs if they are not cached.
+
+        Inputs are only loaded when the node has to be built, so a fully cached chain costs one
+        manifest lookup per step.
+
+        Parameters:
+        name (str): Name of the node
+        refresh (bool): Build the steps again even if cached
+
+        Returns:
+        str: Content hash of the output (the file SHA-256 for a Source)
+        """
+        if name in self._hashes:
+            return self._hashes[name]
+        node = self.nodes[name]
+        input_hashes = [self.resolve(dep, refresh) for dep in node.inputs]
+        key = node.key(input_hashes)
+        if isinstance(node, Source):
+            self._hashes[name] = key
+            return key
+
+        entry = self.manifest['nodes'].get(key)
+        if entry is not None and not refresh and os.path.exists(self.object_path(entry['content'])):
+            self.stats['cached'] += 1
+        else:
+            frames = [self.load(dep) for dep in node.inputs]
+            with stage(f'derive:{name}') as record:
+                frame = node.run(*frames)
+                record.set(rows=len(frame))
+            content = fingerprint_frame(frame)
+            path = self.object_path(content)
+            if os.path.exists(path):
+                # Another step, or an earlier version of this one, produced the same data
+                self.stats['deduplicated'] += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _atomic_pickle(frame, path)
+            self.stats['built'] += 1
+            entry = {'step': name, 'content': content, 'rows': len(frame),
+                     'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+            self.manifest['nodes'][key] = entry
+            self._frames[name] = frame
+            self._save_manifest()
+        self._hashes[name] = entry['content']
+        return entry['content']
+
+    def load(self, name, refresh=False):
+        """
+        Output of a node, built if it is not cached.
+
+        Parameters:
+        name (str): Name of the node
+        refresh (bool): Build the steps again even if cached
+
+        Returns:
+        pd.DataFrame: The output, shared with the graph, so copy it before modifying it
+        """
+        content = self.resolve(name, refresh)
+        if name not in self._frames:
+            node = self.nodes[name]
+            if isinstance(node, Source):
+                self._frames[name] = node.run()
+            else:
+                with open(self.object_path(content), 'rb') as f:
+                    self._frames[name] = pickle.load(f)
+        return self._frames[name]
+
+    def materialize(self, exports, refresh=False):
+        """
+        Write nodes to CSV files, skipping byte-identical copies.
+
+        Parameters:
+        exports (list): (node name, path, separator) tuples
+        refresh (bool): Build the steps again even if cached
+
+        Returns:
+        dict: path -> 'written', 'unchanged' or 'alias of <path>'
+        """
+        outcome = {}
+        written = {}
+        for name, path, sep in exports:
+            content = self.resolve(name, refresh)
+            # The bytes of a CSV only depend on the content and the separator
+            signature = (content, sep)
+            if signature in written:
+                outcome[path] = f'alias of {written[signature]}'
+                self.manifest['exports'][path] = {'node': name, 'content': content, 'sep': sep,
+                                                  'alias_of': written[signature]}
+                continue
+            written[signature] = path
+            entry = self.manifest['exports'].get(path, {})
+            if entry.get('content') == content and entry.get('sep') == sep and os.path.exists(path) \
+                    and file_sha256(path) == entry.get('sha256'):
+                outcome[path] = 'unchanged'
+                continue
+            data = self.load(name).to_csv(index=False, sep=sep).encode('utf-8')
+            if os.path.exists(path) and file_sha256(path) == hashlib.sha256(data).hexdigest():
+                outcome[path] = 'unchanged'
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _atomic_write_bytes(path, data)
+                outcome[path] = 'written'
+            self.manifest['exports'][path] = {'node': name, 'content': content, 'sep': sep,
+                                              'sha256': hashlib.sha256(data).hexdigest()}
+        self._save_manifest()
+        return outcome
+
+
+def add_ratings(df, **params):
+    """
+    Join the pre-race driver and team ratings of Rating_Engine onto the processed data.
+
+    Parameters:
+    df (pd.DataFrame): The processed data, with the Rating_Engine RESULT_COLUMNS
+    params (dict): RatingEngine parameters
+
+    Returns:
+    pd.DataFrame: The data with RATING_COLUMNS added
+    """
+    return df.join(Rating_Engine.rating_features(df, **params))
+
+
+def wrangling_graph(raw_path=DEFAULT_RAW, cache_dir=DERIVED_DIR):
+    """
+    The chain of DataWrangling_FeatureSelection.ipynb as a graph, one node per derivation.
+
+    Parameters:
+    raw_path (str): The raw prepare_f1_data output
+    cache_dir (str): Folder holding the cached outputs
+
+    Returns:
+    DatasetGraph: Nodes raw, cleaned, finished, imputed, processed and rated
+    """
+    graph = DatasetGraph(cache_dir)
+    graph.add('raw', Source(raw_path))
+    graph.add('cleaned', Step(clean_results, ['raw']))
+    graph.add('finished', Step(add_finished, ['cleaned']))
+    graph.add('imputed', Step(impute_times, ['finished'],
+                              helpers=[sort_by_race, race_codes, impute_qual, impute_time, group_extreme,
+                                       first_in_group, parse_laps_behind]))
+    graph.add('processed', Step(add_speed, ['imputed']))
+    # The ratings come from the whole engine, so the key follows any change to Rating_Engine
+    graph.add('rated', Step(add_ratings, ['processed'], helpers=[Rating_Engine]))
+    return graph
+
+
+def default_exports(data_dir='./data'):
+    """
+    Files of data/ the graph maintains.
+
+    Parameters:
+    data_dir (str): The folder of the files
+
+    Returns:
+    list: (node name, path, separator) tuples
+    """
+    return [('processed', os.path.join(data_dir, 'f1_data_processed_full_imputed.csv'), ',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--raw', default=DEFAULT_RAW)
+    parser.add_argument('--data-dir', default='./data')
+    parser.add_argument('--cache-dir', default=DERIVED_DIR)
+    parser.add_argument('--refresh', action='store_true', help='build every step again')
+    args = parser.parse_args()
+
+    graph = wrangling_graph(args.raw, args.cache_dir)
+    for path, outcome in graph.materialize(default_exports(args.data_dir), refresh=args.refresh).items():
+        print(f"{path}: {outcome}")
+    print(f"steps built {graph.stats['built']}, cached {graph.stats['cached']}, "
+          f"deduplicated {graph.stats['deduplicated']}")
+
+
+if __name__ == "__main__":
+    main()
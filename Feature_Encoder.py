@@ -0,0 +1,140 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class FeatureEncoder:
+    """
+    One-hot encoder for the predictor features that is fitted once and reused.
+
+    The category vocabulary of every categorical column is stored at fit time, so rows of a
+    new race are encoded into exactly the training columns. Categories that were not seen
+    during fitting (a new driver, team or venue) get no active column instead of a new one.
+    Like `pd.get_dummies(..., drop_first=True)`, the first category of each column is the
+    baseline and has no column of its own.
+
+    Parameters:
+    categorical_cols (list): Columns to one-hot encode, the other columns pass through as numbers
+    drop_first (bool): Drop the first category of every column
+    output (str): 'sparse' for a scipy CSR matrix, 'codes' for integer category codes (tree models)
+    dtype (type): Value type of the sparse matrix
+    """
+
+    def __init__(self, categorical_cols, drop_first=True, output='sparse', dtype=np.float32):
+        if output not in ('sparse', 'codes'):
+            raise ValueError(f"output must be 'sparse' or 'codes', got '{output}'")
+        self.categorical_cols = list(categorical_cols)
+        self.drop_first = drop_first
+        self.output = output
+        self.dtype = dtype
+
+    def fit(self, df):
+        """
+        Learn the numeric columns and the category vocabulary.
+
+        Parameters:
+        df (pd.DataFrame): Training features
+
+        Returns:
+        FeatureEncoder: The fitted encoder
+        """
+        self.numeric_cols_ = [col for col in df.columns if col not in self.categorical_cols]
+        self.categories_ = {}
+        for col in self.categorical_cols:
+            values = df[col].dropna().unique()
+            # Sorted like pd.get_dummies so the dropped baseline category matches
+            self.categories_[col] = sorted(values.tolist())
+        return self
+
+    def _codes(self, df, col):
+        """
+        Integer codes of a categorical column, -1 for missing or unseen categories.
+
+        Parameters:
+        df (pd.DataFrame): Features to encode
+        col (str): The categorical column
+
+        Returns:
+        np.ndarray: The codes
+        """
+        return pd.Categorical(df[col], categories=self.categories_[col]).codes.astype(np.int32)
+
+    def transform(self, df):
+        """
+        Encode features with the fitted vocabulary.
+
+        Parameters:
+        df (pd.DataFrame): Features with the columns seen during fitting
+
+        Returns:
+        scipy.sparse.csr_matrix or pd.DataFrame: Sparse one-hot matrix, or numeric and code columns
+        """
+        if self.output == 'codes':
+            encoded = df[self.numeric_cols_].copy()
+            for col in self.categorical_cols:
+                encoded[col] = self._codes(df, col)
+            return encoded
+
+        n_rows = len(df)
+        blocks = [sparse.csr_matrix(df[self.numeric_cols_].to_numpy(dtype=self.dtype))]
+        offset = int(self.drop_first)
+        for col in self.categorical_cols:
+            n_cols = len(self.categories_[col]) - offset
+            codes = self._codes(df, col) - offset
+            rows = np.flatnonzero(codes >= 0)
+            data = np.ones(len(rows), dtype=self.dtype)
+            blocks.append(sparse.csr_matrix((data, (rows, codes[rows])), shape=(n_rows, max(n_cols, 0))))
+        return sparse.hstack(blocks, format='csr', dtype=self.dtype)
+
+    def fit_transform(self, df):
+        """
+        Fit the encoder and encode the same features.
+
+        Parameters:
+        df (pd.DataFrame): Training features
+
+        Returns:
+        scipy.sparse.csr_matrix or pd.DataFrame: The encoded features
+        """
+        return self.fit(df).transform(df)
+
+    def get_feature_names(self):
+        """
+        Names of the encoded columns, in the order transform outputs them.
+
+        Returns:
+        list: Numeric column names followed by '<column>_<category>' one-hot names (or the code columns)
+        """
+        if self.output == 'codes':
+            return self.numeric_cols_ + self.categorical_cols
+        names = list(self.numeric_cols_)
+        for col in self.categorical_cols:
+            names.extend(f'{col}_{category}' for category in self.categories_[col][int(self.drop_first):])
+        return names
+
+    def save(self, path):
+        """
+        Store the fitted encoder.
+
+        Parameters:
+        path (str): Destination file
+        """
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a stored encoder.
+
+        Parameters:
+        path (str): File written by save
+
+        Returns:
+        FeatureEncoder: The fitted encoder
+        """
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
@@ -1,35 +1,50 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, accuracy_score
-
-
-def data_loader(filepath, columns_to_include, categorical_cols):
+from Columnar_Storage import read_table, drop_unused_categories
+from Feature_Encoder import FeatureEncoder
+from Model_Registry import ModelRegistry
+from Profiling import stage
+from Rating_Engine import RATING_DIR, RATINGS_SUBDIR, load_rating_features
+
+# scikit-learn and matplotlib are imported by the functions that use them, so importing this
+# module (e.g. to predict with a stored model) stays cheap and never selects a plotting backend
+
+# Define the columns to include in the dataset
+COLUMNS_TO_INCLUDE = ['DriverId', 'TeamId', 'GridPosition', 'Year',
+                      'Position_Qual', 'AirTemp', 'Humidity', 'Pressure',
+                      'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed',
+                      'RaceName', 'Finished']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+TARGET = 'Finished'
+DEFAULT_FILEPATH = './data/f1_data_processed.csv'
+
+
+def data_loader(filepath, columns_to_include, categorical_cols, encode=True):
     """
     Load and preprocess the dataset by selecting specific columns and drop missing values
 
     Parameters:
-    filepath (str): The path to the CSV file
+    filepath (str): The path to the CSV, Parquet or Arrow file
     columns_to_include (list): List of columns to include in the output data
     categorical_cols (list): List of categorical columns
+    encode (bool): One-hot encode with pd.get_dummies, False keeps the categorical columns for a FeatureEncoder
 
     Returns:
     pd.DataFrame: loaded DataFrame.
     """
-    # load the dataset
-    df = pd.read_csv(filepath)
-
-    # select the specific columns
-    df = df[columns_to_include]
+    # load only the specific columns
+    df = read_table(filepath, columns_to_include)
 
     # drop na values
     df.dropna(inplace=True)
+    drop_unused_categories(df, categorical_cols)
 
     # Apply one-hot encoding to categorical variables
-    df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
+    if encode:
+        df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
 
     return df
 
@@ -45,6 +60,8 @@ def split_data(df, target_column):
     Returns:
     tuple: X_train, X_test, y_train, y_test
     """
+    from sklearn.model_selection import train_test_split
+
     X = df.drop(columns=[target_column])
     y = df[target_column]
     
@@ -62,8 +79,11 @@ def train_model(X_train, y_train):
     Returns:
     RandomForestClassifier: Trained model
     """
-    model = RandomForestClassifier(random_state=42)
-    model.fit(X_train, y_train)
+    from sklearn.ensemble import RandomForestClassifier
+
+    with stage('train_model', rows=len(X_train)):
+        model = RandomForestClassifier(random_state=42)
+        model.fit(X_train, y_train)
     return model
 
 
@@ -79,43 +99,92 @@ def evaluate_model(model, X_test, y_test):
     Returns:
     None
     """
-    predictions = model.predict(X_test)
+    from sklearn.metrics import classification_report, accuracy_score
+
+    with stage('predict', rows=len(y_test)):
+        predictions = model.predict(X_test)
     print("Accuracy:", accuracy_score(y_test, predictions))
     print("\nClassification Report:\n", classification_report(y_test, predictions))
 
 
-def main():
-    # Define the columns to include in the dataset
-    columns_to_include = ['DriverId', 'TeamId', 'GridPosition', 'Year', 
-                        'Position_Qual', 'AirTemp', 'Humidity', 'Pressure', 
-                        'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 
-                        'RaceName', 'Finished']
-    categorical_cols = ['DriverId', 'TeamId', 'RaceName', 'Year']
+def load_dataset(filepath=DEFAULT_FILEPATH, rating_dir=RATING_DIR):
+    """
+    Load the model columns and join the pre-race driver and team ratings
+
+    Parameters:
+    filepath (str): The path to the CSV, Parquet or Arrow file
+    rating_dir (str): Folder holding the rating checkpoints
 
-    filepath = './data/f1_data_processed.csv'
+    Returns:
+    pd.DataFrame: Features and target, categorical columns not encoded
+    """
+    with stage('data_loader') as record:
+        df = data_loader(filepath, COLUMNS_TO_INCLUDE, CATEGORICAL_COLS, encode=False)
+        record.set(rows=len(df))
 
-    df = data_loader(filepath, columns_to_include, categorical_cols)
+    # Pre-race driver and team ratings, only races missing from the checkpoint are applied
+    with stage('ratings'):
+        df = df.join(load_rating_features(filepath, rating_dir=rating_dir))
+    return df
+
+
+def fit(filepath=DEFAULT_FILEPATH, registry=None, refresh=False):
+    """
+    Train the model on the training split, or reuse the stored one
+
+    Parameters:
+    filepath (str): The path to the CSV, Parquet or Arrow file
+    registry (ModelRegistry): Store of fitted models, defaults to ModelRegistry()
+    refresh (bool): Fit again even if a stored model exists
+
+    Returns:
+    tuple: Fitted model, fitted encoder, X_test (not encoded), y_test, whether the model came from the registry
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    # The rating checkpoint is kept in the registry, next to the models trained on its features
+    registry = registry or ModelRegistry()
+    df = load_dataset(filepath, os.path.join(registry.registry_dir, RATINGS_SUBDIR))
 
     # Split the data
-    X_train, X_test, y_train, y_test = split_data(df, 'Finished')
+    X_train, X_test, y_train, y_test = split_data(df, TARGET)
 
-    model_rf = train_model(X_train, y_train)
+    # Fit the one-hot vocabulary on the training rows only, the model and encoder are reused
+    # from the registry as long as the data and parameters are unchanged
+    with stage('fit', rows=len(X_train)) as record:
+        model, encoder, cached = registry.fit_or_load(RandomForestClassifier(random_state=42), X_train, y_train,
+                                                      encoder=FeatureEncoder(CATEGORICAL_COLS), refresh=refresh)
+        record.set(cached=cached)
+    return model, encoder, X_test, y_test, cached
 
-    # Evaluate the model
-    evaluate_model(model_rf, X_test, y_test)
 
-    # Get the feature importances and feature names
-    importances = model_rf.feature_importances_
-    features = X_train.columns
+def feature_importances(model, encoder):
+    """
+    Importance of every encoded feature, most important first
+
+    Parameters:
+    model: Fitted model with feature_importances_
+    encoder (FeatureEncoder): Fitted encoder of the model
 
+    Returns:
+    pd.DataFrame: Feature and Importance columns
+    """
     # Create a DataFrame to view the feature importances
-    importance_df = pd.DataFrame({'Feature': features, 'Importance': importances})
-    importance_df = importance_df.sort_values(by='Importance', ascending=False)
+    importance_df = pd.DataFrame({'Feature': encoder.get_feature_names(), 'Importance': model.feature_importances_})
+    return importance_df.sort_values(by='Importance', ascending=False)
 
-    print(importance_df.head(10))
 
-    # plot the top 10 important features
-    plot_df = importance_df.head(10)
+def plot_feature_importances(importance_df, top=10):
+    """
+    Plot the most important features as horizontal bars
+
+    Parameters:
+    importance_df (pd.DataFrame): Output of feature_importances
+    top (int): Number of features to plot
+    """
+    import matplotlib.pyplot as plt
+
+    plot_df = importance_df.head(top)
 
     plt.figure(figsize=(10, 8))  # Increase figure size
     plt.barh(plot_df['Feature'], plot_df['Importance'], color='lightgreen')
@@ -130,5 +199,28 @@ def main():
     plt.show()
 
 
+def main(headless=False):
+    """
+    Train or load the model, evaluate it and show the feature importances
+
+    Parameters:
+    headless (bool): Print the importances only, without importing matplotlib
+    """
+    model_rf, encoder, X_test, y_test, cached = fit()
+    print("Loaded cached model" if cached else "Trained new model")
+    X_test = encoder.transform(X_test)
+
+    # Evaluate the model
+    evaluate_model(model_rf, X_test, y_test)
+
+    # Get the feature importances and feature names
+    importance_df = feature_importances(model_rf, encoder)
+    print(importance_df.head(10))
+
+    if not headless:
+        # plot the top 10 important features
+        plot_feature_importances(importance_df)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(headless='--headless' in sys.argv[1:])
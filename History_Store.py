@@ -0,0 +1,485 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from Columnar_Storage import read_table
+from Rating_Engine import RACE_ID, RESULT_COLUMNS, group_mean, normalize_results, race_digests
+from Model_Registry import REGISTRY_DIR
+
+# Bump when the layout of a checkpoint changes so old checkpoints are rebuilt
+CHECKPOINT_VERSION = 1
+HISTORY_DIR = os.path.join(REGISTRY_DIR, 'history')
+
+# Feature columns the store emits, all taken before the race they describe
+HISTORY_COLUMNS = ['DriverCareerRaces', 'DriverCareerAvgPosition', 'DriverCareerFinishRate',
+                   'DriverSeasonRaces', 'DriverSeasonAvgPosition',
+                   'DriverRecentAvgPosition', 'DriverRecentFinishRate',
+                   'DriverCircuitRaces', 'DriverCircuitAvgPosition', 'DriverCircuitBestPosition',
+                   'TeamSeasonAvgPosition', 'TeamRecentAvgPosition',
+                   'TeamCircuitRaces', 'TeamCircuitAvgPosition', 'TeamCircuitFinishRate']
+
+
+def _grow(array, size, fill):
+    # Double the capacity so appending rows costs amortized O(1)
+    if size <= len(array):
+        return array
+    grown = np.full((max(size, 2 * len(array), 16),) + array.shape[1:], fill)
+    grown[:len(array)] = array
+    return grown
+
+
+class AggregateTable:
+    """
+    Running totals of the races of one kind of key (a driver, a driver at a circuit, ...), one row per key.
+
+    Keys get a row the first time they appear and every race adds to the rows of its participants,
+    so an update and a lookup cost O(participants) whatever the length of the history. With a
+    window, the positions and finishes of the last `window` races are kept in a ring buffer for
+    the rolling means.
+
+    Parameters:
+    window (int): Number of recent races kept per key, 0 keeps totals only
+    """
+
+    FIELDS = ['Races', 'PositionSum', 'PositionCount', 'FinishSum', 'FinishCount', 'BestPosition']
+    INITIAL = [0.0, 0.0, 0.0, 0.0, 0.0, np.inf]
+
+    def __init__(self, window=0):
+        self.window = window
+        self.index = {}
+        self.state = np.empty((0, len(self.FIELDS)))
+        self.recent = np.empty((0, 2, window))
+
+    def rows(self, keys, add=True):
+        """
+        Row positions of the given keys.
+
+        Parameters:
+        keys (list): Keys, e.g. driver ids or (driver id, circuit) tuples of one race
+        add (bool): Add rows for keys seen for the first time, otherwise they get -1
+
+        Returns:
+        np.ndarray: Row positions into state
+        """
+        if add:
+            new = [key for key in dict.fromkeys(keys) if key not in self.index]
+            if new:
+                size = len(self.index)
+                self.index.update(zip(new, range(size, size + len(new))))
+                self.state = _grow(self.state, len(self.index), np.nan)
+                self.state[size:len(self.index)] = self.INITIAL
+                self.recent = _grow(self.recent, len(self.index), np.nan)
+                self.recent[size:len(self.index)] = np.nan
+        return np.fromiter((self.index.get(key, -1) for key in keys), dtype=np.intp, count=len(keys))
+
+    def add(self, rows, positions, finished):
+        """
+        Add the results of one race to the rows of its participants.
+
+        Parameters:
+        rows (np.ndarray): Row positions from rows(), one per participant and unique within the race
+        positions (np.ndarray): Finishing positions, NaN if unknown
+        finished (np.ndarray): 1 if the entry finished, 0 if not, NaN if unknown
+        """
+        state = self.state
+        if self.window:
+            slot = state[rows, 0].astype(np.intp) % self.window
+            self.recent[rows, 0, slot] = positions
+            self.recent[rows, 1, slot] = finished
+        has_position = ~np.isnan(positions)
+        has_finish = ~np.isnan(finished)
+        state[rows, 0] += 1
+        state[rows, 1] += np.where(has_position, positions, 0.0)
+        state[rows, 2] += has_position
+        state[rows, 3] += np.where(has_finish, finished, 0.0)
+        state[rows, 4] += has_finish
+        state[rows, 5] = np.fmin(state[rows, 5], positions)
+
+    def summary(self, rows):
+        """
+        Aggregates of the given rows, keys without a row (-1) get no races and NaN means.
+
+        Parameters:
+        rows (np.ndarray): Row positions from rows()
+
+        Returns:
+        dict: races, avg_position, finish_rate, best_position, recent_position and recent_finish arrays
+        """
+        known = rows >= 0
+        state = self.state[np.where(known, rows, 0)] if len(self.index) else np.tile(self.INITIAL, (len(rows), 1))
+        state[~known] = self.INITIAL
+
+        def mean(sums, counts):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(counts > 0, sums / counts, np.nan)
+
+        summary = {
+            'races': state[:, 0],
+            'avg_position': mean(state[:, 1], state[:, 2]),
+            'finish_rate': mean(state[:, 3], state[:, 4]),
+            'best_position': np.where(np.isinf(state[:, 5]), np.nan, state[:, 5]),
+        }
+        if self.window:
+            recent = self.recent[np.where(known, rows, 0)] if len(self.index) \
+                else np.full((len(rows), 2, self.window), np.nan)
+            recent[~known] = np.nan
+            valid = ~np.isnan(recent)
+            summary['recent_position'] = mean(np.where(valid[:, 0], recent[:, 0], 0.0).sum(axis=1),
+                                              valid[:, 0].sum(axis=1))
+            summary['recent_finish'] = mean(np.where(valid[:, 1], recent[:, 1], 0.0).sum(axis=1),
+                                            valid[:, 1].sum(axis=1))
+        return summary
+
+    def frame(self):
+        """
+        Current totals of every key.
+
+        Returns:
+        pd.DataFrame: One row per key with FIELDS as columns
+        """
+        # Tuple keys (driver, season) stay single labels rather than becoming a MultiIndex
+        keys = pd.Index(list(self.index), name='Key', tupleize_cols=False)
+        return pd.DataFrame(self.state[:len(self.index)], index=keys, columns=self.FIELDS)
+
+
+def normalize_history(results, circuit_column='CircuitId'):
+    """
+    Normalize results as normalize_results does and add the circuit key.
+
+    Parameters:
+    results (pd.DataFrame): Results with RESULT_COLUMNS and the circuit column
+    circuit_column (str): Column identifying the circuit of a race
+
+    Returns:
+    pd.DataFrame: Output of normalize_results with a str Circuit column
+    """
+    normalized = normalize_results(results)
+    normalized['Circuit'] = results[circuit_column].astype(str)
+    return normalized
+
+
+class HistoryStore:
+    """
+    Indexed driver, team and circuit history with precomputed rolling aggregates, updated race by race.
+
+    The aggregates are running totals keyed by driver, (driver, year), (driver, circuit), team,
+    (team, year) and (team, circuit), so applying a race touches only the rows of its
+    participants and the pre-race features of a grid are a keyed lookup instead of a scan of the
+    whole history. The features of every applied race are taken before its results are added and
+    kept in a row table indexed by (Year, RaceName, DriverId), so the checkpoint serves every
+    processed race without a recompute.
+
+    Parameters:
+    recent_races (int): Number of races in the driver and team recent form
+    circuit_column (str): Column of the results identifying the circuit, e.g. CircuitId or RaceName
+    """
+
+    def __init__(self, recent_races=5, circuit_column='CircuitId'):
+        self.recent_races = recent_races
+        self.circuit_column = circuit_column
+        self.drivers = AggregateTable(recent_races)
+        self.driver_seasons = AggregateTable()
+        self.driver_circuits = AggregateTable()
+        self.teams = AggregateTable(recent_races)
+        self.team_seasons = AggregateTable()
+        self.team_circuits = AggregateTable()
+        self.races = {}
+        self.last_date = None
+        self.index = {}
+        self._features = np.empty((0, len(HISTORY_COLUMNS)))
+
+    def get_params(self, deep=True):
+        return {'recent_races': self.recent_races, 'circuit_column': self.circuit_column}
+
+    def _race_keys(self, race):
+        drivers = race['DriverId'].tolist()
+        teams = race['TeamId'].tolist()
+        years = race['Year'].tolist()
+        circuits = race['Circuit'].tolist()
+        return drivers, teams, list(zip(drivers, years)), list(zip(drivers, circuits)), \
+            list(zip(teams, years)), list(zip(teams, circuits))
+
+    def _pre_race_values(self, race):
+        drivers, teams, driver_seasons, driver_circuits, team_seasons, team_circuits = self._race_keys(race)
+        driver = self.drivers.summary(self.drivers.rows(drivers, add=False))
+        driver_season = self.driver_seasons.summary(self.driver_seasons.rows(driver_seasons, add=False))
+        driver_circuit = self.driver_circuits.summary(self.driver_circuits.rows(driver_circuits, add=False))
+        team = self.teams.summary(self.teams.rows(teams, add=False))
+        team_season = self.team_seasons.summary(self.team_seasons.rows(team_seasons, add=False))
+        team_circuit = self.team_circuits.summary(self.team_circuits.rows(team_circuits, add=False))
+        # In the order of HISTORY_COLUMNS
+        return np.column_stack([
+            driver['races'], driver['avg_position'], driver['finish_rate'],
+            driver_season['races'], driver_season['avg_position'],
+            driver['recent_position'], driver['recent_finish'],
+            driver_circuit['races'], driver_circuit['avg_position'], driver_circuit['best_position'],
+            team_season['avg_position'], team['recent_position'],
+            team_circuit['races'], team_circuit['avg_position'], team_circuit['finish_rate'],
+        ])
+
+    def pre_race(self, race):
+        """
+        History features of the entries of a race, as they stand before it.
+
+        Parameters:
+        race (pd.DataFrame): One race with DriverId, TeamId, Year and Circuit, results not needed
+
+        Returns:
+        pd.DataFrame: HISTORY_COLUMNS on the race's index
+        """
+        return pd.DataFrame(self._pre_race_values(race), index=race.index, columns=HISTORY_COLUMNS)
+
+    def lookup(self, drivers, teams, circuit, year):
+        """
+        Pre-race feature rows of an upcoming grid, e.g. the 20 drivers of the next race.
+
+        Parameters:
+        drivers (list): Driver ids of the grid
+        teams (list): Team id of every driver
+        circuit (str): Circuit of the race, a value of circuit_column
+        year (int): Season of the race
+
+        Returns:
+        pd.DataFrame: HISTORY_COLUMNS indexed by DriverId
+        """
+        race = pd.DataFrame({'DriverId': [str(driver) for driver in drivers],
+                             'TeamId': [str(team) for team in teams],
+                             'Year': int(year), 'Circuit': str(circuit)})
+        return self.pre_race(race).set_axis(pd.Index(race['DriverId'], name='DriverId'))
+
+    def stored(self, keys):
+        """
+        Stored pre-race features of processed races.
+
+        Parameters:
+        keys (list): (year, race_name, driver_id) tuples
+
+        Returns:
+        np.ndarray: One row of HISTORY_COLUMNS per key, NaN for keys of races not processed
+        """
+        rows = np.fromiter((self.index.get(key, -1) for key in keys), dtype=np.intp, count=len(keys))
+        features = self._features[np.where(rows >= 0, rows, 0)] if len(self.index) \
+            else np.empty((len(keys), len(HISTORY_COLUMNS)))
+        features[rows < 0] = np.nan
+        return features
+
+    def update(self, race):
+        """
+        Add the results of one race to the aggregates of its drivers and teams.
+
+        Parameters:
+        race (pd.DataFrame): One race with DriverId, TeamId, Year, Circuit, Position_Race and Finished
+        """
+        # A driver listed twice counts once, with the first row as in process()
+        race = race[~race['DriverId'].duplicated().to_numpy()]
+        positions = race['Position_Race'].to_numpy(dtype=float)
+        finished = race['Finished'].to_numpy(dtype=float)
+        drivers, _, driver_seasons, driver_circuits, _, _ = self._race_keys(race)
+        for table, keys in ((self.drivers, drivers), (self.driver_seasons, driver_seasons),
+                            (self.driver_circuits, driver_circuits)):
+            table.add(table.rows(keys), positions, finished)
+
+        # Teams are scored on the mean of their drivers
+        codes, team_ids = pd.factorize(race['TeamId'])
+        team_ids = list(team_ids)
+        year, circuit = race['Year'].iloc[0], race['Circuit'].iloc[0]
+        team_positions = group_mean(codes, positions, len(team_ids))
+        team_finished = group_mean(codes, finished, len(team_ids))
+        for table, keys in ((self.teams, team_ids), (self.team_seasons, [(team, year) for team in team_ids]),
+                            (self.team_circuits, [(team, circuit) for team in team_ids])):
+            table.add(table.rows(keys), team_positions, team_finished)
+
+    def can_extend(self, results):
+        """
+        Check whether the state can absorb these results without a recompute.
+
+        That holds when every race already processed is unchanged and no new race is dated
+        before the last processed one.
+
+        Parameters:
+        results (pd.DataFrame): Output of normalize_history
+
+        Returns:
+        bool: True if process() can continue from the current state
+        """
+        digests = race_digests(results)
+        if any(self.races.get(race, digest) != digest for race, digest in digests.items()):
+            return False
+        new = ~pd.MultiIndex.from_frame(results[RACE_ID]).isin(list(self.races))
+        return self.last_date is None or not (results.loc[new, 'RaceDate'] < self.last_date).any()
+
+    def process(self, results):
+        """
+        Store the pre-race features of every new race, then apply its results, in date order.
+
+        Races already processed are skipped, races without any position (upcoming races) are
+        left to features(), which looks them up on the current state.
+
+        Parameters:
+        results (pd.DataFrame): Output of normalize_history
+
+        Returns:
+        int: Number of races applied
+        """
+        digests = race_digests(results)
+        new = results[~pd.MultiIndex.from_frame(results[RACE_ID]).isin(list(self.races))]
+        # Files may list races out of order, the state must see them by date
+        new = new.sort_values(['RaceDate', 'Year'], kind='stable')
+        applied = 0
+        for race_id, race in new.groupby(RACE_ID, sort=False):
+            if race['Position_Race'].isna().all():
+                continue
+            # Duplicate drivers within a race keep their first row, as a merge on the keys would
+            first = ~race['DriverId'].duplicated().to_numpy()
+            start = len(self.index)
+            self.index.update((race_id + (driver,), start + i) for i, driver in enumerate(race['DriverId'][first]))
+            self._features = _grow(self._features, len(self.index), np.nan)
+            self._features[start:len(self.index)] = self._pre_race_values(race)[first]
+            self.update(race)
+            self.races[race_id] = digests[race_id]
+            self.last_date = race['RaceDate'].iloc[0]
+            applied += 1
+        return applied
+
+    def features(self, results):
+        """
+        Leak-free history features of every row of the results.
+
+        Rows of processed races get the features stored when the race was applied, rows of
+        races not applied yet get the current aggregates.
+
+        Parameters:
+        results (pd.DataFrame): Output of normalize_history
+
+        Returns:
+        pd.DataFrame: HISTORY_COLUMNS on the results' index
+        """
+        keys = list(zip(results['Year'].tolist(), results['RaceName'].tolist(), results['DriverId'].tolist()))
+        stored = pd.DataFrame(self.stored(keys), index=results.index, columns=HISTORY_COLUMNS)
+        pending = ~pd.Series([key in self.index for key in keys], dtype=bool).to_numpy()
+        if pending.any():
+            stored.loc[pending] = self._pre_race_values(results[pending])
+        return stored
+
+    def save(self, path):
+        """
+        Write the state to a checkpoint.
+
+        Parameters:
+        path (str): Path of the pickle
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CHECKPOINT_VERSION, 'store': self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Read a checkpoint.
+
+        Parameters:
+        path (str): Path of the pickle
+
+        Returns:
+        HistoryStore: The stored history, or None if it is missing, unreadable or of an older version
+        """
+        try:
+            with open(path, 'rb') as f:
+                checkpoint = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+            return None
+        return checkpoint['store']
+
+
+def checkpoint_path(store, history_dir=HISTORY_DIR):
+    """
+    Path of the checkpoint of a store, keyed by its parameters.
+
+    Parameters:
+    store (HistoryStore): The store
+    history_dir (str): Folder holding the checkpoints
+
+    Returns:
+    str: Path such as './models/history/history_<hash>.pkl'
+    """
+    params = json.dumps(store.get_params(), sort_keys=True)
+    return os.path.join(history_dir, f"history_{hashlib.sha256(params.encode('utf-8')).hexdigest()[:16]}.pkl")
+
+
+def update_history(results, history_dir=HISTORY_DIR, refresh=False, **params):
+    """
+    Bring the stored history up to date with the results, applying only the races it has not seen.
+
+    The checkpoint is rebuilt from scratch when a processed race changed or a new race is dated
+    before the last processed one. Files without the circuit column fall back to RaceName,
+    which gets a checkpoint of its own.
+
+    Parameters:
+    results (pd.DataFrame): Race results with RESULT_COLUMNS and the circuit column
+    history_dir (str): Folder holding the checkpoints
+    refresh (bool): Ignore the checkpoint and rebuild the history
+    params (dict): HistoryStore parameters
+
+    Returns:
+    tuple: The up-to-date HistoryStore and the output of normalize_history
+    """
+    if params.get('circuit_column', 'CircuitId') not in results.columns:
+        params['circuit_column'] = 'RaceName'
+    path = checkpoint_path(HistoryStore(**params), history_dir)
+    store = None if refresh else HistoryStore.load(path)
+    results = normalize_history(results, (store or HistoryStore(**params)).circuit_column)
+    if store is None or not store.can_extend(results):
+        store = HistoryStore(**params)
+    if store.process(results):
+        store.save(path)
+    return store, results
+
+
+def history_features(results, **kwargs):
+    """
+    History features of every row, continuing from the checkpoint so only new races are applied.
+
+    Parameters:
+    results (pd.DataFrame): Race results with RESULT_COLUMNS and the circuit column
+    kwargs (dict): Arguments of update_history
+
+    Returns:
+    pd.DataFrame: HISTORY_COLUMNS on the results' index
+    """
+    store, results = update_history(results, **kwargs)
+    return store.features(results)
+
+
+def load_history_features(filepath, **kwargs):
+    """
+    History features of every row of a results file, for joining onto frames loaded from it.
+
+    Parameters:
+    filepath (str): The path to the CSV, Parquet or Arrow file
+    kwargs (dict): Arguments of update_history
+
+    Returns:
+    pd.DataFrame: HISTORY_COLUMNS on the row positions of the file, like the predictors' data_loader
+    """
+    circuit_column = kwargs.get('circuit_column', 'CircuitId')
+    try:
+        results = read_table(filepath, RESULT_COLUMNS + [circuit_column])
+    except (ValueError, KeyError):
+        # Files without the circuit column, e.g. the processed data, key circuits by RaceName
+        results = read_table(filepath, RESULT_COLUMNS)
+    return history_features(results, **kwargs)
+
+
+if __name__ == "__main__":
+    # Example usage: pre-race features of the last grid of the data, looked up at its circuit
+    store, results = update_history(read_table('./data/f1_data_processed.csv', RESULT_COLUMNS))
+    last = results[(results['Year'] == results['Year'].iloc[-1]) & (results['RaceName'] == results['RaceName'].iloc[-1])]
+    print(store.lookup(last['DriverId'], last['TeamId'], last['Circuit'].iloc[0], last['Year'].iloc[0]).round(2))
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from fastf1.exceptions import DataNotLoadedError
+except ImportError:
+    # Older FastF1 releases define it in fastf1.core only
+    from fastf1.core import DataNotLoadedError
+
+from Weather_Features import WEATHER_FEATURE_COLUMNS, weather_features
+
+# Per-driver aggregates added to every row of the prepare_f1_data output
+LAP_FEATURE_COLUMNS = ['LapsCompleted', 'MedianLapTime', 'BestLapTime', 'LapTimeStd', 'PitStops', 'PitLoss',
+                       'TyreDeg', 'StartCompound']
+
+# TrackStatus '1' is green flag running, any other code marks yellow flags, safety cars or red flags
+GREEN_FLAG = '1'
+
+
+def _seconds(laps, col):
+    """
+    Read a lap timing column as float seconds.
+
+    Parameters:
+    laps (pd.DataFrame): FastF1 laps
+    col (str): Timedelta column, e.g. 'LapTime'
+
+    Returns:
+    np.ndarray: Seconds, NaN where missing
+    """
+    return pd.to_timedelta(laps[col]).dt.total_seconds().to_numpy()
+
+
+def lap_features(laps):
+    """
+    Reduce the laps of one session to per-driver pace, pit-stop and tyre aggregates.
+
+    Clean laps are accurate, green-flag laps that are neither in- nor out-laps and were not
+    deleted; the pace and degradation figures only use those. Everything is computed with
+    grouped column operations over the whole session, there is no per-driver loop.
+
+    - LapsCompleted: number of laps driven
+    - MedianLapTime / BestLapTime / LapTimeStd: clean-lap pace and consistency, in seconds
+    - PitStops: number of stints minus one
+    - PitLoss: mean time lost per stop, in- plus out-lap over two clean laps, in seconds
+    - TyreDeg: lap time gained per lap of tyre age within a stint (pooled slope), in seconds
+    - StartCompound: tyre compound of the first lap
+
+    Parameters:
+    laps (pd.DataFrame): FastF1 laps (session.laps) of a race
+
+    Returns:
+    pd.DataFrame: One row per driver, keyed by Abbreviation, with LAP_FEATURE_COLUMNS
+    """
+    if len(laps) == 0:
+        return pd.DataFrame(columns=['Abbreviation'] + LAP_FEATURE_COLUMNS)
+
+    driver = laps['Driver'].to_numpy()
+    lap_time = _seconds(laps, 'LapTime')
+    pit_in = laps['PitInTime'].notna().to_numpy()
+    pit_out = laps['PitOutTime'].notna().to_numpy() & (laps['LapNumber'].to_numpy() > 1)
+    clean = (laps['IsAccurate'].fillna(False).to_numpy(dtype=bool)
+             & (laps['TrackStatus'].astype(str).to_numpy() == GREEN_FLAG)
+             & ~pit_in & ~pit_out & ~np.isnan(lap_time))
+    if 'Deleted' in laps.columns:
+        clean &= ~laps['Deleted'].fillna(False).to_numpy(dtype=bool)
+
+    frame = pd.DataFrame({'Abbreviation': driver, 'LapTime': lap_time, 'Stint': laps['Stint'].to_numpy(),
+                          'TyreLife': laps['TyreLife'].to_numpy(dtype=float)})
+    by_driver = frame.groupby('Abbreviation', sort=False)
+    features = pd.DataFrame({
+        'LapsCompleted': by_driver.size(),
+        'BestLapTime': by_driver['LapTime'].min(),
+        'PitStops': (by_driver['Stint'].nunique() - 1).clip(lower=0),
+        'StartCompound': laps.groupby('Driver', sort=False)['Compound'].first(),
+    })
+
+    clean_laps = frame[clean]
+    by_clean = clean_laps.groupby('Abbreviation', sort=False)['LapTime']
+    features['MedianLapTime'] = by_clean.median()
+    features['LapTimeStd'] = by_clean.std()
+
+    # Pit loss: in- and out-laps over the driver's median clean lap, per stop
+    reference = features['MedianLapTime'].reindex(driver).to_numpy()
+    pit_laps = frame.assign(Loss=lap_time - reference)[pit_in | pit_out]
+    pit_loss = pit_laps.groupby('Abbreviation', sort=False)['Loss'].sum()
+    features['PitLoss'] = pit_loss / features['PitStops'].where(features['PitStops'] > 0)
+
+    # Degradation: least-squares slope of lap time over tyre age, centred within each stint
+    stint = clean_laps.groupby(['Abbreviation', 'Stint'], sort=False)
+    dx = clean_laps['TyreLife'] - stint['TyreLife'].transform('mean')
+    dy = clean_laps['LapTime'] - stint['LapTime'].transform('mean')
+    sums = pd.DataFrame({'Abbreviation': clean_laps['Abbreviation'], 'xy': dx * dy, 'xx': dx * dx})
+    sums = sums.groupby('Abbreviation', sort=False)[['xy', 'xx']].sum()
+    features['TyreDeg'] = sums['xy'] / sums['xx'].where(sums['xx'] > 0)
+
+    features.index.name = 'Abbreviation'
+    return features[LAP_FEATURE_COLUMNS].reset_index()
+
+
+def loaded_data(session, name):
+    """
+    Read a data property of a session through the public FastF1 API.
+
+    Parameters:
+    session (fastf1.core.Session): A session
+    name (str): The property, e.g. 'laps' or 'weather_data'
+
+    Returns:
+    The data, None if the session was loaded without it
+    """
+    try:
+        return getattr(session, name)
+    except DataNotLoadedError:
+        return None
+
+
+def release_laps(session):
+    """
+    Drop the laps of a loaded session so only its results and weather stay in memory.
+
+    FastF1 has no call to unload data. Its laps property serves the `_laps` attribute, so
+    deleting that attribute frees the laps and makes session.laps report them as not loaded.
+    A release that keeps them elsewhere leaves them in memory, nothing else changes.
+
+    Parameters:
+    session (fastf1.core.Session): A loaded session, e.g. held by the SessionCache
+    """
+    if hasattr(session, '_laps'):
+        del session._laps
+
+
+def session_lap_features(session):
+    """
+    Extract the lap aggregates and the lap-aligned weather of a session, and release its laps right after.
+
+    The features are kept on the session, so a session served again by the SessionCache
+    still yields them once its laps are gone.
+
+    Parameters:
+    session (fastf1.core.Session): A race session loaded with laps and weather
+
+    Returns:
+    pd.DataFrame: The outputs of lap_features and weather_features side by side, empty if the
+                  session has no laps
+    """
+    features = getattr(session, '_lap_features', None)
+    if features is not None:
+        return features
+    laps = loaded_data(session, 'laps')
+    if laps is None:
+        # Sessions loaded without lap data contribute no features
+        return pd.DataFrame(columns=['Abbreviation'] + LAP_FEATURE_COLUMNS + WEATHER_FEATURE_COLUMNS)
+    try:
+        weather = weather_features(laps, loaded_data(session, 'weather_data'))
+        features = pd.concat([lap_features(laps).set_index('Abbreviation'), weather.set_index('Abbreviation')],
+                             axis=1).rename_axis('Abbreviation').reset_index()
+    finally:
+        del laps
+        release_laps(session)
+    session._lap_features = features
+    return features
@@ -0,0 +1,259 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import check_cv
+
+# Matrix and target of the comparison, opened once per worker process by _init_worker, and the
+# worker's buffer for the training rows of a fold
+_SHARED = {}
+
+
+def share_matrix(X, y, folder):
+    """
+    Write the feature matrix and target to memory-mapped .npy files that every worker can open.
+
+    Dense features are stored as one array; sparse features (e.g. from a FeatureEncoder) as the
+    data, indices and indptr arrays of their CSR form. Workers map the files read-only, so the
+    operating system keeps a single copy of the pages in memory however many workers there are.
+
+    Parameters:
+    X (pd.DataFrame, np.ndarray or scipy.sparse matrix): Prepared features, e.g. from data_loader
+    y (pd.Series or np.ndarray): Target
+    folder (str): Folder the arrays are written to
+
+    Returns:
+    dict: Name -> path of every stored array, plus 'sparse' and 'shape'
+    """
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+        arrays = {'data': X.data, 'indices': X.indices, 'indptr': X.indptr}
+    else:
+        X = X.to_numpy(dtype=np.float64) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float64)
+        arrays = {'X': X}
+    arrays['y'] = np.asarray(y)
+
+    spec = {'sparse': sparse.issparse(X), 'shape': X.shape}
+    for name, values in arrays.items():
+        path = os.path.join(folder, f'{name}.npy')
+        np.save(path, values)
+        spec[name] = path
+    return spec
+
+
+def open_matrix(spec):
+    """
+    Map the arrays written by share_matrix without reading them into memory.
+
+    Parameters:
+    spec (dict): The description returned by share_matrix
+
+    Returns:
+    tuple: Features (memmap or CSR matrix over memmaps), target
+    """
+    y = np.load(spec['y'], mmap_mode='r')
+    if spec['sparse']:
+        parts = [np.load(spec[name], mmap_mode='r') for name in ('data', 'indices', 'indptr')]
+        return sparse.csr_matrix(tuple(parts), shape=spec['shape'], copy=False), y
+    return np.load(spec['X'], mmap_mode='r'), y
+
+
+def _init_worker(spec, threads_per_worker):
+    """
+    Open the shared matrix once per worker and cap its native thread pools.
+
+    Parameters:
+    spec (dict): The description returned by share_matrix
+    threads_per_worker (int): BLAS/OpenMP threads allowed in each worker
+    """
+    from threadpoolctl import threadpool_limits
+    _SHARED['X'], _SHARED['y'] = open_matrix(spec)
+    threadpool_limits(limits=threads_per_worker)
+
+
+def _fold_rows(idx, buffered=False):
+    """
+    Rows of the shared matrix for one side of a fold, without allocating a copy per job.
+
+    With `buffered`, dense rows are gathered into the worker's buffer. The buffer is sized to
+    the largest training set the worker has seen, not to the matrix, and is only reallocated
+    when a larger one arrives. Otherwise a run of consecutive rows (the test rows of an
+    unshuffled KFold) is a read-only slice of the memmap, and other rows are gathered into
+    a new array, freed with the job: shuffled test rows cost one test fold per worker on top
+    of the buffer. Sparse rows are selected from the CSR matrix.
+
+    Parameters:
+    idx (np.ndarray): Row numbers
+    buffered (bool): Gather the rows into the worker's buffer
+
+    Returns:
+    tuple: The rows, only valid until the worker's next job, and whether they are in the buffer
+    """
+    X = _SHARED['X']
+    if sparse.issparse(X):
+        return X[idx], False
+    if not buffered:
+        if len(idx) and idx[-1] - idx[0] + 1 == len(idx) and (np.diff(idx) == 1).all():
+            return X[idx[0]:idx[-1] + 1], False
+        return X[idx], False
+    if len(_SHARED.get('buffer', ())) < len(idx):
+        # Free the smaller buffer before allocating, so the two never coexist
+        _SHARED.pop('buffer', None)
+        _SHARED['buffer'] = np.empty((len(idx),) + X.shape[1:], dtype=X.dtype)
+    # mode='clip' writes straight into out, 'raise' would gather into a temporary first
+    return np.take(X, idx, axis=0, out=_SHARED['buffer'][:len(idx)], mode='clip'), True
+
+
+def _run_job(name, fold, estimator, train_idx, test_idx, scoring):
+    """
+    Fit one model on one fold of the shared matrix and score it.
+
+    Parameters:
+    name (str): Model name
+    fold (int): Fold number
+    estimator: Unfitted estimator
+    train_idx (np.ndarray): Training rows of the fold
+    test_idx (np.ndarray): Test rows of the fold
+    scoring (list): Scorer names
+
+    Returns:
+    dict: One row of the metrics table
+    """
+    y = _SHARED['y']
+    start = time.perf_counter()
+    model = clone(estimator)
+    # The pool already runs one job per core, nested parallelism would only oversubscribe it
+    if model.get_params().get('n_jobs') not in (None, 1):
+        model.set_params(n_jobs=1)
+    X_train, in_buffer = _fold_rows(train_idx, buffered=True)
+    if in_buffer and model.get_params().get('copy_X'):
+        # The buffer is rewritten by the next job, linear models may center it in place
+        model.set_params(copy_X=False)
+    model.fit(X_train, y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    X_test, _ = _fold_rows(test_idx)
+    y_test = y[test_idx]
+    row = {'Model': name, 'Fold': fold}
+    for metric in scoring:
+        row[metric] = get_scorer(metric)(model, X_test, y_test)
+    row['FitSeconds'] = fit_seconds
+    row['WallSeconds'] = time.perf_counter() - start
+    row['Worker'] = os.getpid()
+    return row
+
+
+@contextmanager
+def shared_pool(X, y, n_jobs=-1, threads_per_worker=1, tmp_dir=None):
+    """
+    Share a matrix with a pool of workers and run (model x fold) jobs on it until the block exits.
+
+    The pool and the memory-mapped matrix are kept for the whole block, so callers that run
+    several batches of jobs (e.g. the rounds of a hyperparameter search) pay the start-up once.
+
+    Parameters:
+    X (pd.DataFrame, np.ndarray or scipy.sparse matrix): Prepared features
+    y (pd.Series or np.ndarray): Target
+    n_jobs (int): Number of worker processes, -1 uses all cores and 1 runs in the current process
+    threads_per_worker (int): BLAS/OpenMP threads allowed in each worker
+    tmp_dir (str): Folder for the memory-mapped files, a temporary folder by default
+
+    Yields:
+    callable: run(jobs, deadline=None) -> list of metric rows. Each job is a tuple of
+              (name, fold, estimator, train_idx, test_idx, scoring). Jobs that have not finished
+              by the time.monotonic() deadline are cancelled and left out of the rows; jobs
+              already running are allowed to complete.
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    folder = tempfile.mkdtemp(prefix='model_comparison_', dir=tmp_dir)
+    executor = None
+    try:
+        spec = share_matrix(X, y, folder)
+        if n_jobs <= 1:
+            _SHARED['X'], _SHARED['y'] = open_matrix(spec)
+        else:
+            executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                           initargs=(spec, threads_per_worker))
+
+        def run(jobs, deadline=None):
+            if executor is None:
+                return [_run_job(*job) for job in jobs
+                        if deadline is None or time.monotonic() < deadline]
+            futures = [executor.submit(_run_job, *job) for job in jobs]
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            rows = []
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    rows.append(future.result())
+            except TimeoutError:
+                for future in futures:
+                    future.cancel()
+            return rows
+
+        yield run
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        _SHARED.clear()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def compare_models(models, X, y, scoring, cv=5, n_jobs=-1, threads_per_worker=1, tmp_dir=None):
+    """
+    Cross-validate a set of models by running every (model x fold) job on a process pool.
+
+    The prepared matrix is written once to memory-mapped files that all workers share, so the
+    memory use does not grow with the number of workers. The folds are drawn once and used
+    for every model, so the scores are comparable fold by fold.
+
+    Parameters:
+    models (dict): Model name -> unfitted estimator
+    X (pd.DataFrame, np.ndarray or scipy.sparse matrix): Prepared features, e.g. from data_loader
+    y (pd.Series or np.ndarray): Target
+    scoring (str or list): sklearn scorer names, e.g. 'neg_mean_absolute_error' or ['accuracy', 'f1']
+    cv (int or splitter): Number of folds or a cross-validation splitter; stratified for classifiers
+    n_jobs (int): Number of worker processes, -1 uses all cores and 1 runs in the current process
+    threads_per_worker (int): BLAS/OpenMP threads allowed in each worker
+    tmp_dir (str): Folder for the memory-mapped files, a temporary folder by default
+
+    Returns:
+    pd.DataFrame: One row per (model, fold) with the scores, fit time, wall time and worker pid
+    """
+    scoring = [scoring] if isinstance(scoring, str) else list(scoring)
+    y = np.asarray(y)
+    classifier = any(is_classifier(estimator) for estimator in models.values())
+    folds = list(check_cv(cv, y, classifier=classifier).split(np.zeros((len(y), 1)), y))
+    jobs = [(name, fold, estimator, train_idx, test_idx, scoring)
+            for name, estimator in models.items()
+            for fold, (train_idx, test_idx) in enumerate(folds)]
+
+    with shared_pool(X, y, n_jobs, threads_per_worker, tmp_dir) as run:
+        rows = run(jobs)
+
+    return pd.DataFrame(rows).sort_values(['Model', 'Fold'], ignore_index=True)
+
+
+def summarize(results):
+    """
+    Aggregate the per-fold metrics table into one row per model.
+
+    Parameters:
+    results (pd.DataFrame): The table returned by compare_models
+
+    Returns:
+    pd.DataFrame: Mean and standard deviation of every score, and the total fit and wall time per model
+    """
+    metrics = [col for col in results.columns if col not in ('Model', 'Fold', 'FitSeconds', 'WallSeconds', 'Worker')]
+    summary = results.groupby('Model')[metrics].agg(['mean', 'std'])
+    summary.columns = [f'{metric}_{stat}' for metric, stat in summary.columns]
+    times = results.groupby('Model')[['FitSeconds', 'WallSeconds']].sum()
+    return summary.join(times).sort_values(f'{metrics[0]}_mean', ascending=False)
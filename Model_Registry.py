@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from Fast_Inference import compile_encoder, compile_model
+
+# Bump when the layout of a stored artifact changes so old artifacts are ignored
+ARTIFACT_VERSION = 1
+REGISTRY_DIR = './models'
+# Subfolder of the scoring-only copies of the artifacts, see ModelRegistry.load_compiled
+COMPILED_DIR = 'compiled'
+
+
+def fingerprint_frame(data):
+    """
+    Hash the content of a training frame or target, including column names, dtypes and index.
+
+    Parameters:
+    data (pd.DataFrame or pd.Series): The data to hash
+
+    Returns:
+    str: Hex digest of the SHA-256 of the data
+    """
+    digest = hashlib.sha256()
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in frame.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_params(obj):
+    """
+    Hash the class and constructor parameters of an unfitted estimator or encoder.
+
+    Parameters:
+    obj: Object with sklearn-style `get_params`, otherwise its attributes are used
+
+    Returns:
+    str: Hex digest of the SHA-256 of the parameters
+    """
+    params = obj.get_params(deep=True) if hasattr(obj, 'get_params') else vars(obj)
+    cls = type(obj)
+    payload = json.dumps({'class': f'{cls.__module__}.{cls.__qualname__}', 'params': params},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _atomic_pickle(obj, path):
+    # Readers never see a half-written file, the rename replaces it in one step
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    """
+    Local store of fitted models and their encoders, keyed by what they were trained on.
+
+    The key combines fingerprints of the training features, the target, the estimator
+    parameters and the encoder settings, plus the scikit-learn version the model was pickled
+    with. Any change to the data or the hyperparameters gives a new key, so a hit is always
+    a model that a fresh fit would reproduce.
+
+    Parameters:
+    registry_dir (str): Folder holding the artifacts
+    """
+
+    def __init__(self, registry_dir=REGISTRY_DIR):
+        self.registry_dir = registry_dir
+        os.makedirs(registry_dir, exist_ok=True)
+
+    def artifact_key(self, estimator, X_train, y_train, encoder=None):
+        """
+        Build the key of a model trained on the given data.
+
+        Parameters:
+        estimator: Unfitted estimator
+        X_train (pd.DataFrame): Training features, before encoding
+        y_train (pd.Series): Training target
+        encoder (FeatureEncoder): Unfitted encoder applied to the features, if any
+
+        Returns:
+        str: Hex digest identifying the artifact
+        """
+        # Imported here so loading artifacts for prediction does not pay for scikit-learn's import
+        import sklearn
+
+        parts = {
+            'version': ARTIFACT_VERSION,
+            'sklearn': sklearn.__version__,
+            'features': fingerprint_frame(X_train),
+            'target': fingerprint_frame(y_train),
+            'estimator': fingerprint_params(estimator),
+            'encoder': None if encoder is None else fingerprint_params(encoder),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        """
+        Path of an artifact file.
+
+        Parameters:
+        key (str): The artifact key
+
+        Returns:
+        str: Path of the pickle
+        """
+        return os.path.join(self.registry_dir, f'{key}.pkl')
+
+    def metadata_path(self, key):
+        """
+        Path of the metadata written next to an artifact.
+
+        Parameters:
+        key (str): The artifact key
+
+        Returns:
+        str: Path of the JSON file
+        """
+        return os.path.join(self.registry_dir, f'{key}.json')
+
+    def compiled_path(self, key):
+        """
+        Path of the scoring-only copy of an artifact.
+
+        Parameters:
+        key (str): The artifact key
+
+        Returns:
+        str: Path of the pickle
+        """
+        return os.path.join(self.registry_dir, COMPILED_DIR, f'{key}.pkl')
+
+    def load(self, key):
+        """
+        Load a stored artifact.
+
+        Parameters:
+        key (str): The artifact key
+
+        Returns:
+        dict: The artifact with 'model', 'encoder' and 'metadata', or None if it is missing or unreadable
+        """
+        try:
+            with open(self.path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def save(self, key, model, encoder=None, metadata=None):
+        """
+        Store a fitted model and its encoder, with the scoring-only copy load_compiled reads.
+
+        Parameters:
+        key (str): The artifact key
+        model: Fitted estimator
+        encoder (FeatureEncoder): Fitted encoder, if any
+        metadata (dict): Extra information stored next to the model
+        """
+        artifact = {'model': model, 'encoder': encoder, 'metadata': metadata or {}}
+        _atomic_pickle(artifact, self.path(key))
+        self._write_metadata(key, artifact['metadata'])
+        self._save_compiled(key, artifact)
+
+    def _write_metadata(self, key, metadata):
+        # Listing the registry reads the metadata alone instead of unpickling every model
+        tmp_path = f'{self.metadata_path(key)}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(metadata, f, default=str)
+        os.replace(tmp_path, self.metadata_path(key))
+
+    def _save_compiled(self, key, artifact):
+        # Compiling walks every tree of the forest, it is done once when the model is stored
+        compiled = {'model': compile_model(artifact['model']), 'encoder': compile_encoder(artifact['encoder']),
+                    'metadata': artifact['metadata']}
+        os.makedirs(os.path.dirname(self.compiled_path(key)), exist_ok=True)
+        _atomic_pickle(compiled, self.compiled_path(key))
+
+    def load_compiled(self, key):
+        """
+        Load the scoring-only copy of an artifact, written by save.
+
+        Forests and sparse encoders are replaced by their Fast_Inference equivalents, which
+        predict the same values and unpickle without importing scikit-learn, so a process that
+        only predicts starts in a fraction of the time. The copy is never built here: an
+        artifact stored without one (before the copies existed) is returned as stored, and
+        fit_or_load writes its copy the next time it is reused for training.
+
+        Parameters:
+        key (str): The artifact key
+
+        Returns:
+        dict: The artifact with 'model', 'encoder' and 'metadata', or None if it is missing or unreadable
+        """
+        try:
+            with open(self.compiled_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return self.load(key)
+
+    def entries(self):
+        """
+        List the metadata of all stored artifacts.
+
+        Returns:
+        pd.DataFrame: One row per artifact with its key and metadata
+        """
+        rows = []
+        for name in sorted(os.listdir(self.registry_dir)):
+            if name.endswith('.pkl'):
+                key = name[:-len('.pkl')]
+                try:
+                    with open(self.metadata_path(key)) as f:
+                        metadata = json.load(f)
+                except (OSError, ValueError):
+                    # Artifacts stored before the metadata files were written get theirs now
+                    artifact = self.load(key)
+                    if artifact is None:
+                        continue
+                    metadata = artifact['metadata']
+                    self._write_metadata(key, metadata)
+                rows.append({'key': key, **metadata})
+        return pd.DataFrame(rows)
+
+    def fit_or_load(self, estimator, X_train, y_train, encoder=None, refresh=False):
+        """
+        Return the stored model for this data and these parameters, fitting and storing it on a miss.
+
+        Parameters:
+        estimator: Unfitted estimator
+        X_train (pd.DataFrame): Training features, before encoding
+        y_train (pd.Series): Training target
+        encoder (FeatureEncoder): Unfitted encoder fitted on X_train before the estimator, if any
+        refresh (bool): Fit again even if a stored model exists
+
+        Returns:
+        tuple: Fitted model, fitted encoder (None without encoder), whether the model came from the registry
+        """
+        key = self.artifact_key(estimator, X_train, y_train, encoder)
+        artifact = None if refresh else self.load(key)
+        if artifact is not None:
+            if not os.path.exists(self.compiled_path(key)):
+                self._save_compiled(key, artifact)
+            return artifact['model'], artifact['encoder'], True
+
+        start = time.perf_counter()
+        X_fit = X_train if encoder is None else encoder.fit_transform(X_train)
+        model = estimator.fit(X_fit, y_train)
+        metadata = {
+            'estimator': type(estimator).__name__,
+            'rows': len(X_train),
+            'features': X_fit.shape[1],
+            'fit_seconds': round(time.perf_counter() - start, 3),
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self.save(key, model, encoder, metadata)
+        return model, encoder, False
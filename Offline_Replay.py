@@ -0,0 +1,458 @@
+import json
+import os
+import pickle
+import threading
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import fastf1
+import fastf1.ergast.legacy
+import fastf1.req
+import pandas as pd
+
+import Data_Preparation
+
+# The recorded FastF1 cache shipped with the repo, used as the default replay store
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# Race and qualifying results recorded by an online prepare_f1_data run, the source of the
+# seeded Ergast results
+RECORDED_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'f1_data_2018_2023.csv')
+ERGAST_PREFIX = '/ergast/f1'
+UPSTREAM_ERGAST = 'https://api.jolpi.ca/ergast/f1'
+
+# Unroutable proxy for every non-local request while replaying, so a missing recording
+# fails immediately instead of silently reaching the network
+_BLOCKING_PROXY = 'http://127.0.0.1:9'
+
+
+def ergast_record_path(store_dir, path, query=''):
+    """
+    Map an Ergast request onto its file in the replay store.
+
+    Parameters:
+    store_dir (str): Root of the replay store
+    path (str): Request path below the Ergast base URL, e.g. '/2023/10/results.json'
+    query (str): Raw query string, e.g. 'limit=100&offset=0'
+
+    Returns:
+    str: Path such as '<store>/ergast/2023/10/results__limit-100_offset-0.json'
+    """
+    stem, ext = os.path.splitext(path.strip('/'))
+    if query:
+        params = sorted(param.replace('=', '-') for param in query.split('&') if param)
+        stem = f"{stem}__{'_'.join(params)}"
+    return os.path.join(store_dir, 'ergast', *f'{stem}{ext or ".json"}'.split('/'))
+
+
+class ErgastReplayHandler(BaseHTTPRequestHandler):
+    """
+    Serve Ergast API requests from the replay store, recording them from upstream if configured.
+    """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith(ERGAST_PREFIX):
+            self._send(404, b'{}')
+            return
+        path = url.path[len(ERGAST_PREFIX):]
+        record_path = ergast_record_path(self.server.store_dir, path, url.query)
+
+        if os.path.exists(record_path):
+            with open(record_path, 'rb') as f:
+                body = f.read()
+            self.server.count('hits')
+            self._send(200, body)
+            return
+
+        if self.server.upstream is None:
+            self.server.miss(self.path)
+            self._send(404, json.dumps({'error': f'no recording for {self.path}'}).encode('utf-8'))
+            return
+
+        # Record mode: fetch from the real API once and keep the response
+        upstream_url = self.server.upstream + path + (f'?{url.query}' if url.query else '')
+        try:
+            with urllib.request.urlopen(upstream_url, timeout=30) as response:
+                body = response.read()
+        except urllib.error.HTTPError as exc:
+            self.server.count('errors')
+            self._send(exc.code, b'{}')
+            return
+        os.makedirs(os.path.dirname(record_path), exist_ok=True)
+        with open(record_path, 'wb') as f:
+            f.write(body)
+        self.server.count('recorded')
+        self._send(200, body)
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean, the counters report what was served
+        pass
+
+
+class ReplayMissError(RuntimeError):
+    """
+    Raised when a replayed run requested Ergast data the store has no recording of.
+    """
+
+
+class ErgastReplayServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Ergast API backed by the replay store.
+
+    Parameters:
+    store_dir (str): Root of the replay store
+    upstream (str): Real Ergast base URL to record missing responses from, None to replay only
+    port (int): Port to listen on, 0 picks a free port
+    """
+    daemon_threads = True
+
+    def __init__(self, store_dir, upstream=None, port=0):
+        super().__init__(('127.0.0.1', port), ErgastReplayHandler)
+        self.store_dir = store_dir
+        self.upstream = upstream
+        self.stats = defaultdict(int)
+        self.missed = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        """
+        Ergast base URL to point FastF1 at.
+
+        Returns:
+        str: URL such as 'http://localhost:54321/ergast/f1'
+        """
+        return f'http://localhost:{self.server_address[1]}{ERGAST_PREFIX}'
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def miss(self, path):
+        # FastF1 turns a failed request into a warning, the miss is kept so replay_mode can fail
+        with self._lock:
+            self.stats['misses'] += 1
+            self.missed.append(path)
+
+    def start(self):
+        """
+        Serve requests from a background thread.
+
+        Returns:
+        ErgastReplayServer: The started server
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def seed_ergast_schedules(store_dir):
+    """
+    Write Ergast season schedules for the sessions found in the FastF1 cache layout.
+
+    The recorded `<year>/<date>_<event>/<date>_<session>/session_info.ff1pkl` files are
+    enough to rebuild a schedule of the recorded events, so a store seeded from the repo's
+    `cache/` folder can be replayed without ever having recorded the schedule. Seasons that
+    already have a recorded schedule are left untouched.
+
+    Parameters:
+    store_dir (str): Root of the replay store
+
+    Returns:
+    list: The seasons a schedule was written for
+    """
+    seeded = []
+    for year in sorted(os.listdir(store_dir)):
+        year_dir = os.path.join(store_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        schedule_path = ergast_record_path(store_dir, f'/{year}.json')
+        if os.path.exists(schedule_path):
+            continue
+
+        races = []
+        for event_dir in sorted(os.listdir(year_dir)):
+            for session_dir in sorted(os.listdir(os.path.join(year_dir, event_dir))):
+                info_path = os.path.join(year_dir, event_dir, session_dir, 'session_info.ff1pkl')
+                if not os.path.exists(info_path):
+                    continue
+                with open(info_path, 'rb') as f:
+                    info = pickle.load(f)['data']
+                if info['Type'] != 'Race':
+                    continue
+                start_utc = info['StartDate'] - info['GmtOffset']
+                meeting = info['Meeting']
+                races.append({
+                    'season': year,
+                    'raceName': meeting['Name'],
+                    'Circuit': {'circuitId': meeting['Circuit']['ShortName'].lower().replace(' ', '_'),
+                                'circuitName': meeting['Circuit']['ShortName'],
+                                'Location': {'locality': meeting['Location'],
+                                             'country': meeting['Country']['Name']}},
+                    'date': start_utc.strftime('%Y-%m-%d'),
+                    'time': start_utc.strftime('%H:%M:%SZ'),
+                })
+        if not races:
+            continue
+
+        races.sort(key=lambda race: (race['date'], race['time']))
+        for rnd, race in enumerate(races, start=1):
+            race['round'] = str(rnd)
+        payload = {'MRData': {'series': 'f1', 'limit': '1000', 'offset': '0', 'total': str(len(races)),
+                              'RaceTable': {'season': year, 'Races': races}}}
+        os.makedirs(os.path.dirname(schedule_path), exist_ok=True)
+        with open(schedule_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        seeded.append(int(year))
+    return seeded
+
+
+def _ergast_duration(seconds, sign=''):
+    # Ergast writes durations as [h:]m:ss.fff, or s.fff below a minute
+    millis = int(round(seconds * 1000))
+    hours, rest = divmod(millis, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    secs, millis = divmod(rest, 1000)
+    if hours:
+        return f'{sign}{hours}:{minutes:02d}:{secs:02d}.{millis:03d}'
+    if minutes:
+        return f'{sign}{minutes}:{secs:02d}.{millis:03d}'
+    return f'{sign}{secs}.{millis:03d}'
+
+
+def _race_session_dirs(year_dir):
+    """
+    Race session folders of a season in the FastF1 cache layout.
+
+    Parameters:
+    year_dir (str): Season folder of the replay store
+
+    Returns:
+    dict: Meeting name -> race session folder
+    """
+    sessions = {}
+    for event_dir in sorted(os.listdir(year_dir)):
+        for session_dir in sorted(os.listdir(os.path.join(year_dir, event_dir))):
+            info_path = os.path.join(year_dir, event_dir, session_dir, 'session_info.ff1pkl')
+            if not os.path.exists(info_path):
+                continue
+            with open(info_path, 'rb') as f:
+                info = pickle.load(f)['data']
+            if info['Type'] == 'Race':
+                sessions[info['Meeting']['Name']] = os.path.join(year_dir, event_dir, session_dir)
+    return sessions
+
+
+def _ergast_entry(row):
+    return {
+        'number': str(int(row['DriverNumber'])),
+        'Driver': {'driverId': row['DriverId'], 'permanentNumber': str(int(row['DriverNumber'])),
+                   'code': row['Abbreviation'], 'givenName': row['FirstName'], 'familyName': row['LastName']},
+        'Constructor': {'constructorId': row['TeamId'], 'name': row['TeamName']},
+    }
+
+
+def _race_results(rows, laps_by_number):
+    rows = rows.sort_values('Position_Race')
+    times = pd.to_timedelta(rows['Time'], errors='coerce').dt.total_seconds()
+    winner_time = times[rows['Position_Race'] == 1].min()
+    results = []
+    for (_, row), time in zip(rows.iterrows(), times):
+        entry = {'position': str(int(row['Position_Race'])), 'positionText': str(row['ClassifiedPosition']),
+                 'points': f"{row['Points']:g}", 'grid': str(int(row['GridPosition'])),
+                 'laps': str(laps_by_number.get(str(int(row['DriverNumber'])), 0)), 'status': row['Status'],
+                 **_ergast_entry(row)}
+        if not pd.isna(time):
+            # Ergast gives the winner's race time and the gap of the others on the lead lap
+            gap = time if row['Position_Race'] == 1 else time - winner_time
+            entry['Time'] = {'millis': str(int(round(time * 1000))),
+                             'time': _ergast_duration(gap, sign='' if row['Position_Race'] == 1 else '+')}
+        results.append(entry)
+    return results
+
+
+def _qualifying_results(rows):
+    results = []
+    for _, row in rows.dropna(subset=['Position_Qual']).sort_values('Position_Qual').iterrows():
+        entry = {'position': str(int(row['Position_Qual'])), **_ergast_entry(row)}
+        for col in ('Q1', 'Q2', 'Q3'):
+            seconds = pd.to_timedelta(row[f'{col}_Qual'], errors='coerce').total_seconds()
+            if not pd.isna(seconds):
+                entry[col] = _ergast_duration(seconds)
+        results.append(entry)
+    return results
+
+
+def _first_lap_timings(session_dir, driver_ids):
+    """
+    Time of the first lap of every driver, from the recorded live timing of a race.
+
+    Live timing has no first lap time, which is why FastF1 asks Ergast for it. The lap ends
+    are recorded though, so the first lap is taken as its end minus the session start.
+    """
+    with open(os.path.join(session_dir, '_extended_timing_data.ff1pkl'), 'rb') as f:
+        laps = pickle.load(f)['data'][0]
+    with open(os.path.join(session_dir, 'session_status_data.ff1pkl'), 'rb') as f:
+        status = pickle.load(f)['data']
+    start = status['Time'][status['Status'].index('Started')]
+    first = laps[laps['NumberOfLaps'] == 1].sort_values('Time')
+    return [{'driverId': driver_ids[number], 'position': str(position),
+             'time': _ergast_duration((end - start).total_seconds())}
+            for position, (number, end) in enumerate(zip(first['Driver'], first['Time']), start=1)
+            if number in driver_ids]
+
+
+def _write_response(path, race, key, content):
+    payload = {'MRData': {'series': 'f1', 'limit': '100', 'offset': '0', 'total': str(len(content)),
+                          'RaceTable': {'season': race['season'], 'round': race['round'],
+                                        'Races': [{**race, key: content}]}}}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+
+
+def seed_ergast_results(store_dir, results_path=RECORDED_RESULTS):
+    """
+    Write Ergast race results, qualifying results and first lap times for the recorded races.
+
+    The results come from the dataset an online prepare_f1_data run wrote (one row per driver
+    with ids, positions, times and statuses), the first lap times from the recorded live timing.
+    Rounds follow the season schedule in the store, so they match what FastF1 requests.
+    Responses already in the store are left untouched.
+
+    Parameters:
+    store_dir (str): Root of the replay store
+    results_path (str): CSV of recorded results in the prepare_f1_data layout
+
+    Returns:
+    list: (year, race_name) of the races responses were written for
+    """
+    if not os.path.exists(results_path):
+        return []
+    recorded = pd.read_csv(results_path)
+    seeded = []
+    for year in sorted(os.listdir(store_dir)):
+        year_dir = os.path.join(store_dir, year)
+        schedule_path = ergast_record_path(store_dir, f'/{year}.json')
+        if not (year.isdigit() and os.path.isdir(year_dir) and os.path.exists(schedule_path)):
+            continue
+        with open(schedule_path, 'r', encoding='utf-8') as f:
+            races = json.load(f)['MRData']['RaceTable']['Races']
+        sessions = _race_session_dirs(year_dir)
+        for race in races:
+            rows = recorded[(recorded['Year'] == int(year)) & (recorded['RaceName'] == race['raceName'])]
+            session_dir = sessions.get(race['raceName'])
+            if rows.empty or session_dir is None:
+                continue
+            base = f"/{year}/{race['round']}"
+            schedule = {key: value for key, value in race.items() if key in ('season', 'round', 'raceName',
+                                                                            'Circuit', 'date', 'time')}
+            driver_ids = dict(zip(rows['DriverNumber'].astype(int).astype(str), rows['DriverId']))
+            with open(os.path.join(session_dir, '_extended_timing_data.ff1pkl'), 'rb') as f:
+                laps = pickle.load(f)['data'][0]
+            laps_by_number = laps.groupby('Driver')['NumberOfLaps'].max().dropna().astype(int).to_dict()
+
+            responses = {
+                'results.json': lambda: ('Results', _race_results(rows, laps_by_number)),
+                'qualifying.json': lambda: ('QualifyingResults', _qualifying_results(rows)),
+                'laps/1.json': lambda: ('Laps', [{'number': '1',
+                                                  'Timings': _first_lap_timings(session_dir, driver_ids)}]),
+            }
+            written = False
+            for name, build in responses.items():
+                path = ergast_record_path(store_dir, f'{base}/{name}')
+                if not os.path.exists(path):
+                    _write_response(path, schedule, *build())
+                    written = True
+            if written:
+                seeded.append((int(year), race['raceName']))
+    return seeded
+
+
+@contextmanager
+def replay_mode(store_dir=DEFAULT_STORE, record=False, strict=True):
+    """
+    Run FastF1 ingestion against the local replay store instead of the network.
+
+    Sessions are served from the FastF1 cache layout in `store_dir` and the Ergast
+    endpoints (schedules and results) from a local stand-in server. Every other outgoing
+    request is blocked. With `record=True` missing Ergast responses are fetched from the
+    real API and FastF1 writes the sessions it downloads into the store, so one online
+    run records everything a later offline run needs.
+
+    Outside record mode the store is seeded first: schedules from the recorded sessions,
+    results, qualifying results and first lap times from RECORDED_RESULTS and the recorded
+    live timing. FastF1 only logs a warning for a failed Ergast request and carries on with
+    empty results, so with `strict` a run that requested anything the store lacks raises
+    ReplayMissError when the block exits.
+
+    Parameters:
+    store_dir (str): Root of the replay store, defaults to the repo's cache/ folder
+    record (bool): Record missing data from the network instead of failing
+    strict (bool): Raise ReplayMissError if any Ergast request was not in the store
+
+    Yields:
+    ErgastReplayServer: The running stand-in server, whose `stats` count served requests
+    """
+    if not record:
+        seed_ergast_schedules(store_dir)
+        seed_ergast_results(store_dir)
+    server = ErgastReplayServer(store_dir, upstream=UPSTREAM_ERGAST if record else None).start()
+
+    previous_base_url = fastf1.ergast.interface.BASE_URL
+    previous_legacy_url = fastf1.ergast.legacy.base_url
+    previous_cache_dir = fastf1.req.Cache._CACHE_DIR
+    previous_http_cache = fastf1.req.Cache._requests_session_cached
+    previous_backend = Data_Preparation.FASTF1_BACKEND
+    previous_configured = Data_Preparation.FASTF1_CONFIGURED
+    previous_settings = Data_Preparation.FASTF1_SETTINGS
+    previous_limits = fastf1.req._SessionWithRateLimiting._RATE_LIMITS
+    previous_env = {key: os.environ.get(key) for key in ('HTTP_PROXY', 'HTTPS_PROXY', 'NO_PROXY')}
+
+    # Recorded pickles are replayed even if written by another FastF1 parser version, and the
+    # HTTP cache is bypassed so every Ergast response comes from the store. Going through
+    # configure keeps the first session load from applying the defaults over the replay setup,
+    # and hands the setup to the worker processes of iter_event_frames
+    Data_Preparation.configure(store_dir, server.base_url, ignore_version=not record, use_requests_cache=False)
+    fastf1.req.Cache._requests_session_cached = None
+    # Schedules come from Ergast so they can be served by the stand-in server
+    Data_Preparation.FASTF1_BACKEND = 'ergast'
+    Data_Preparation.SESSION_CACHE.clear()
+    if not record:
+        # The stand-in server has no rate limits, FastF1's client-side throttling would only add sleeps
+        fastf1.req._SessionWithRateLimiting._RATE_LIMITS = {}
+        os.environ.update({'HTTP_PROXY': _BLOCKING_PROXY, 'HTTPS_PROXY': _BLOCKING_PROXY,
+                           'NO_PROXY': 'localhost,127.0.0.1'})
+    try:
+        yield server
+        if strict and server.missed:
+            raise ReplayMissError(f"No recording in '{store_dir}' for {len(server.missed)} Ergast requests: "
+                                  f"{sorted(set(server.missed))}")
+    finally:
+        server.shutdown()
+        server.server_close()
+        fastf1.ergast.interface.BASE_URL = previous_base_url
+        fastf1.ergast.legacy.base_url = previous_legacy_url
+        fastf1.req._SessionWithRateLimiting._RATE_LIMITS = previous_limits
+        Data_Preparation.FASTF1_BACKEND = previous_backend
+        Data_Preparation.FASTF1_CONFIGURED = previous_configured
+        Data_Preparation.FASTF1_SETTINGS = previous_settings
+        Data_Preparation.SESSION_CACHE.clear()
+        if previous_cache_dir is not None:
+            fastf1.Cache.enable_cache(previous_cache_dir, use_requests_cache=False)
+        fastf1.req.Cache._requests_session_cached = previous_http_cache
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
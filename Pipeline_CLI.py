@@ -0,0 +1,182 @@
+"""
+Command line entry point of the pipeline: prepare the data, train and evaluate the predictors,
+and predict with the stored models.
+
+Usage:
+python Pipeline_CLI.py prepare [--start-year 2018] [--end-year 2023] [--n-jobs 1] [--cache-dir DIR]
+python Pipeline_CLI.py derive [--raw data/f1_data_2018_2023.csv] [--refresh]
+python Pipeline_CLI.py train [--target finished time] [--refresh]
+python Pipeline_CLI.py evaluate [--target finished time] [--plot]
+python Pipeline_CLI.py tune finished [--models rf xgb] [--n-candidates 54] [--budget SECONDS]
+python Pipeline_CLI.py predict --input GRID.csv [--output PREDICTIONS.csv] [--registry ./models]
+
+Every module is imported by the command that needs it, so `predict` never imports FastF1,
+scikit-learn or matplotlib, and no command touches a plotting backend unless `evaluate --plot`
+asks for the figures.
+"""
+import argparse
+import os
+import sys
+import time
+
+DEFAULT_DATA = './data/f1_data_processed.csv'
+TARGETS = ['finished', 'time']
+# Column of the predictions of every model in the predict output
+PREDICTION_COLUMNS = {'finished': 'FinishProbability', 'time': 'PredictedTime'}
+# Wall-clock budget of a cold `predict` run in seconds, checked by benchmarks/bench_cold_start.py
+PREDICT_BUDGET_SECONDS = 1.0
+
+
+def _predictor(target):
+    if target == 'finished':
+        import Finish_Predictor
+        return Finish_Predictor
+    import Time_Predictor
+    return Time_Predictor
+
+
+def prepare(args):
+    import Data_Preparation
+
+    kwargs = {'cache_dir': args.cache_dir} if args.cache_dir else {}
+    Data_Preparation.configure(**kwargs)
+    Data_Preparation.prepare_f1_data(args.start_year, args.end_year, args.data_dir, n_jobs=args.n_jobs)
+
+
+def derive(args):
+    from Dataset_Graph import default_exports, wrangling_graph
+
+    graph = wrangling_graph(args.raw)
+    for path, outcome in graph.materialize(default_exports(args.data_dir), refresh=args.refresh).items():
+        print(f"{path}: {outcome}")
+    print(f"steps built {graph.stats['built']}, cached {graph.stats['cached']}")
+
+
+def train(args):
+    from Model_Registry import ModelRegistry
+
+    for target in args.target:
+        model, _, _, _, cached = _predictor(target).fit(args.data, ModelRegistry(args.registry), refresh=args.refresh)
+        print(f"{target}: {'loaded cached' if cached else 'trained new'} {type(model).__name__}")
+
+
+def evaluate(args):
+    from Model_Registry import ModelRegistry
+
+    for target in args.target:
+        predictor = _predictor(target)
+        model, encoder, X_test, y_test, cached = predictor.fit(args.data, ModelRegistry(args.registry))
+        print(f"{target}: {'loaded cached' if cached else 'trained new'} {type(model).__name__}")
+        predictor.evaluate_model(model, encoder.transform(X_test), y_test)
+        importance_df = predictor.feature_importances(model, encoder)
+        print(importance_df.head(args.top).to_string(index=False))
+        if args.plot:
+            predictor.plot_feature_importances(importance_df, top=args.top)
+
+
+def tune(args):
+    import Tuning
+
+    Tuning.run_search(args.target, args.data, models=args.models, n_candidates=args.n_candidates, eta=args.eta,
+                      cv=args.cv, budget_seconds=args.budget, cpu_budget_seconds=args.cpu_budget,
+                      n_jobs=args.n_jobs, refresh_cache=args.refresh_cache)
+
+
+def predict(args):
+    from Columnar_Storage import read_table
+    from Prediction_Server import fill_ratings, latest_artifacts, load_models
+    from Race_Simulator import model_inputs
+    from Rating_Engine import RATINGS_SUBDIR, RatingEngine, checkpoint_path
+
+    keys = latest_artifacts(args.registry)
+    keys.update({name: key for name, key in (('finished', args.finished), ('time', args.time)) if key})
+    if not keys:
+        raise SystemExit(f"No models in '{args.registry}', run `python Pipeline_CLI.py train` first.")
+    models = load_models(keys, args.registry)
+
+    grid = read_table(args.input)
+    ratings = RatingEngine.load(checkpoint_path(RatingEngine(), os.path.join(args.registry, RATINGS_SUBDIR)))
+    if ratings is not None:
+        grid = fill_ratings(grid, ratings)
+    for name, (model, encoder) in models.items():
+        columns = encoder.numeric_cols_ + encoder.categorical_cols if encoder is not None else []
+        missing = [col for col in columns if col not in grid.columns]
+        if missing:
+            raise SystemExit(f"Model '{name}' needs the columns {missing}")
+        grid[PREDICTION_COLUMNS[name]] = model_inputs(model, grid, encoder)
+
+    if args.output:
+        grid.to_csv(args.output, index=False)
+    else:
+        grid.to_csv(sys.stdout, index=False)
+
+
+def build_parser():
+    """
+    Argument parser of the CLI.
+
+    Returns:
+    argparse.ArgumentParser: Parser with one subcommand per pipeline step
+    """
+    parser = argparse.ArgumentParser(description='F1 prediction pipeline.')
+    parser.add_argument('--timing', action='store_true', help='print the wall time of the command to stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('prepare', help='fetch the sessions and build the dataset')
+    command.add_argument('--start-year', type=int, default=2018)
+    command.add_argument('--end-year', type=int, default=2023)
+    command.add_argument('--data-dir', default='./data')
+    command.add_argument('--n-jobs', type=int, default=1)
+    command.add_argument('--cache-dir', default=None, help='FastF1 cache folder, next to the repo by default')
+    command.set_defaults(run=prepare)
+
+    command = commands.add_parser('derive', help='rebuild the derived files of data/ from the cached steps')
+    command.add_argument('--raw', default='./data/f1_data_2018_2023.csv')
+    command.add_argument('--data-dir', default='./data')
+    command.add_argument('--refresh', action='store_true', help='build every step again')
+    command.set_defaults(run=derive)
+
+    for name, run, help_text in (('train', train, 'train the predictors, or reuse the stored models'),
+                                 ('evaluate', evaluate, 'score the predictors on their test split')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--target', nargs='+', choices=TARGETS, default=TARGETS)
+        command.add_argument('--data', default=DEFAULT_DATA)
+        command.add_argument('--registry', default='./models', help='models and rating checkpoints')
+        command.set_defaults(run=run)
+    commands.choices['train'].add_argument('--refresh', action='store_true', help='fit again even if stored')
+    commands.choices['evaluate'].add_argument('--top', type=int, default=10, help='feature importances shown')
+    commands.choices['evaluate'].add_argument('--plot', action='store_true', help='plot the feature importances')
+
+    command = commands.add_parser('tune', help='search the hyperparameters of a predictor by successive halving')
+    command.add_argument('target', choices=TARGETS)
+    command.add_argument('--models', nargs='+', choices=['rf', 'xgb'], default=['rf', 'xgb'])
+    command.add_argument('--n-candidates', type=int, default=54)
+    command.add_argument('--eta', type=int, default=3)
+    command.add_argument('--cv', type=int, default=5)
+    command.add_argument('--budget', type=float, default=None, help='wall-clock budget in seconds')
+    command.add_argument('--cpu-budget', type=float, default=None, help='budget on the summed job time in seconds')
+    command.add_argument('--n-jobs', type=int, default=-1)
+    command.add_argument('--data', default=DEFAULT_DATA)
+    command.add_argument('--refresh-cache', action='store_true', help='rebuild the cached search data')
+    command.set_defaults(run=tune)
+
+    command = commands.add_parser('predict', help='score feature rows with the stored models')
+    command.add_argument('--input', required=True, help='CSV, Parquet or Arrow file of feature rows')
+    command.add_argument('--output', default=None, help='CSV file of the rows and predictions, stdout if omitted')
+    command.add_argument('--finished', default=None, help='registry key of the Finished model, latest if omitted')
+    command.add_argument('--time', default=None, help='registry key of the Time model, latest if omitted')
+    command.add_argument('--registry', default='./models', help='models and rating checkpoints')
+    command.set_defaults(run=predict)
+    return parser
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    args.run(args)
+    if args.timing:
+        print(f"{args.command} took {time.perf_counter() - start:.3f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
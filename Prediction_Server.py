@@ -0,0 +1,504 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from Fast_Inference import DenseEncoder, compile_encoder, compile_model
+from Model_Registry import REGISTRY_DIR, ModelRegistry
+from Rating_Engine import RATING_COLUMNS, RATINGS_SUBDIR, RatingEngine, checkpoint_path
+from Scenario_Engine import score
+
+DEFAULT_PORT = 8765
+# Rows scored per model call at most, larger queues are split over several calls
+DEFAULT_MAX_BATCH_ROWS = 4096
+# Request latencies kept for the percentiles
+LATENCY_WINDOW = 10_000
+
+
+class ServerStats:
+    """
+    Latency and throughput counters of the server, safe to update from the request threads.
+
+    Parameters:
+    window (int): Number of most recent request latencies the percentiles are computed over
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=window)
+        self.counters = {'requests': 0, 'rows': 0, 'errors': 0, 'batches': 0, 'batch_rows': 0}
+        self._lock = threading.Lock()
+
+    def request(self, seconds, rows):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.counters['requests'] += 1
+            self.counters['rows'] += rows
+
+    def batch(self, rows):
+        with self._lock:
+            self.counters['batches'] += 1
+            self.counters['batch_rows'] += rows
+
+    def error(self):
+        with self._lock:
+            self.counters['errors'] += 1
+
+    def snapshot(self):
+        """
+        Current counters with latency percentiles and rates.
+
+        Returns:
+        dict: Counters, p50/p90/p99/max latency in ms, requests and rows per second since start,
+              mean rows per model call
+        """
+        with self._lock:
+            latencies = np.array(self.latencies) * 1000
+            counters = dict(self.counters)
+        uptime = time.monotonic() - self.started
+        snapshot = {**counters, 'uptime_s': round(uptime, 3),
+                    'requests_per_s': round(counters['requests'] / uptime, 2),
+                    'rows_per_s': round(counters['rows'] / uptime, 2),
+                    'mean_batch_rows': round(counters['batch_rows'] / max(counters['batches'], 1), 2)}
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            snapshot.update({'p50_ms': round(p50, 3), 'p90_ms': round(p90, 3), 'p99_ms': round(p99, 3),
+                             'max_ms': round(latencies.max(), 3)})
+        return snapshot
+
+
+class _Pending:
+    """
+    One request waiting in a batcher queue.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Scores the rows of concurrent requests for one model with single vectorized calls.
+
+    A worker thread takes the first waiting request, gathers every other request queued by
+    then (waiting up to max_wait for more), and scores all their rows with one
+    predict/predict_proba call. Requests that arrive while a batch is being scored form the
+    next batch, so under load the batches grow on their own while a lone request is never held
+    back (with the default max_wait of 0). Forests and sparse encoders are swapped for their
+    Fast_Inference equivalents, which score a grid several times faster with the same
+    predictions. With a DenseEncoder the rows are encoded as they are submitted, straight from
+    the column values, and the batch is one concatenation of small matrices; other encoders get
+    the concatenated frame.
+
+    Parameters:
+    model: Fitted classifier or regressor
+    encoder (FeatureEncoder): Fitted encoder of the model, None if it takes raw columns
+    stats (ServerStats): Counters the batches are recorded in
+    max_wait (float): Seconds to wait for more requests before scoring a batch
+    max_rows (int): Rows scored per call at most
+    """
+
+    def __init__(self, model, encoder=None, stats=None, max_wait=0.0, max_rows=DEFAULT_MAX_BATCH_ROWS):
+        self.model = compile_model(model)
+        self.encoder = compile_encoder(encoder)
+        self.stats = stats or ServerStats()
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        if encoder is not None:
+            self.columns = encoder.numeric_cols_ + encoder.categorical_cols
+        else:
+            self.columns = list(getattr(model, 'feature_names_in_', []))
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, features):
+        """
+        Queue feature rows for scoring without waiting for the result.
+
+        Parameters:
+        features (dict or pd.DataFrame): Column -> values of every row, with the model's columns
+
+        Returns:
+        _Pending: Handle to pass to result
+        """
+        pending = _Pending(self._rows(features))
+        self._queue.put(pending)
+        return pending
+
+    def _rows(self, features):
+        if isinstance(self.encoder, DenseEncoder):
+            n_rows = len(features) if isinstance(features, pd.DataFrame) else len(features[self.columns[0]])
+            return self.encoder.transform_columns(features, n_rows)
+        if isinstance(features, pd.DataFrame):
+            return features[self.columns]
+        return pd.DataFrame({col: features[col] for col in self.columns}).infer_objects()
+
+    def result(self, pending):
+        """
+        Wait for the predictions of submitted rows.
+
+        Parameters:
+        pending (_Pending): Handle returned by submit
+
+        Returns:
+        np.ndarray: P(positive class) for classifiers, predictions for regressors
+        """
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def predict(self, features):
+        """
+        Score feature rows, blocking until the batch they joined is scored.
+
+        Parameters:
+        features (dict or pd.DataFrame): Column -> values of every row, with the model's columns
+
+        Returns:
+        np.ndarray: P(positive class) for classifiers, predictions for regressors
+        """
+        return self.result(self.submit(features))
+
+    def _gather(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0].rows)
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_rows:
+            try:
+                pending = self._queue.get(timeout=max(deadline - time.monotonic(), 0)) if self.max_wait \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += len(pending.rows)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            try:
+                parts = [pending.rows for pending in batch]
+                if isinstance(parts[0], np.ndarray):
+                    X = parts[0] if len(parts) == 1 else np.concatenate(parts)
+                else:
+                    X = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+                    if self.encoder is not None:
+                        X = self.encoder.transform(X)
+                predictions = score(self.model, X)
+                self.stats.batch(len(predictions))
+                offsets = np.cumsum([0] + [len(part) for part in parts])
+                for pending, start, stop in zip(batch, offsets[:-1], offsets[1:]):
+                    pending.result = predictions[start:stop]
+            except Exception as exc:
+                # Every request of the batch gets the error and the worker moves on to the next batch
+                for pending in batch:
+                    pending.error = exc
+            for pending in batch:
+                pending.done.set()
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the prediction server.
+
+    GET  /health          liveness
+    GET  /models          models and the feature columns each one expects
+    GET  /stats           latency and throughput counters
+    POST /predict         score the rows with every model
+    POST /predict/<name>  score the rows with one model
+
+    Rows are posted as {"rows": [{column: value, ...}, ...]} or, more compactly,
+    {"columns": [...], "data": [[...], ...]}. Malformed requests get a 400 reply; a model that
+    fails on a batch gets every request of that batch a 500 reply with the error.
+    """
+
+    # Keep-alive connections spare the clients a TCP handshake per request
+    protocol_version = 'HTTP/1.1'
+    # Small responses would otherwise wait on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self._send(200, {'status': 'ok'})
+        elif path == '/models':
+            self._send(200, {name: batcher.columns for name, batcher in self.server.batchers.items()})
+        elif path == '/stats':
+            self._send(200, self.server.stats.snapshot())
+        else:
+            self._send(404, {'error': f'unknown path {path}'})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        path = urlsplit(self.path).path.rstrip('/')
+        parts = path.split('/')
+        if parts[1:2] != ['predict'] or len(parts) > 3:
+            self._send(404, {'error': f'unknown path {path}'})
+            return
+        names = [parts[2]] if len(parts) == 3 else list(self.server.batchers)
+        unknown = [name for name in names if name not in self.server.batchers]
+        if unknown:
+            self._send(404, {'error': f'unknown model {unknown[0]}', 'models': list(self.server.batchers)})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            columns, n_rows = self.server.feature_columns(body)
+            batchers = {name: self.server.batchers[name] for name in names}
+            for name, batcher in batchers.items():
+                missing = [col for col in batcher.columns if col not in columns]
+                if missing:
+                    raise ValueError(f"model '{name}' needs the columns {missing}")
+            # Every model's batcher works on the rows at the same time
+            pending = {name: batcher.submit(columns) for name, batcher in batchers.items()}
+            predictions = {name: batchers[name].result(handle).tolist() for name, handle in pending.items()}
+        except (ValueError, KeyError, TypeError) as exc:
+            self.server.stats.error()
+            self._send(400, {'error': str(exc)})
+            return
+        except Exception as exc:
+            self.server.stats.error()
+            self._send(500, {'error': f'{type(exc).__name__}: {exc}'})
+            return
+        self._send(200, {'predictions': predictions})
+        self.server.stats.request(time.perf_counter() - start, n_rows)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # The stats endpoint reports what was served, per-request logging would dominate the latency
+        pass
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """
+    Long-running local prediction service holding fitted models and encoders in memory.
+
+    Every model gets a MicroBatcher, so concurrent requests share vectorized model calls. Requests
+    are parsed into one list of values per column, which the compiled encoders turn into the
+    model matrix without a DataFrame. Rating columns the models expect but a request leaves out
+    are filled from the rating checkpoint, as the ratings stand before the next race.
+
+    Parameters:
+    models (dict): Name -> (fitted model, fitted encoder or None)
+    ratings (RatingEngine): Engine whose current ratings fill missing rating columns, if any
+    host (str): Address to listen on
+    port (int): Port to listen on, 0 picks a free port
+    max_wait (float): Seconds a batcher waits for more requests before scoring
+    """
+    daemon_threads = True
+
+    def __init__(self, models, ratings=None, host='127.0.0.1', port=DEFAULT_PORT, max_wait=0.0):
+        super().__init__((host, port), PredictionHandler)
+        self.stats = ServerStats()
+        self.batchers = {name: MicroBatcher(model, encoder, self.stats, max_wait)
+                         for name, (model, encoder) in models.items()}
+        self.ratings = None if ratings is None else RatingCache(ratings)
+
+    @property
+    def url(self):
+        """
+        Base URL of the server.
+
+        Returns:
+        str: URL such as 'http://127.0.0.1:8765'
+        """
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+
+    def feature_columns(self, body):
+        """
+        Parse the feature rows of a request body into one sequence of values per column.
+
+        Parameters:
+        body (dict): Parsed JSON with 'rows', or 'columns' and 'data'
+
+        Returns:
+        tuple: Column -> values dict with the missing rating columns filled in, number of rows
+        """
+        if 'columns' in body:
+            names, data = body['columns'], body['data']
+            if any(len(row) != len(names) for row in data):
+                raise ValueError(f"every row of 'data' needs {len(names)} values")
+            columns = dict(zip(names, zip(*data))) if data else {}
+            n_rows = len(data)
+        else:
+            rows = body['rows']
+            # Keys a row leaves out are missing values, as in DataFrame.from_records
+            names = list(dict.fromkeys(name for row in rows for name in row))
+            columns = {name: [row.get(name) for row in rows] for name in names}
+            n_rows = len(rows)
+        if n_rows == 0:
+            raise ValueError('no rows to score')
+        if self.ratings is not None and any(col not in columns for col in RATING_COLUMNS):
+            ratings = self.ratings.lookup(columns['DriverId'], columns['TeamId'])
+            columns.update({col: values for col, values in ratings.items() if col not in columns})
+        return columns, n_rows
+
+    def start(self):
+        """
+        Serve requests from a background thread.
+
+        Returns:
+        PredictionServer: The started server
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class RatingCache:
+    """
+    Pre-race rating rows of driver/team pairs, taken from a RatingEngine once per pair.
+
+    The server never applies results to the engine, so the ratings of a pair stay what they were
+    at its first request and the grids that follow are filled with dict lookups.
+
+    Parameters:
+    ratings (RatingEngine): Engine holding the current ratings
+    """
+
+    def __init__(self, ratings):
+        self.ratings = ratings
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, driver_ids, team_ids):
+        """
+        Ratings of the entries of a grid.
+
+        Parameters:
+        driver_ids (sequence): DriverId of every row
+        team_ids (sequence): TeamId of every row
+
+        Returns:
+        dict: Column of RATING_COLUMNS -> np.ndarray of the rows' values
+        """
+        rows = []
+        for pair in zip(driver_ids, team_ids):
+            row = self.rows.get(pair)
+            if row is None:
+                # Adding a new driver to the rating tables is not thread safe
+                with self._lock:
+                    entry = pd.DataFrame({'DriverId': [str(pair[0])], 'TeamId': [str(pair[1])]})
+                    row = self.ratings.pre_race(entry)[RATING_COLUMNS].to_numpy()[0]
+                    self.rows[pair] = row
+            rows.append(row)
+        values = np.array(rows)
+        return {col: values[:, j] for j, col in enumerate(RATING_COLUMNS)}
+
+
+def fill_ratings(frame, ratings):
+    """
+    Add the rating columns a frame of feature rows leaves out, as the ratings stand before the next race.
+
+    Parameters:
+    frame (pd.DataFrame): Feature rows with DriverId and TeamId
+    ratings (RatingEngine): Engine holding the current ratings
+
+    Returns:
+    pd.DataFrame: The rows with every column of RATING_COLUMNS
+    """
+    missing = [col for col in RATING_COLUMNS if col not in frame.columns]
+    if not missing:
+        return frame
+    current = ratings.pre_race(frame[['DriverId', 'TeamId']].astype(str))
+    return pd.concat([frame, current[missing]], axis=1)
+
+
+def latest_artifacts(registry_dir=REGISTRY_DIR):
+    """
+    Pick the most recent classifier and regressor of the model registry.
+
+    Parameters:
+    registry_dir (str): Folder holding the artifacts
+
+    Returns:
+    dict: 'finished' and/or 'time' -> artifact key
+    """
+    entries = ModelRegistry(registry_dir).entries()
+    if entries.empty:
+        return {}
+    entries = entries.sort_values('created_at')
+    keys = {}
+    for name, suffix in (('finished', 'Classifier'), ('time', 'Regressor')):
+        matches = entries[entries['estimator'].str.endswith(suffix)]
+        if len(matches):
+            keys[name] = matches['key'].iloc[-1]
+    return keys
+
+
+def load_models(keys, registry_dir=REGISTRY_DIR):
+    """
+    Load fitted models and encoders from the model registry, once.
+
+    The scoring-only copies of the artifacts are loaded (see ModelRegistry.load_compiled).
+    Models that are not compiled are switched to a single thread: a grid of 20 rows is scored
+    faster without the thread pool, and the batchers already overlap requests.
+
+    Parameters:
+    keys (dict): Name -> artifact key
+    registry_dir (str): Folder holding the artifacts
+
+    Returns:
+    dict: Name -> (model, encoder)
+    """
+    registry = ModelRegistry(registry_dir)
+    models = {}
+    for name, key in keys.items():
+        artifact = registry.load_compiled(key)
+        if artifact is None:
+            raise ValueError(f"no readable artifact '{key}' in '{registry_dir}'")
+        model = artifact['model']
+        if hasattr(model, 'get_params') and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+        models[name] = (model, artifact['encoder'])
+    return models
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local prediction server for the Finish and Time models.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--finished', default=None, help='registry key of the Finished model, latest if omitted')
+    parser.add_argument('--time', default=None, help='registry key of the Time model, latest if omitted')
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    parser.add_argument('--max-wait-ms', type=float, default=0.0,
+                        help='time a batch waits for more requests before it is scored')
+    args = parser.parse_args()
+
+    keys = latest_artifacts(args.registry)
+    keys.update({name: key for name, key in (('finished', args.finished), ('time', args.time)) if key})
+    if not keys:
+        raise SystemExit(f"No models in '{args.registry}', run Finish_Predictor.py or Time_Predictor.py first.")
+    models = load_models(keys, args.registry)
+    ratings = RatingEngine.load(checkpoint_path(RatingEngine(), os.path.join(args.registry, RATINGS_SUBDIR)))
+
+    server = PredictionServer(models, ratings, args.host, args.port, args.max_wait_ms / 1000)
+    print(f"Serving {', '.join(f'{name} ({key[:12]})' for name, key in keys.items())} on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+# F1_PROFILE=1 turns the instrumentation on, the other variables tune it
+ENV_ENABLE = 'F1_PROFILE'
+ENV_OUTPUT = 'F1_PROFILE_OUTPUT'
+ENV_MEMORY = 'F1_PROFILE_MEMORY'
+ENV_STAGE = 'F1_PROFILE_STAGE'
+ENV_PROFILER = 'F1_PROFILER'
+DEFAULT_OUTPUT = 'profile.jsonl'
+
+
+class _NullRecord:
+    """
+    Stand-in for a stage record while profiling is off, so callers can always call set().
+    """
+
+    def set(self, **fields):
+        pass
+
+
+class _NullStage:
+    """
+    Reusable no-op context manager returned by stage() while profiling is off.
+    """
+
+    def __enter__(self):
+        return _NULL_RECORD
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_RECORD = _NullRecord()
+_NULL_STAGE = _NullStage()
+
+
+class StageRecord:
+    """
+    Measurements of one run of a stage, written as one JSON line when the stage ends.
+
+    Parameters:
+    name (str): Stage name, e.g. 'session.load'
+    tags (dict): Context fields such as the event, inherited by nested stages
+    """
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.fields = {}
+        self.child_peak = 0
+
+    def set(self, **fields):
+        """
+        Attach values to the record, e.g. rows=len(df) or session_hits=2.
+        """
+        self.fields.update(fields)
+
+
+class Profiler:
+    """
+    Collects stage records of the current process and appends them to a JSON lines file.
+
+    Every record holds the stage name, its tags, wall and CPU seconds, the peak traced memory
+    (when memory tracking is on), the process id and any fields set inside the stage. Worker
+    processes inherit the environment, so they append their own records to the same file.
+
+    Parameters:
+    output (str): JSON lines file the records are appended to
+    memory (bool): Trace the peak memory of every stage with tracemalloc (slows Python-heavy code)
+    profile_stage (str): Name of one stage to run under a call profiler, None for none
+    profiler (str): 'cprofile' or 'pyinstrument'
+    """
+
+    def __init__(self, output=DEFAULT_OUTPUT, memory=False, profile_stage=None, profiler='cprofile'):
+        self.output = output
+        self.memory = memory
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._call_profiler = None
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _start_call_profiler(self):
+        if self._call_profiler is None:
+            if self.profiler == 'pyinstrument':
+                from pyinstrument import Profiler as CallProfiler
+                self._call_profiler = CallProfiler()
+            else:
+                import cProfile
+                self._call_profiler = cProfile.Profile()
+        if self.profiler == 'pyinstrument':
+            self._call_profiler.start()
+        else:
+            self._call_profiler.enable()
+
+    def _stop_call_profiler(self):
+        if self.profiler == 'pyinstrument':
+            self._call_profiler.stop()
+        else:
+            self._call_profiler.disable()
+
+    @contextmanager
+    def stage(self, name, rows=None, **tags):
+        """
+        Measure a stage; see the module-level stage().
+        """
+        stack = self._stack()
+        record = StageRecord(name, {**(stack[-1].tags if stack else {}), **tags})
+        if rows is not None:
+            record.set(rows=rows)
+        if self.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+            tracemalloc.reset_peak()
+        profiled = name == self.profile_stage
+        stack.append(record)
+        if profiled:
+            self._start_call_profiler()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if profiled:
+                self._stop_call_profiler()
+            stack.pop()
+            entry = {'stage': name, **record.tags, 'wall_s': round(wall, 6), 'cpu_s': round(cpu, 6)}
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], record.child_peak)
+                if stack:
+                    stack[-1].child_peak = max(stack[-1].child_peak, peak)
+                entry['peak_mb'] = round(peak / 2 ** 20, 3)
+            entry.update(record.fields)
+            entry['pid'] = os.getpid()
+            self._write(entry)
+
+    def _write(self, entry):
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self.records.append(entry)
+            with open(self.output, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def dump_call_profile(self):
+        """
+        Write the call profile of the chosen stage next to the JSON lines file, if it ran.
+
+        Returns:
+        str: Path of the written profile, None if the stage never ran
+        """
+        if self._call_profiler is None:
+            return None
+        base = f'{os.path.splitext(self.output)[0]}.{self.profile_stage}.{os.getpid()}'
+        if self.profiler == 'pyinstrument':
+            path = f'{base}.txt'
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._call_profiler.output_text())
+        else:
+            path = f'{base}.prof'
+            self._call_profiler.dump_stats(path)
+        return path
+
+
+_PROFILER = None
+
+
+def enable(output=None, memory=None, profile_stage=None, profiler=None):
+    """
+    Turn the instrumentation on for this process and, through the environment, its workers.
+
+    Arguments left as None fall back to the F1_PROFILE_* environment variables.
+
+    Parameters:
+    output (str): JSON lines file the records are appended to
+    memory (bool): Trace the peak memory of every stage
+    profile_stage (str): Name of one stage to run under a call profiler
+    profiler (str): 'cprofile' or 'pyinstrument'
+
+    Returns:
+    Profiler: The active profiler
+    """
+    global _PROFILER
+    output = output or os.environ.get(ENV_OUTPUT, DEFAULT_OUTPUT)
+    memory = memory if memory is not None else os.environ.get(ENV_MEMORY, '') not in ('', '0')
+    profile_stage = profile_stage or os.environ.get(ENV_STAGE) or None
+    profiler = profiler or os.environ.get(ENV_PROFILER, 'cprofile')
+    # Process pool workers read these when they import this module
+    os.environ.update({ENV_ENABLE: '1', ENV_OUTPUT: os.path.abspath(output), ENV_MEMORY: str(int(memory))})
+    if profile_stage:
+        os.environ.update({ENV_STAGE: profile_stage, ENV_PROFILER: profiler})
+
+    _PROFILER = Profiler(os.path.abspath(output), memory, profile_stage, profiler)
+    atexit.register(_PROFILER.dump_call_profile)
+    return _PROFILER
+
+
+def is_enabled():
+    """
+    Check whether stages are being recorded.
+
+    Returns:
+    bool: True when profiling is on
+    """
+    return _PROFILER is not None
+
+
+def stage(name, rows=None, **tags):
+    """
+    Context manager measuring a pipeline stage; a shared no-op while profiling is off.
+
+    Tags are inherited by the stages nested inside, so e.g. every session load inside
+    `stage('prepare_event', event='2023 British Grand Prix')` carries the event.
+
+    Usage:
+    with stage('merge', event=event) as record:
+        merged = pd.merge(...)
+        record.set(rows=len(merged))
+
+    Parameters:
+    name (str): Stage name
+    rows (int): Number of rows the stage processes, if known up front
+    tags (dict): Context fields stored with the record and its nested stages
+
+    Returns:
+    Context manager yielding a record whose set(**fields) attaches values such as row counts
+    """
+    if _PROFILER is None:
+        return _NULL_STAGE
+    return _PROFILER.stage(name, rows, **tags)
+
+
+def read_records(path):
+    """
+    Load the records of a JSON lines file.
+
+    Parameters:
+    path (str): File written by the profiler
+
+    Returns:
+    pd.DataFrame: One row per stage run
+    """
+    return pd.read_json(path, lines=True)
+
+
+def summarize(records):
+    """
+    Aggregate stage records into one row per stage.
+
+    Parameters:
+    records (pd.DataFrame): Records from read_records
+
+    Returns:
+    pd.DataFrame: Runs, total/mean wall seconds, total CPU seconds, max peak memory and total rows
+                  per stage, slowest stage first
+    """
+    aggs = {'runs': ('wall_s', 'size'), 'wall_s': ('wall_s', 'sum'), 'mean_wall_s': ('wall_s', 'mean'),
+            'cpu_s': ('cpu_s', 'sum')}
+    for col, agg in (('peak_mb', 'max'), ('rows', 'sum'), ('session_loads', 'sum'), ('session_hits', 'sum')):
+        if col in records.columns:
+            aggs[col] = (col, agg)
+    return records.groupby('stage').agg(**aggs).sort_values('wall_s', ascending=False)
+
+
+def summary_text(records):
+    """
+    Format the stage summary as text.
+
+    Parameters:
+    records (pd.DataFrame): Records from read_records
+
+    Returns:
+    str: The summary table
+    """
+    return summarize(records).round(4).to_string()
+
+
+if os.environ.get(ENV_ENABLE, '') not in ('', '0'):
+    enable()
+
+
+if __name__ == "__main__":
+    # Example usage:
+    #   python Profiling.py run Time_Predictor.py      profile a script and print the stage summary
+    #   python Profiling.py summary profile.jsonl      summarize an existing profile
+    import runpy
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ('run', 'summary'):
+        sys.exit("Usage: python Profiling.py run SCRIPT [ARGS...] | summary FILE.jsonl")
+    if sys.argv[1] == 'summary':
+        print(summary_text(read_records(sys.argv[2])))
+    else:
+        # The pipeline modules enable profiling themselves when they import this module
+        output = os.path.abspath(os.environ.get(ENV_OUTPUT, DEFAULT_OUTPUT))
+        if os.path.exists(output):
+            os.remove(output)
+        os.environ.update({ENV_ENABLE: '1', ENV_OUTPUT: output})
+        script = sys.argv[2]
+        sys.argv = sys.argv[2:]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        try:
+            runpy.run_path(script, run_name='__main__')
+        finally:
+            if os.path.exists(output):
+                print(summary_text(read_records(output)), file=sys.stderr)
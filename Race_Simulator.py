@@ -0,0 +1,227 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Scenario_Engine import score
+
+# Points of positions 1 to 10, the rest of the field scores nothing
+POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=float)
+
+# Races drawn per array operation, bounds the memory to a few (chunk x drivers) matrices
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Sort keys of retirements, in seconds: far behind any race time, spread wide enough for float32 to keep
+# their random order apart
+_DNF_OFFSET = np.float32(1e6)
+_DNF_SPREAD = np.float32(1e5)
+
+
+def simulate_orders(rng, dnf_prob, time_mean, time_std, n_sims):
+    """
+    Draw the finishing order of n_sims races at once.
+
+    Every driver retires with its DNF probability, otherwise finishes in a race time drawn from
+    a normal around its predicted time. Retirements are classified behind the finishers in a
+    random order, and score the points of their position like classified retirements do.
+
+    Parameters:
+    rng (np.random.Generator): Random generator
+    dnf_prob (np.ndarray): DNF probability of every driver
+    time_mean (np.ndarray): Predicted race time of every driver, in seconds
+    time_std (np.ndarray): Spread of the race time of every driver, in seconds
+    n_sims (int): Number of races
+
+    Returns:
+    tuple: Driver index at every position (n_sims x drivers), number of finishers of every race
+    """
+    n_drivers = len(time_mean)
+    keys = rng.standard_normal((n_sims, n_drivers), dtype=np.float32)
+    keys *= time_std
+    keys += time_mean
+    retire = rng.random((n_sims, n_drivers), dtype=np.float32)
+    dnf = retire < dnf_prob
+    # The uniform draw doubles as the random order of the retirements
+    np.copyto(keys, retire * _DNF_SPREAD + _DNF_OFFSET, where=dnf)
+    return np.argsort(keys, axis=1), n_drivers - dnf.sum(axis=1)
+
+
+def simulate_counts(dnf_prob, time_mean, time_std, n_sims, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Simulate races and accumulate the position histogram and points of every driver.
+
+    Parameters:
+    dnf_prob (np.ndarray): DNF probability of every driver
+    time_mean (np.ndarray): Predicted race time of every driver, in seconds
+    time_std (np.ndarray): Spread of the race time of every driver, in seconds
+    n_sims (int): Number of races
+    seed (int or np.random.SeedSequence): Seed of the random generator
+    chunk_size (int): Races drawn per array operation
+
+    Returns:
+    dict: 'positions' (drivers x positions counts), 'dnf', 'points' and 'points_sq' (per driver sums)
+    """
+    rng = np.random.default_rng(seed)
+    n_drivers = len(time_mean)
+    slots = np.arange(n_drivers)
+    slot_points = np.zeros(n_drivers)
+    slot_points[:min(len(POINTS), n_drivers)] = POINTS[:n_drivers]
+    positions = np.zeros(n_drivers * n_drivers, dtype=np.int64)
+    dnf = np.zeros(n_drivers)
+
+    for start in range(0, n_sims, chunk_size):
+        n = min(chunk_size, n_sims - start)
+        order, finishers = simulate_orders(rng, dnf_prob, time_mean, time_std, n)
+        # Flat (driver, position) cells, one per driver and race
+        positions += np.bincount((order * n_drivers + slots).ravel(), minlength=n_drivers * n_drivers)
+        dnf += np.bincount(order[slots >= finishers[:, None]], minlength=n_drivers)
+    # Every driver holds one position per race, so the points follow from the histogram
+    positions = positions.reshape(n_drivers, n_drivers)
+    return {'positions': positions, 'dnf': dnf, 'points': positions @ slot_points,
+            'points_sq': positions @ slot_points ** 2}
+
+
+def _simulate_counts_job(args):
+    return simulate_counts(*args)
+
+
+def summarize_counts(counts, n_sims, drivers):
+    """
+    Turn accumulated counts into per-driver outcome probabilities.
+
+    Parameters:
+    counts (dict): Output of simulate_counts
+    n_sims (int): Number of races simulated
+    drivers (list): Name of every driver
+
+    Returns:
+    pd.DataFrame: One row per driver with DNF, Win, Podium and InPoints probabilities, ExpectedPosition,
+                  ExpectedPoints, PointsStd and the probability P1..Pn of every position
+    """
+    probs = counts['positions'] / n_sims
+    n_drivers = probs.shape[1]
+    expected_points = counts['points'] / n_sims
+    summary = pd.DataFrame({
+        'Driver': list(drivers),
+        'DNF': counts['dnf'] / n_sims,
+        'Win': probs[:, 0],
+        'Podium': probs[:, :3].sum(axis=1),
+        'InPoints': probs[:, :len(POINTS)].sum(axis=1),
+        'ExpectedPosition': probs @ np.arange(1, n_drivers + 1),
+        'ExpectedPoints': expected_points,
+        'PointsStd': np.sqrt(np.maximum(counts['points_sq'] / n_sims - expected_points ** 2, 0.0)),
+    })
+    position_cols = pd.DataFrame(probs, columns=[f'P{i}' for i in range(1, n_drivers + 1)])
+    return pd.concat([summary, position_cols], axis=1)
+
+
+def simulate_race(dnf_prob, time_mean, time_std, n_sims=100_000, drivers=None, seed=None, n_jobs=1,
+                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Monte Carlo distribution of the finishing order, podium and points of a whole grid.
+
+    The races are drawn as array operations over (races x drivers) matrices: one argsort per
+    chunk gives every finishing order, and bincount turns the orders into position histograms,
+    with no Python loop over races or drivers. With n_jobs > 1 the races are split over worker
+    processes with independent random streams spawned from the seed.
+
+    Parameters:
+    dnf_prob (array-like): DNF probability of every driver, e.g. 1 - P(Finished) from Finish_Predictor
+    time_mean (array-like): Predicted race time of every driver in seconds, e.g. from Time_Predictor
+    time_std (float or array-like): Residual spread of the race time, one value or one per driver
+    n_sims (int): Number of races
+    drivers (list): Driver names, defaults to 0..n-1
+    seed (int): Seed of the simulation, the same seed and n_jobs give the same result
+    n_jobs (int): Number of worker processes, -1 uses all cores
+    chunk_size (int): Races drawn per array operation
+
+    Returns:
+    pd.DataFrame: The output of summarize_counts, in grid order
+    """
+    time_mean = np.asarray(time_mean, dtype=np.float32)
+    n_drivers = len(time_mean)
+    dnf_prob = np.broadcast_to(np.asarray(dnf_prob, dtype=np.float32), n_drivers)
+    time_std = np.broadcast_to(np.asarray(time_std, dtype=np.float32), n_drivers)
+    # Missing predictions would poison the sort, treat them as a certain retirement
+    missing = np.isnan(time_mean) | np.isnan(dnf_prob)
+    if missing.any():
+        time_mean = np.where(missing, 0.0, time_mean).astype(np.float32)
+        dnf_prob = np.where(missing, 1.0, dnf_prob).astype(np.float32)
+    drivers = list(drivers) if drivers is not None else list(range(n_drivers))
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(min(n_jobs, n_sims // chunk_size + 1), 1)
+    if n_jobs == 1:
+        counts = simulate_counts(dnf_prob, time_mean, time_std, n_sims, seed, chunk_size)
+    else:
+        shares = [n_sims // n_jobs + (i < n_sims % n_jobs) for i in range(n_jobs)]
+        seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+        jobs = [(dnf_prob, time_mean, time_std, share, job_seed, chunk_size)
+                for share, job_seed in zip(shares, seeds)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            parts = list(executor.map(_simulate_counts_job, jobs))
+        counts = {key: sum(part[key] for part in parts) for key in parts[0]}
+    return summarize_counts(counts, n_sims, drivers)
+
+
+def model_inputs(model, grid, encoder=None):
+    """
+    Score the grid with a fitted predictor, in the feature layout it was trained on.
+
+    Parameters:
+    model: Fitted classifier or regressor
+    grid (pd.DataFrame): One row per driver, with the columns the model (or encoder) expects
+    encoder (FeatureEncoder): Fitted encoder of the predictor, if any
+
+    Returns:
+    np.ndarray: P(Finished) for classifiers, the prediction for regressors
+    """
+    if encoder is not None:
+        X = encoder.transform(grid[encoder.numeric_cols_ + encoder.categorical_cols])
+    elif hasattr(model, 'feature_names_in_'):
+        X = grid[list(model.feature_names_in_)]
+    else:
+        X = grid
+    return score(model, X)
+
+
+def residual_std(model, X_test, y_test, encoder=None):
+    """
+    Spread of the race-time residuals of a predictor on held-out rows.
+
+    Parameters:
+    model: Fitted Time_Predictor regressor
+    X_test (pd.DataFrame): Held-out features
+    y_test (pd.Series): Held-out race times
+    encoder (FeatureEncoder): Fitted encoder of the predictor, if any
+
+    Returns:
+    float: Standard deviation of y_test - prediction, in seconds
+    """
+    return float(np.std(np.asarray(y_test) - model_inputs(model, X_test, encoder)))
+
+
+def simulate_grid(grid, finish_model, time_model, time_std, finish_encoder=None, time_encoder=None,
+                  driver_col='DriverId', **kwargs):
+    """
+    Simulate a race from the features of its grid and the trained Finish and Time predictors.
+
+    Parameters:
+    grid (pd.DataFrame): One row per driver with the features of both predictors
+    finish_model: Fitted Finish_Predictor classifier
+    time_model: Fitted Time_Predictor regressor
+    time_std (float or array-like): Residual spread of the race time, e.g. from residual_std
+    finish_encoder (FeatureEncoder): Fitted encoder of the Finish predictor, if any
+    time_encoder (FeatureEncoder): Fitted encoder of the Time predictor, if any
+    driver_col (str): Column naming the drivers in the result
+    kwargs (dict): Arguments of simulate_race, e.g. n_sims, seed or n_jobs
+
+    Returns:
+    pd.DataFrame: The output of simulate_race
+    """
+    dnf_prob = 1.0 - model_inputs(finish_model, grid, finish_encoder)
+    time_mean = model_inputs(time_model, grid, time_encoder)
+    drivers = grid[driver_col].astype(str) if driver_col in grid.columns else None
+    return simulate_race(dnf_prob, time_mean, time_std, drivers=drivers, **kwargs)
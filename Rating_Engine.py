@@ -0,0 +1,420 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from Columnar_Storage import read_table
+from Model_Registry import REGISTRY_DIR
+
+# Bump when the layout of a checkpoint changes so old checkpoints are rebuilt
+CHECKPOINT_VERSION = 1
+# Folder of the rating checkpoints inside a model registry
+RATINGS_SUBDIR = 'ratings'
+RATING_DIR = os.path.join(REGISTRY_DIR, RATINGS_SUBDIR)
+
+# Columns the engine reads from the results and the feature columns it emits
+RESULT_COLUMNS = ['RaceDate', 'Year', 'RaceName', 'DriverId', 'TeamId', 'Position_Race', 'Finished']
+RATING_COLUMNS = ['DriverRating', 'DriverRatingDev', 'DriverRaces', 'DriverFormPosition', 'DriverFormFinish',
+                  'TeamRating', 'TeamRatingDev', 'TeamFormPosition']
+RACE_ID = ['Year', 'RaceName']
+
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+# Deviation a single race would have on its own, the information one result adds
+RACE_DEVIATION = 200.0
+# Mid-field position and full reliability, the form of an entry without any race
+PRIOR_POSITION = 10.5
+PRIOR_FINISH = 1.0
+
+
+class RatingTable:
+    """
+    Ratings and form of one kind of entry (drivers or teams), one row per entry id.
+
+    Entries get a row the first time they appear, so updating a race only touches the
+    rows of its participants.
+    """
+
+    FIELDS = ['Rating', 'Deviation', 'Races', 'FormPosition', 'FormFinish', 'LastRace']
+    INITIAL = [INITIAL_RATING, INITIAL_DEVIATION, 0.0, PRIOR_POSITION, PRIOR_FINISH, -1.0]
+
+    def __init__(self):
+        self.index = {}
+        self.state = np.empty((0, len(self.FIELDS)))
+
+    def rows(self, ids):
+        """
+        Row positions of the given ids, adding rows for ids seen for the first time.
+
+        Parameters:
+        ids (array-like): Entry ids, e.g. driver ids of one race
+
+        Returns:
+        np.ndarray: Row positions into state
+        """
+        new = [entry for entry in dict.fromkeys(ids) if entry not in self.index]
+        if new:
+            self.index.update(zip(new, range(len(self.index), len(self.index) + len(new))))
+            self.state = np.vstack([self.state, np.tile(self.INITIAL, (len(new), 1))])
+        return np.fromiter((self.index[entry] for entry in ids), dtype=np.intp, count=len(ids))
+
+    def frame(self):
+        """
+        Current state of every entry.
+
+        Returns:
+        pd.DataFrame: One row per entry id with FIELDS as columns
+        """
+        return pd.DataFrame(self.state, index=pd.Index(list(self.index), name='Id'), columns=self.FIELDS)
+
+
+def group_mean(codes, values, n_groups):
+    """
+    Mean of the values of every group, ignoring NaN.
+
+    Parameters:
+    codes (np.ndarray): Group code of every value, from pd.factorize
+    values (np.ndarray): Values to average
+    n_groups (int): Number of groups
+
+    Returns:
+    np.ndarray: Mean per group, NaN for groups without any value
+    """
+    valid = ~np.isnan(values)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def race_digests(results):
+    """
+    Fingerprint the results of every race, independent of the row order within a race.
+
+    Parameters:
+    results (pd.DataFrame): Results with RESULT_COLUMNS
+
+    Returns:
+    dict: (year, race_name) -> digest
+    """
+    rows = results[['DriverId', 'TeamId', 'Position_Race', 'Finished']].astype(str)
+    hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    races = pd.MultiIndex.from_frame(results[RACE_ID])
+    codes, uniques = pd.factorize(races)
+    order = np.argsort(codes, kind='stable')
+    starts = np.searchsorted(codes[order], np.arange(len(uniques)))
+    digests = np.bitwise_xor.reduceat(hashes[order], starts) if len(order) else []
+    return {race: int(digest) for race, digest in zip(uniques, digests)}
+
+
+def normalize_results(results):
+    """
+    Bring results read from CSV, Parquet or Arrow to one form: plain keys and parsed dates.
+
+    Parameters:
+    results (pd.DataFrame): Results with RESULT_COLUMNS
+
+    Returns:
+    pd.DataFrame: Copy with int Year, str ids and datetime RaceDate, on the same index
+    """
+    return pd.DataFrame({
+        'RaceDate': pd.to_datetime(results['RaceDate'], errors='coerce', format='mixed'),
+        'Year': results['Year'].astype(int),
+        'RaceName': results['RaceName'].astype(str),
+        'DriverId': results['DriverId'].astype(str),
+        'TeamId': results['TeamId'].astype(str),
+        # float64 whatever the file stores, so compacted and plain reads give the same race digests
+        'Position_Race': pd.to_numeric(results['Position_Race'], errors='coerce').astype(float),
+        'Finished': pd.to_numeric(results['Finished'], errors='coerce').astype(float),
+    }, index=results.index)
+
+
+class RatingEngine:
+    """
+    Elo/Glicko-style driver and constructor ratings with rolling form, updated race by race.
+
+    Every race is scored as a multi-entry contest: an entry's score is its share of the field it
+    beat, its expectation the Elo win probability against the mean rating of the rest of the field,
+    so a race costs O(participants) and never touches the history. As in Glicko, every entry
+    carries a rating deviation that sets how far a result moves it; the deviation shrinks with
+    every race and grows back while an entry sits races out. Teams are rated the same way on the
+    mean score of their drivers. Form is an exponentially weighted mean of positions and finishes.
+
+    The features of a race are taken before its results are applied, so they are free of leakage,
+    and are kept with the state, so the checkpoint serves every processed race without a recompute.
+
+    Parameters:
+    k_factor (float): Rating change per unit of surprise for an entry at the minimum deviation
+    min_deviation (float): Floor of the rating deviation
+    deviation_growth (float): Deviation added per race sat out (in quadrature)
+    form_alpha (float): Weight of the latest race in the form averages
+    """
+
+    def __init__(self, k_factor=8.0, min_deviation=50.0, deviation_growth=30.0, form_alpha=0.3):
+        self.k_factor = k_factor
+        self.min_deviation = min_deviation
+        self.deviation_growth = deviation_growth
+        self.form_alpha = form_alpha
+        self.drivers = RatingTable()
+        self.teams = RatingTable()
+        self.n_races = 0
+        self.last_date = None
+        self.races = {}
+        self._history = []
+
+    def get_params(self, deep=True):
+        return {'k_factor': self.k_factor, 'min_deviation': self.min_deviation,
+                'deviation_growth': self.deviation_growth, 'form_alpha': self.form_alpha}
+
+    def _deviation(self, table, rows):
+        # Deviation grows back with every race the entry missed since its last one
+        state = table.state[rows]
+        missed = np.where(state[:, 2] > 0, self.n_races - state[:, 5] - 1, 0)
+        deviation = np.sqrt(state[:, 1] ** 2 + self.deviation_growth ** 2 * missed)
+        return np.minimum(deviation, INITIAL_DEVIATION)
+
+    def _update(self, table, rows, scores, positions, finished):
+        state = table.state
+        rating = state[rows, 0]
+        deviation = self._deviation(table, rows)
+        n = len(rows)
+        if n > 1:
+            field = (rating.sum() - rating) / (n - 1)
+            expected = 1.0 / (1.0 + 10.0 ** ((field - rating) / 400.0))
+            k = self.k_factor * deviation / self.min_deviation
+            state[rows, 0] = rating + k * (scores - expected)
+        state[rows, 1] = np.maximum(1.0 / np.sqrt(1.0 / deviation ** 2 + 1.0 / RACE_DEVIATION ** 2),
+                                    self.min_deviation)
+        state[rows, 2] += 1
+        a = self.form_alpha
+        state[rows, 3] = np.where(np.isnan(positions), state[rows, 3], (1 - a) * state[rows, 3] + a * positions)
+        state[rows, 4] = np.where(np.isnan(finished), state[rows, 4], (1 - a) * state[rows, 4] + a * finished)
+        state[rows, 5] = self.n_races
+
+    def pre_race(self, race):
+        """
+        Ratings and form of the entries of a race, as they stand before it.
+
+        Parameters:
+        race (pd.DataFrame): One race with DriverId and TeamId, results not needed
+
+        Returns:
+        pd.DataFrame: RATING_COLUMNS on the race's index
+        """
+        drivers = self.drivers.rows(race['DriverId'].to_numpy())
+        teams = self.teams.rows(race['TeamId'].to_numpy())
+        return pd.DataFrame({
+            'DriverRating': self.drivers.state[drivers, 0],
+            'DriverRatingDev': self._deviation(self.drivers, drivers),
+            'DriverRaces': self.drivers.state[drivers, 2],
+            'DriverFormPosition': self.drivers.state[drivers, 3],
+            'DriverFormFinish': self.drivers.state[drivers, 4],
+            'TeamRating': self.teams.state[teams, 0],
+            'TeamRatingDev': self._deviation(self.teams, teams),
+            'TeamFormPosition': self.teams.state[teams, 3],
+        }, index=race.index)
+
+    def update(self, race):
+        """
+        Apply the results of one race to the drivers and teams that took part.
+
+        Parameters:
+        race (pd.DataFrame): One race with DriverId, TeamId, Position_Race and Finished
+        """
+        positions = race['Position_Race'].to_numpy(dtype=float)
+        finished = race['Finished'].to_numpy(dtype=float)
+        # Share of the field beaten, entries without a position are ranked last
+        order = pd.Series(positions).rank(method='average', na_option='bottom').to_numpy()
+        n = len(race)
+        scores = (n - order) / (n - 1) if n > 1 else np.full(n, 0.5)
+        drivers = self.drivers.rows(race['DriverId'].to_numpy())
+        self._update(self.drivers, drivers, scores, positions, finished)
+
+        # Teams are scored on the mean of their drivers
+        codes, team_ids = pd.factorize(race['TeamId'])
+        teams = self.teams.rows(np.asarray(team_ids))
+        self._update(self.teams, teams, group_mean(codes, scores, len(team_ids)),
+                     group_mean(codes, positions, len(team_ids)), group_mean(codes, finished, len(team_ids)))
+        self.n_races += 1
+
+    def can_extend(self, results):
+        """
+        Check whether the state can absorb these results without a recompute.
+
+        That holds when every race already processed is unchanged and no new race is dated
+        before the last processed one.
+
+        Parameters:
+        results (pd.DataFrame): Output of normalize_results
+
+        Returns:
+        bool: True if process() can continue from the current state
+        """
+        digests = race_digests(results)
+        if any(self.races.get(race, digest) != digest for race, digest in digests.items()):
+            return False
+        new = ~pd.MultiIndex.from_frame(results[RACE_ID]).isin(list(self.races))
+        return self.last_date is None or not (results.loc[new, 'RaceDate'] < self.last_date).any()
+
+    def process(self, results):
+        """
+        Emit the pre-race features of every new race, then apply its results, in date order.
+
+        Races already processed are skipped, races without any position (upcoming races) are
+        left to features(), which rates them on the current state.
+
+        Parameters:
+        results (pd.DataFrame): Output of normalize_results
+
+        Returns:
+        int: Number of races applied
+        """
+        digests = race_digests(results)
+        new = results[~pd.MultiIndex.from_frame(results[RACE_ID]).isin(list(self.races))]
+        # Files may list races out of order, the state must see them by date
+        new = new.sort_values(['RaceDate', 'Year'], kind='stable')
+        applied = 0
+        for race_id, race in new.groupby(RACE_ID, sort=False):
+            if race['Position_Race'].isna().all():
+                continue
+            features = self.pre_race(race)
+            self._history.append(pd.concat([race[['Year', 'RaceName', 'DriverId']], features], axis=1))
+            self.update(race)
+            self.races[race_id] = digests[race_id]
+            self.last_date = race['RaceDate'].iloc[0]
+            applied += 1
+        return applied
+
+    def history(self):
+        """
+        Pre-race features of every processed race.
+
+        Returns:
+        pd.DataFrame: Year, RaceName, DriverId and RATING_COLUMNS, one row per driver and race
+        """
+        if len(self._history) > 1:
+            self._history = [pd.concat(self._history, ignore_index=True)]
+        if not self._history:
+            return pd.DataFrame(columns=['Year', 'RaceName', 'DriverId'] + RATING_COLUMNS)
+        return self._history[0]
+
+    def features(self, results):
+        """
+        Leak-free rating features of every row of the results.
+
+        Rows of processed races get the features stored when the race was applied, rows of
+        races not applied yet get the current ratings.
+
+        Parameters:
+        results (pd.DataFrame): Output of normalize_results
+
+        Returns:
+        pd.DataFrame: RATING_COLUMNS on the results' index
+        """
+        keys = ['Year', 'RaceName', 'DriverId']
+        history = self.history().drop_duplicates(keys)
+        stored = results[keys].merge(history, on=keys, how='left')[RATING_COLUMNS].set_axis(results.index)
+        pending = stored['DriverRating'].isna().to_numpy()
+        if pending.any():
+            stored.loc[pending] = self.pre_race(results[pending]).to_numpy()
+        return stored
+
+    def save(self, path):
+        """
+        Write the state to a checkpoint.
+
+        Parameters:
+        path (str): Path of the pickle
+        """
+        self.history()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CHECKPOINT_VERSION, 'engine': self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Read a checkpoint.
+
+        Parameters:
+        path (str): Path of the pickle
+
+        Returns:
+        RatingEngine: The stored engine, or None if it is missing, unreadable or of an older version
+        """
+        try:
+            with open(path, 'rb') as f:
+                checkpoint = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+            return None
+        return checkpoint['engine']
+
+
+def checkpoint_path(engine, rating_dir=RATING_DIR):
+    """
+    Path of the checkpoint of an engine, keyed by its parameters.
+
+    Parameters:
+    engine (RatingEngine): The engine
+    rating_dir (str): Folder holding the checkpoints
+
+    Returns:
+    str: Path such as './models/ratings/ratings_<hash>.pkl'
+    """
+    params = json.dumps(engine.get_params(), sort_keys=True)
+    return os.path.join(rating_dir, f"ratings_{hashlib.sha256(params.encode('utf-8')).hexdigest()[:16]}.pkl")
+
+
+def rating_features(results, rating_dir=RATING_DIR, refresh=False, **params):
+    """
+    Rating features of every row, continuing from the checkpoint so only new races are applied.
+
+    The checkpoint is rebuilt from scratch when a processed race changed or a new race is dated
+    before the last processed one.
+
+    Parameters:
+    results (pd.DataFrame): Race results with RESULT_COLUMNS
+    rating_dir (str): Folder holding the checkpoints
+    refresh (bool): Ignore the checkpoint and rebuild the ratings
+    params (dict): RatingEngine parameters
+
+    Returns:
+    pd.DataFrame: RATING_COLUMNS on the results' index
+    """
+    results = normalize_results(results)
+    path = checkpoint_path(RatingEngine(**params), rating_dir)
+    engine = None if refresh else RatingEngine.load(path)
+    if engine is None or not engine.can_extend(results):
+        engine = RatingEngine(**params)
+    if engine.process(results):
+        engine.save(path)
+    return engine.features(results)
+
+
+def load_rating_features(filepath, **kwargs):
+    """
+    Rating features of every row of a results file, for joining onto frames loaded from it.
+
+    Parameters:
+    filepath (str): The path to the CSV, Parquet or Arrow file
+    kwargs (dict): Arguments of rating_features
+
+    Returns:
+    pd.DataFrame: RATING_COLUMNS on the row positions of the file, like the predictors' data_loader
+    """
+    return rating_features(read_table(filepath, RESULT_COLUMNS), **kwargs)
+
+
+if __name__ == "__main__":
+    # Example usage: current driver and team ratings after the last race of the processed data
+    features = load_rating_features('./data/f1_data_processed.csv')
+    engine = RatingEngine.load(checkpoint_path(RatingEngine()))
+    print(engine.drivers.frame().sort_values('Rating', ascending=False).head(10).round(1))
+    print(engine.teams.frame().sort_values('Rating', ascending=False).head(10).round(1))
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# Scenarios scored per predict call, bounds the memory of a sweep to one chunk of the design matrix
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _as_frame(base):
+    """
+    Turn the base features into a frame of base rows.
+
+    Parameters:
+    base (pd.DataFrame, pd.Series or dict): One base row or several (e.g. the grid of an upcoming race)
+
+    Returns:
+    pd.DataFrame: The base rows with a fresh 0..n-1 index
+    """
+    if isinstance(base, pd.DataFrame):
+        return base.reset_index(drop=True)
+    if isinstance(base, pd.Series):
+        return base.to_frame().T.infer_objects().reset_index(drop=True)
+    return pd.DataFrame([base])
+
+
+def scenario_shape(base, axes):
+    """
+    Size of every dimension of the sweep: the base rows followed by the values of each axis.
+
+    Parameters:
+    base (pd.DataFrame, pd.Series or dict): The base features
+    axes (dict): Column name -> values to try
+
+    Returns:
+    tuple: The dimension sizes, their product is the number of scenarios
+    """
+    return (len(_as_frame(base)),) + tuple(len(values) for values in axes.values())
+
+
+def iter_scenarios(base, axes, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Build the Cartesian product of the base rows and the axes lazily, one chunk at a time.
+
+    Scenario i is decoded from its flat index, so only the rows of the current chunk are ever
+    materialised, whatever the total size of the sweep.
+
+    Parameters:
+    base (pd.DataFrame, pd.Series or dict): The base features
+    axes (dict): Column name -> values to try, each replacing that column of the base rows
+    chunk_size (int): Number of scenarios per chunk
+
+    Yields:
+    pd.DataFrame: Feature rows of one chunk, with a BaseRow column pointing at the base row used
+    """
+    base = _as_frame(base)
+    axis_values = {col: np.asarray(values) for col, values in axes.items()}
+    shape = scenario_shape(base, axis_values)
+    total = int(np.prod(shape))
+
+    for start in range(0, total, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, total))
+        positions = np.unravel_index(flat, shape)
+        chunk = base.take(positions[0]).reset_index(drop=True)
+        for (col, values), pos in zip(axis_values.items(), positions[1:]):
+            chunk[col] = values[pos]
+        chunk['BaseRow'] = positions[0]
+        yield chunk
+
+
+def score(model, X, positive_class=1):
+    """
+    Score a batch of feature rows with a single model call.
+
+    Parameters:
+    model: Fitted classifier or regressor
+    X: Feature rows the model was trained on (frame or sparse matrix)
+    positive_class: Class whose probability is returned for classifiers
+
+    Returns:
+    np.ndarray: Probability of the positive class for classifiers, predictions for regressors
+    """
+    if hasattr(model, 'predict_proba') and hasattr(model, 'classes_'):
+        column = list(model.classes_).index(positive_class)
+        return model.predict_proba(X)[:, column]
+    return model.predict(X)
+
+
+def run_scenarios(model, base, axes, encoder=None, columns=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  positive_class=1):
+    """
+    Score every combination of the base rows and the axes with batched predictions.
+
+    Works with any fitted predictor: pass the FeatureEncoder of a predictor that was trained on
+    encoded features, or a base frame that is already in the model's feature layout.
+
+    Parameters:
+    model: Fitted classifier or regressor
+    base (pd.DataFrame, pd.Series or dict): The base features, in the columns the model (or encoder) expects
+    axes (dict): Column name -> values to try, e.g. {'GridPosition': range(1, 21), 'Rainfall': [0, 1]}
+    encoder (FeatureEncoder): Fitted encoder applied to every chunk before scoring, if any
+    columns (list): Base columns to carry into the result to identify the scenario (e.g. ['DriverId'])
+    chunk_size (int): Number of scenarios scored per model call
+    positive_class: Class whose probability is returned for classifiers
+
+    Returns:
+    pd.DataFrame: One row per scenario with BaseRow, the carried columns, the axis columns and Prediction
+    """
+    base = _as_frame(base)
+    feature_cols = encoder.numeric_cols_ + encoder.categorical_cols if encoder is not None else None
+    if feature_cols is None and hasattr(model, 'feature_names_in_'):
+        feature_cols = list(model.feature_names_in_)
+    keep = ['BaseRow'] + list(columns or []) + [col for col in axes if col not in (columns or [])]
+
+    results = []
+    for chunk in iter_scenarios(base, axes, chunk_size):
+        X = chunk[feature_cols] if feature_cols is not None else chunk.drop(columns=['BaseRow'])
+        if encoder is not None:
+            X = encoder.transform(X)
+        result = chunk[keep]
+        result = result.assign(Prediction=score(model, X, positive_class))
+        results.append(result)
+    return pd.concat(results, ignore_index=True)
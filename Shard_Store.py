@@ -0,0 +1,319 @@
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+# Bump when the layout of a shard changes so every event is rebuilt once
+MANIFEST_VERSION = 4
+MANIFEST_NAME = 'manifest.json'
+# Wait before fetching a failed event again, doubled with every further failure up to the maximum
+RETRY_BACKOFF = timedelta(hours=1)
+MAX_RETRY_BACKOFF = timedelta(days=7)
+
+
+def event_key(year, race_name):
+    """
+    Build the manifest key of an event.
+
+    Parameters:
+    year (int): The year of the race
+    race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+    Returns:
+    str: Key of the form '<year>|<race_name>'
+    """
+    return f'{year}|{race_name}'
+
+
+def shard_name(year, race_name):
+    """
+    Build the relative file name of an event shard.
+
+    Parameters:
+    year (int): The year of the race
+    race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+    Returns:
+    str: Relative path such as '2023/british_grand_prix.csv'
+    """
+    slug = re.sub(r'[^0-9a-z]+', '_', race_name.lower()).strip('_')
+    return f'{year}/{slug}.csv'
+
+
+def file_sha256(path):
+    """
+    Hash the content of a file.
+
+    Parameters:
+    path (str): Path of the file
+
+    Returns:
+    str: Hex digest of the SHA-256 of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write_bytes(path, data):
+    """
+    Write bytes to a file through a temporary file so a crash never leaves a partial file.
+
+    Parameters:
+    path (str): Destination path
+    data (bytes): Content to write
+    """
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ShardStore:
+    """
+    Per-event shards of the merged race, qualifying and weather data plus a manifest.
+
+    Every event is stored as its own CSV under `shard_dir` and recorded in
+    `manifest.json` with the SHA-256 of the shard. An event is only considered done
+    when its shard exists and still matches the recorded hash, so an interrupted
+    build resumes where it stopped and a new Grand Prix only needs one fetch.
+
+    Failed fetches are recorded in the manifest too, with the error and the time of the
+    failure. A failed event (a cancelled race, an outage of the timing API) is only fetched
+    again once its backoff has passed or when it is refreshed explicitly.
+
+    A store serves one build: every shard is hashed at most once per instance, so selecting
+    the pending events and assembling the table do not read the shards twice. Open a new
+    store to check the shards again.
+
+    Parameters:
+    shard_dir (str): Folder holding the shards and the manifest
+    retry_backoff (timedelta): Wait after the first failure of an event, doubled with every further one
+    """
+
+    def __init__(self, shard_dir, retry_backoff=RETRY_BACKOFF):
+        self.shard_dir = shard_dir
+        self.retry_backoff = retry_backoff
+        self.manifest_path = os.path.join(shard_dir, MANIFEST_NAME)
+        os.makedirs(shard_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+        # Event key -> hash its shard was verified against, by is_current or written by write
+        self._verified = {}
+
+    def _load_manifest(self):
+        """
+        Read the manifest, starting a new one if it is missing or from another layout version.
+
+        Returns:
+        dict: The manifest
+        """
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                # Manifests written before failures were recorded have no such section
+                manifest.setdefault('failures', {})
+                return manifest
+        return {'version': MANIFEST_VERSION, 'events': {}, 'failures': {}}
+
+    def _save_manifest(self):
+        """
+        Persist the manifest atomically.
+        """
+        data = json.dumps(self.manifest, indent=2, sort_keys=True).encode('utf-8')
+        _atomic_write_bytes(self.manifest_path, data)
+
+    def shard_path(self, year, race_name):
+        """
+        Absolute path of an event shard.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+        Returns:
+        str: Path of the shard file
+        """
+        return os.path.join(self.shard_dir, shard_name(year, race_name))
+
+    def is_current(self, year, race_name):
+        """
+        Check whether an event has a shard that matches its manifest entry.
+
+        The shard is hashed the first time only, later calls on the same store reuse the result.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+        Returns:
+        bool: True if the event does not need to be fetched again
+        """
+        key = event_key(year, race_name)
+        entry = self.manifest['events'].get(key)
+        if entry is None:
+            return False
+        path = os.path.join(self.shard_dir, entry['shard'])
+        if not os.path.exists(path):
+            return False
+        if self._verified.get(key) != entry['sha256']:
+            if file_sha256(path) != entry['sha256']:
+                return False
+            self._verified[key] = entry['sha256']
+        return True
+
+    def retry_at(self, year, race_name):
+        """
+        Time from which a failed event may be fetched again.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+        Returns:
+        datetime: End of the event's backoff, None if its last fetch did not fail
+        """
+        entry = self.manifest['failures'].get(event_key(year, race_name))
+        if entry is None:
+            return None
+        delay = min(self.retry_backoff * 2 ** (entry['attempts'] - 1), MAX_RETRY_BACKOFF)
+        return datetime.fromisoformat(entry['failed_at']) + delay
+
+    def pending(self, events, refresh=None, now=None):
+        """
+        Select the events that are missing, stale or explicitly marked for refresh.
+
+        Events whose last fetch failed are left out until their backoff has passed, unless
+        they are marked for refresh.
+
+        Parameters:
+        events (list): (year, race_name) tuples
+        refresh (list): (year, race_name) tuples to fetch again even if their shard is current
+        now (datetime): Time the backoffs are compared against, defaults to the current time
+
+        Returns:
+        list: The (year, race_name) tuples that have to be fetched
+        """
+        refresh = set(refresh or [])
+        now = now or datetime.now(timezone.utc)
+        selected = []
+        for year, race in events:
+            if (year, race) not in refresh:
+                if self.is_current(year, race):
+                    continue
+                retry_at = self.retry_at(year, race)
+                if retry_at is not None and retry_at > now:
+                    continue
+            selected.append((year, race))
+        return selected
+
+    def backing_off(self, events, refresh=None, now=None):
+        """
+        Select the failed events that pending leaves out because their backoff has not passed.
+
+        Parameters:
+        events (list): (year, race_name) tuples
+        refresh (list): (year, race_name) tuples marked for refresh
+        now (datetime): Time the backoffs are compared against, defaults to the current time
+
+        Returns:
+        list: The (year, race_name) tuples waiting for their retry
+        """
+        refresh = set(refresh or [])
+        now = now or datetime.now(timezone.utc)
+        waiting = []
+        for year, race in events:
+            if (year, race) in refresh or self.is_current(year, race):
+                continue
+            retry_at = self.retry_at(year, race)
+            if retry_at is not None and retry_at > now:
+                waiting.append((year, race))
+        return waiting
+
+    def record_failure(self, year, race_name, error):
+        """
+        Record a failed fetch of an event, starting or extending its backoff.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+        error (str): The error message
+        """
+        key = event_key(year, race_name)
+        previous = self.manifest['failures'].get(key, {})
+        self.manifest['failures'][key] = {
+            'year': year,
+            'race_name': race_name,
+            'error': error,
+            'attempts': previous.get('attempts', 0) + 1,
+            'failed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self._save_manifest()
+
+    def write(self, year, race_name, frame):
+        """
+        Store an event frame as a shard and record it in the manifest.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+        frame (pd.DataFrame): The merged event frame
+        """
+        path = self.shard_path(year, race_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = frame.to_csv(index=False).encode('utf-8')
+        _atomic_write_bytes(path, data)
+
+        self.manifest['events'][event_key(year, race_name)] = {
+            'year': year,
+            'race_name': race_name,
+            'shard': shard_name(year, race_name),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'rows': len(frame),
+            'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self.manifest['failures'].pop(event_key(year, race_name), None)
+        self._verified[event_key(year, race_name)] = hashlib.sha256(data).hexdigest()
+        # Save after every event so a crash keeps everything built so far
+        self._save_manifest()
+
+    def read(self, year, race_name):
+        """
+        Load the shard of an event.
+
+        Parameters:
+        year (int): The year of the race
+        race_name (str): The name of the race (e.g., 'British Grand Prix')
+
+        Returns:
+        pd.DataFrame: The merged event frame
+        """
+        # ClassifiedPosition mixes numbers and codes like 'R', keep it text even in a race without retirements
+        # round_trip parses the floats back to the exact values written, the default parser can be off by one ulp
+        return pd.read_csv(self.shard_path(year, race_name), dtype={'ClassifiedPosition': str},
+                           float_precision='round_trip')
+
+    def assemble(self, events):
+        """
+        Concatenate the shards of the given events in the given order.
+
+        Events without a current shard (for example a cancelled race) are left out. A ValueError
+        is raised if that leaves nothing, e.g. on a first build where every fetch failed.
+
+        Parameters:
+        events (list): (year, race_name) tuples
+
+        Returns:
+        pd.DataFrame: The combined data of all available events
+        """
+        frames = [self.read(year, race) for year, race in events if self.is_current(year, race)]
+        if not frames:
+            failed = [(year, race) for year, race in events if event_key(year, race) in self.manifest['failures']]
+            raise ValueError(f"None of the {len(events)} events has been built yet ({len(failed)} failed to "
+                             f"fetch, see the failures in '{self.manifest_path}')")
+        return pd.concat(frames, ignore_index=True)
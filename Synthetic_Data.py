@@ -0,0 +1,248 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from Data_Wrangling import NOT_FINISHED_CODES
+
+# Shape of one synthetic series, close to the 2018-2023 data
+BASE_SEASONS = 6
+FIRST_YEAR = 2018
+EVENTS_PER_SEASON = 22
+DRIVERS_PER_RACE = 20
+TEAMS_PER_SEASON = 10
+# Drivers replaced by newcomers every season, and seasons between team renames
+DRIVER_CHURN = 3
+TEAM_RENAME_SEASONS = 5
+DNF_RATE = 0.14
+
+POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1] + [0] * (DRIVERS_PER_RACE - 10), dtype=float)
+DNF_STATUSES = np.array(['Collision', 'Engine', 'Collision damage', 'Accident', 'Brakes', 'Gearbox',
+                         'Power Unit', 'Hydraulics', 'Suspension', 'Retired'])
+
+# Columns of data/f1_data_2018_2023.csv, the output of prepare_f1_data
+RAW_COLUMNS = ['DriverNumber', 'BroadcastName', 'Abbreviation', 'DriverId', 'TeamName', 'TeamColor', 'TeamId',
+               'FirstName', 'LastName', 'FullName', 'HeadshotUrl', 'CountryCode', 'Position_Race',
+               'ClassifiedPosition', 'GridPosition', 'Q1_Race', 'Q2_Race', 'Q3_Race', 'Time', 'Status', 'Points',
+               'RaceDate', 'TotalLaps', 'LapLength', 'CircuitId', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual',
+               'AirTemp', 'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year',
+               'RaceName']
+
+# Columns of data/f1_data_processed.csv, the table the predictors load
+PROCESSED_COLUMNS = ['DriverId', 'TeamId', 'Position_Race', 'ClassifiedPosition', 'GridPosition', 'Time', 'Status',
+                     'RaceDate', 'TotalLaps', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual', 'AirTemp',
+                     'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year',
+                     'RaceName', 'TotalLength', 'Finished']
+
+
+def _duration_text(seconds):
+    """
+    Format seconds the way the CSVs store durations, e.g. '0 days 01:29:33.283000'.
+
+    The digits are written straight into a byte array, as formatting through Timedelta
+    strings costs about a microsecond per value.
+
+    Parameters:
+    seconds (np.ndarray): Durations under a day in seconds, NaN where missing
+
+    Returns:
+    np.ndarray: Duration strings, NaN where missing
+    """
+    missing = np.isnan(seconds)
+    ms = np.round(np.where(missing, 0, seconds) * 1000).astype(np.int64)
+    fields = [(7, ms // 3_600_000, 2), (10, ms // 60_000 % 60, 2), (13, ms // 1000 % 60, 2), (16, ms % 1000, 3)]
+
+    chars = np.frombuffer(b'0 days 00:00:00.000000' * len(ms), dtype=np.uint8).reshape(len(ms), -1).copy()
+    for start, value, width in fields:
+        for i in range(width):
+            chars[:, start + width - 1 - i] = ord('0') + value // 10 ** i % 10
+    text = chars.view(f'S{chars.shape[1]}').ravel().astype(str).astype(object)
+    text[missing] = np.nan
+    return text
+
+
+def _rank(values):
+    """
+    Rank every row of a 2-D array, 1 for the smallest value.
+
+    Parameters:
+    values (np.ndarray): One row per race, one column per driver
+
+    Returns:
+    np.ndarray: The ranks, same shape as values
+    """
+    ranks = np.empty_like(values, dtype=np.int64)
+    np.put_along_axis(ranks, np.argsort(values, axis=1), np.arange(1, values.shape[1] + 1)[None, :], axis=1)
+    return ranks
+
+
+def generate_raw(scale=1, seed=0):
+    """
+    Generate raw race results with the schema and value formats of prepare_f1_data's output.
+
+    The data grows by adding parallel series: each one has the size of the 2018-2023 data
+    (6 seasons of 22 events with 20 drivers) and its own drivers, teams and venues, so the
+    number of seasons' worth of races, distinct drivers and distinct events all grow with
+    `scale`, while the years and race dates stay realistic. Drivers have a persistent skill
+    that drives qualifying and race order; a share of them retire, the backmarkers get
+    lapped, and only finishers on the lead lap have a Time, as in the real data.
+
+    Parameters:
+    scale (int): Number of series, scale=1 gives about as many rows as data/f1_data_2018_2023.csv
+    seed (int): Seed of the random generator
+
+    Returns:
+    pd.DataFrame: One row per driver and race in RAW_COLUMNS
+    """
+    rng = np.random.default_rng(seed)
+    n_per_series = BASE_SEASONS * EVENTS_PER_SEASON
+    n_races = scale * n_per_series
+    race = np.arange(n_races)
+    series, within = np.divmod(race, n_per_series)
+    season, event = np.divmod(within, EVENTS_PER_SEASON)
+
+    # Venues: every series has its own calendar of EVENTS_PER_SEASON circuits
+    venue = series * EVENTS_PER_SEASON + event
+    n_venues = scale * EVENTS_PER_SEASON
+    venue_laps = rng.integers(44, 78, n_venues)
+    venue_length = rng.integers(3300, 7005, n_venues)
+    venue_base_lap = venue_length / rng.uniform(52, 62, n_venues)
+    circuit_ids = np.array([f'circuit{v}' for v in range(n_venues)], dtype=object)
+    race_names = np.array([f'Synthetic {v} Grand Prix' for v in range(n_venues)], dtype=object)
+
+    # Race dates: weekly from March, each series starting a few minutes later so races stay distinct
+    year = FIRST_YEAR + season
+    dates = (pd.to_datetime(pd.Series(year).astype(str) + '-03-05 05:10:00')
+             + pd.to_timedelta(event * 7, unit='D') + pd.to_timedelta(series, unit='min'))
+
+    # Rosters: the drivers of a season are a sliding window over the series' driver pool
+    pool_size = DRIVERS_PER_RACE + DRIVER_CHURN * (BASE_SEASONS - 1)
+    slot = np.arange(DRIVERS_PER_RACE)
+    driver = series[:, None] * pool_size + season[:, None] * DRIVER_CHURN + slot[None, :]
+    team_pool = TEAMS_PER_SEASON * (1 + (BASE_SEASONS - 1) // TEAM_RENAME_SEASONS)
+    team = (series[:, None] * team_pool + (season // TEAM_RENAME_SEASONS)[:, None] * TEAMS_PER_SEASON
+            + (slot // 2)[None, :])
+    n_drivers = scale * pool_size
+    skill = rng.normal(0, 1, n_drivers)
+    team_pace = rng.normal(0, 1, scale * team_pool)
+
+    pace = skill[driver] + 1.5 * team_pace[team]
+    qual_score = pace + rng.normal(0, 0.6, pace.shape)
+    race_score = pace + rng.normal(0, 1.0, pace.shape)
+    position_qual = _rank(qual_score)
+    grid = position_qual.astype(float)
+    grid[rng.random(grid.shape) < 0.02] = 0  # pit lane starts
+
+    # Race order: retirements are classified behind every finisher
+    dnf = rng.random(pace.shape) < DNF_RATE
+    position_race = _rank(np.where(dnf, race_score + 1e6, race_score))
+
+    laps = venue_laps[venue][:, None]
+    lap_time = venue_base_lap[venue][:, None] * 1.05
+    winner_time = lap_time * laps * rng.uniform(1.0, 1.05, (n_races, 1))
+    # Gaps add up down the order, the backmarkers end a lap or two behind
+    increments = rng.exponential(7.0, pace.shape)
+    increments[:, 0] = 0
+    gap = np.take_along_axis(np.cumsum(increments, axis=1), position_race - 1, axis=1)
+    race_time = winner_time + gap
+    laps_behind = np.floor(gap / lap_time).astype(int)
+    # Lapped finishers have no Time, only a '+n Lap(s)' status
+    lapped = ~dnf & (laps_behind > 0) & (position_race > 3)
+    race_time = np.where(dnf | lapped, np.nan, race_time)
+    status = np.where(laps_behind == 1, '+1 Lap', np.char.add(np.char.add('+', laps_behind.astype(str)), ' Laps'))
+    status = np.where(lapped, status, 'Finished')
+    status = np.where(dnf, DNF_STATUSES[rng.integers(0, len(DNF_STATUSES), pace.shape)], status)
+
+    q_base = venue_base_lap[venue][:, None] * 0.93
+    q1 = q_base * (1 + 0.004 * position_qual + rng.normal(0, 0.001, pace.shape))
+    q2 = np.where(position_qual <= 15, q1 - rng.uniform(0.1, 0.6, pace.shape), np.nan)
+    q3 = np.where(position_qual <= 10, q2 - rng.uniform(0.1, 0.6, pace.shape), np.nan)
+
+    weather = {
+        'AirTemp': rng.uniform(12, 36, n_races),
+        'Humidity': rng.uniform(20, 95, n_races),
+        'Pressure': rng.uniform(940, 1023, n_races),
+        'Rainfall': np.where(rng.random(n_races) < 0.1, rng.uniform(0, 1, n_races), 0.0),
+        'WindDirection': rng.uniform(0, 360, n_races),
+        'WindSpeed': rng.uniform(0, 5.5, n_races),
+    }
+    weather['TrackTemp'] = weather['AirTemp'] + rng.uniform(5, 20, n_races)
+
+    first_names = np.array([f'First{d}' for d in range(n_drivers)], dtype=object)
+    last_names = np.array([f'Driver{d}' for d in range(n_drivers)], dtype=object)
+    team_names = np.array([f'Team {t}' for t in range(scale * team_pool)], dtype=object)
+    team_colors = np.array([f'{c:06X}' for c in rng.integers(0, 0xFFFFFF, scale * team_pool)], dtype=object)
+
+    d, t = driver.ravel(), team.ravel()
+    per_race = np.repeat(race, DRIVERS_PER_RACE)
+    classified = position_race.ravel().astype(str).astype(object)
+    classified[dnf.ravel()] = NOT_FINISHED_CODES[0]
+
+    df = pd.DataFrame({
+        'DriverNumber': d % 99 + 1,
+        'BroadcastName': np.char.add('F ', np.char.upper(last_names[d].astype(str))),
+        'Abbreviation': np.char.upper(np.char.add('D', (d % 100).astype(str).astype('<U2'))),
+        'DriverId': np.char.lower(last_names[d].astype(str)),
+        'TeamName': team_names[t],
+        'TeamColor': team_colors[t],
+        'TeamId': np.char.replace(np.char.lower(team_names[t].astype(str)), ' ', '_'),
+        'FirstName': first_names[d],
+        'LastName': last_names[d],
+        'FullName': np.char.add(np.char.add(first_names[d].astype(str), ' '), last_names[d].astype(str)),
+        'HeadshotUrl': np.nan,
+        'CountryCode': np.nan,
+        'Position_Race': position_race.ravel().astype(float),
+        'ClassifiedPosition': classified,
+        'GridPosition': grid.ravel(),
+        'Q1_Race': np.nan,
+        'Q2_Race': np.nan,
+        'Q3_Race': np.nan,
+        'Time': _duration_text(race_time.ravel()),
+        'Status': status.ravel(),
+        'Points': np.where(dnf, 0, POINTS[position_race - 1]).ravel(),
+        'RaceDate': dates.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy()[per_race],
+        'TotalLaps': np.repeat(laps.ravel(), DRIVERS_PER_RACE),
+        'LapLength': venue_length[venue][per_race],
+        'CircuitId': circuit_ids[venue][per_race],
+        'Position_Qual': position_qual.ravel().astype(float),
+        'Q1_Qual': _duration_text(q1.ravel()),
+        'Q2_Qual': _duration_text(q2.ravel()),
+        'Q3_Qual': _duration_text(q3.ravel()),
+        **{col: values[per_race] for col, values in weather.items()},
+        'Year': year[per_race],
+        'RaceName': race_names[venue][per_race],
+    })
+    return df[RAW_COLUMNS]
+
+
+def to_processed(raw):
+    """
+    Reduce raw results to the layout of data/f1_data_processed.csv.
+
+    Parameters:
+    raw (pd.DataFrame): Output of generate_raw (or prepare_f1_data)
+
+    Returns:
+    pd.DataFrame: The rows in PROCESSED_COLUMNS, with Time in seconds and the Finished flag
+    """
+    df = raw.copy()
+    df['Time'] = pd.to_timedelta(df['Time'], errors='coerce').dt.total_seconds()
+    df['Position_Race'] = df['Position_Race'].astype(int)
+    df['TotalLength'] = df['TotalLaps'] * df['LapLength']
+    df['Finished'] = (~df['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    return df[PROCESSED_COLUMNS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write a synthetic dataset with the schema of the F1 data files.')
+    parser.add_argument('scale', type=int, help='number of 2018-2023 sized series to generate')
+    parser.add_argument('output', help='destination CSV')
+    parser.add_argument('--raw', action='store_true', help='write the prepare_f1_data layout instead of the processed one')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    output_df = generate_raw(args.scale, args.seed)
+    if not args.raw:
+        output_df = to_processed(output_df)
+    output_df.to_csv(args.output, index=False)
+    print(f"Written {len(output_df)} rows to '{args.output}'.")
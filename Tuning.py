@@ -0,0 +1,276 @@
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import KFold, ParameterSampler, StratifiedKFold
+from xgboost import XGBClassifier, XGBRegressor
+
+from Feature_Encoder import FeatureEncoder
+from Model_Comparison import shared_pool
+from Model_Registry import REGISTRY_DIR, fingerprint_frame
+import Finish_Predictor
+import Time_Predictor
+
+TUNING_DIR = os.path.join(REGISTRY_DIR, 'tuning')
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+# Dataset, scorer and estimators of every target that can be tuned, the rows and features are
+# those of the predictor's load_dataset so the search sees what fit() trains on
+TARGETS = {
+    'finished': {
+        'module': Finish_Predictor,
+        'target': 'Finished',
+        'scoring': 'accuracy',
+        'models': {'rf': RandomForestClassifier, 'xgb': XGBClassifier},
+    },
+    'time': {
+        'module': Time_Predictor,
+        'target': 'Time',
+        'scoring': 'neg_mean_absolute_error',
+        'models': {'rf': RandomForestRegressor, 'xgb': XGBRegressor},
+    },
+}
+
+SEARCH_SPACES = {
+    'rf': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 2, 4, 8],
+        'max_features': ['sqrt', 0.3, 0.6, 1.0],
+    },
+    'xgb': {
+        'n_estimators': [100, 300, 600],
+        'max_depth': [3, 4, 6, 8],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.5, 0.8, 1.0],
+        'min_child_weight': [1, 3, 5],
+    },
+}
+
+
+def prepare_search_data(target, filepath='./data/f1_data_processed.csv', cv=5, cache_dir=TUNING_DIR,
+                        refresh=False, random_state=42):
+    """
+    Load, split and encode the training rows of a target once, and cache the result with its fold splits.
+
+    The data comes from the predictor's load_dataset, so the search scores the same features
+    (the Rating_Engine ratings of the Finished model included) as fit() trains on. Only the
+    training split of the predictor's split_data is used, so the test rows stay untouched by
+    the search. The cache is keyed by the content of the loaded data and the
+    number of folds, so it is rebuilt whenever either changes.
+
+    Parameters:
+    target (str): 'finished' or 'time'
+    filepath (str): The path to the CSV, Parquet or Arrow file
+    cv (int): Number of folds
+    cache_dir (str): Folder holding the cached matrices
+    refresh (bool): Rebuild the cache even if it exists
+    random_state (int): Seed of the fold shuffling
+
+    Returns:
+    tuple: Encoded training features (CSR matrix), target (np.ndarray), list of (train_idx, test_idx) folds
+           whose training rows are in random order, so any prefix is a random subsample
+    """
+    config = TARGETS[target]
+    df = config['module'].load_dataset(filepath)
+    key = f"{target}_{cv}_{random_state}_{fingerprint_frame(df)[:16]}"
+    folder = os.path.join(cache_dir, key)
+    if not refresh and os.path.exists(os.path.join(folder, 'folds.npz')):
+        folds = np.load(os.path.join(folder, 'folds.npz'))
+        return (sparse.load_npz(os.path.join(folder, 'X.npz')), np.load(os.path.join(folder, 'y.npy')),
+                [(folds[f'train_{i}'], folds[f'test_{i}']) for i in range(cv)])
+
+    X_train, _, y_train, _ = config['module'].split_data(df, config['target'])
+    X = FeatureEncoder(CATEGORICAL_COLS).fit_transform(X_train)
+    y = y_train.to_numpy()
+    splitter = StratifiedKFold if target == 'finished' else KFold
+    rng = np.random.default_rng(random_state)
+    folds = [(rng.permutation(train_idx), test_idx) for train_idx, test_idx in
+             splitter(n_splits=cv, shuffle=True, random_state=random_state).split(np.zeros((len(y), 1)), y)]
+
+    os.makedirs(folder, exist_ok=True)
+    sparse.save_npz(os.path.join(folder, 'X.npz'), X)
+    np.save(os.path.join(folder, 'y.npy'), y)
+    arrays = {}
+    for i, (train_idx, test_idx) in enumerate(folds):
+        arrays[f'train_{i}'], arrays[f'test_{i}'] = train_idx, test_idx
+    # Written last, its presence marks a complete cache entry
+    np.savez(os.path.join(folder, 'folds.npz'), **arrays)
+    return X, y, folds
+
+
+def sample_candidates(target, models, n_candidates, random_state=42):
+    """
+    Draw random configurations from the search spaces, split evenly across the model families.
+
+    Parameters:
+    target (str): 'finished' or 'time'
+    models (list): Model families to search, keys of SEARCH_SPACES
+    n_candidates (int): Total number of configurations
+    random_state (int): Seed of the sampling
+
+    Returns:
+    list: (model family, parameters, unfitted estimator) tuples
+    """
+    candidates = []
+    for i, family in enumerate(models):
+        n_family = n_candidates // len(models) + (i < n_candidates % len(models))
+        estimator_cls = TARGETS[target]['models'][family]
+        for params in ParameterSampler(SEARCH_SPACES[family], n_family, random_state=random_state):
+            # One thread per candidate, the parallelism comes from running candidates side by side
+            estimator = estimator_cls(random_state=random_state, n_jobs=1, **params)
+            candidates.append((family, params, estimator))
+    return candidates
+
+
+def successive_halving(candidates, X, y, folds, scoring, eta=3, min_rows=50, budget_seconds=None,
+                       cpu_budget_seconds=None, n_jobs=-1):
+    """
+    Successive-halving search: score every candidate on a small share of the training rows, then
+    keep the best 1/eta and give them eta times more rows, until the survivors use all rows.
+
+    All (candidate x fold) jobs of a round run side by side on one process pool that shares the
+    matrix through memory-mapped files. The search stops early, keeping the rounds completed
+    so far, once the wall-clock budget runs out (pending jobs are cancelled) or once the summed
+    job time of the finished rounds exceeds the CPU budget.
+
+    Parameters:
+    candidates (list): (model family, parameters, unfitted estimator) tuples from sample_candidates
+    X (scipy.sparse matrix or np.ndarray): Encoded training features
+    y (np.ndarray): Training target
+    folds (list): (train_idx, test_idx) folds with training rows in random order
+    scoring (str): sklearn scorer name, higher is better
+    eta (int): Reduction factor between rounds
+    min_rows (int): Fewest training rows per fold given to a candidate
+    budget_seconds (float): Wall-clock budget of the search, unlimited if None
+    cpu_budget_seconds (float): Budget on the summed time of all jobs, unlimited if None
+    n_jobs (int): Number of worker processes, -1 uses all cores
+
+    Returns:
+    pd.DataFrame: Leaderboard with the last round reached by every candidate, best first
+    """
+    full_rows = min(len(train_idx) for train_idx, _ in folds)
+    n_rounds = max(int(math.log(len(candidates), eta)), 0) + 1
+    deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+    cpu_used = 0.0
+    alive = list(range(len(candidates)))
+    history = {}
+
+    with shared_pool(X, y, n_jobs) as run:
+        for rnd in range(n_rounds):
+            n_rows = min(max(int(full_rows * eta ** (rnd - n_rounds + 1)), min_rows), full_rows)
+            jobs = [(str(c), fold, candidates[c][2], train_idx[:n_rows], test_idx, [scoring])
+                    for c in alive for fold, (train_idx, test_idx) in enumerate(folds)]
+            results = pd.DataFrame(run(jobs, deadline))
+            if results.empty:
+                break
+            cpu_used += results['WallSeconds'].sum()
+
+            # A candidate only counts in this round if all of its folds finished
+            scores = results.groupby('Model').agg(Score=(scoring, 'mean'), ScoreStd=(scoring, 'std'),
+                                                  Folds=('Fold', 'size'), Seconds=('WallSeconds', 'sum'))
+            scores = scores[scores['Folds'] == len(folds)].sort_values('Score', ascending=False)
+            for name, row in scores.iterrows():
+                family, params, _ = candidates[int(name)]
+                history[int(name)] = {'Candidate': int(name), 'Model': family, 'Round': rnd, 'TrainRows': n_rows,
+                                      'Score': row['Score'], 'ScoreStd': row['ScoreStd'],
+                                      'Seconds': row['Seconds'], 'Params': json.dumps(params, default=str)}
+
+            out_of_time = deadline is not None and time.monotonic() >= deadline
+            out_of_cpu = cpu_budget_seconds is not None and cpu_used >= cpu_budget_seconds
+            if out_of_time or out_of_cpu or len(scores) <= 1:
+                break
+            alive = [int(name) for name in scores.index[:max(len(scores) // eta, 1)]]
+
+    leaderboard = pd.DataFrame(list(history.values()))
+    if leaderboard.empty:
+        return leaderboard
+    return leaderboard.sort_values(['Round', 'Score'], ascending=False, ignore_index=True)
+
+
+def save_leaderboard(leaderboard, target, tuning_dir=TUNING_DIR):
+    """
+    Append the leaderboard of a search to the target's leaderboard file.
+
+    Parameters:
+    leaderboard (pd.DataFrame): The table returned by successive_halving
+    target (str): 'finished' or 'time'
+    tuning_dir (str): Folder holding the leaderboard files
+
+    Returns:
+    str: Path of the leaderboard file
+    """
+    os.makedirs(tuning_dir, exist_ok=True)
+    path = os.path.join(tuning_dir, f'leaderboard_{target}.csv')
+    leaderboard = leaderboard.assign(RunAt=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+    leaderboard.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+    return path
+
+
+def run_search(target, filepath='./data/f1_data_processed.csv', models=None, n_candidates=54, eta=3, cv=5,
+               budget_seconds=None, cpu_budget_seconds=None, n_jobs=-1, refresh_cache=False):
+    """
+    Search the hyperparameters of a target, append the leaderboard to its file and print the best candidates.
+
+    Parameters:
+    target (str): 'finished' or 'time'
+    filepath (str): The path to the CSV, Parquet or Arrow file
+    models (list): Model families to search, all of SEARCH_SPACES if None
+    n_candidates (int): Total number of configurations
+    eta (int): Reduction factor between rounds
+    cv (int): Number of folds
+    budget_seconds (float): Wall-clock budget of the search, unlimited if None
+    cpu_budget_seconds (float): Budget on the summed time of all jobs, unlimited if None
+    n_jobs (int): Number of worker processes, -1 uses all cores
+    refresh_cache (bool): Rebuild the cached search data even if it exists
+
+    Returns:
+    pd.DataFrame: The leaderboard, empty if no candidate finished within the budget
+    """
+    X, y, folds = prepare_search_data(target, filepath, cv=cv, refresh=refresh_cache)
+    candidates = sample_candidates(target, models or sorted(SEARCH_SPACES), n_candidates)
+    start = time.perf_counter()
+    leaderboard = successive_halving(candidates, X, y, folds, TARGETS[target]['scoring'], eta=eta,
+                                     budget_seconds=budget_seconds, cpu_budget_seconds=cpu_budget_seconds,
+                                     n_jobs=n_jobs)
+    elapsed = time.perf_counter() - start
+    if leaderboard.empty:
+        print("No candidate finished within the budget.")
+        return leaderboard
+
+    path = save_leaderboard(leaderboard, target)
+    print(leaderboard.head(10).to_string(index=False))
+    print(f"Searched {len(candidates)} candidates in {elapsed:.1f} s, leaderboard appended to '{path}'.")
+    print(f"Best {leaderboard['Model'][0]}: {leaderboard['Params'][0]}")
+    return leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Successive-halving hyperparameter search for a predictor target.')
+    parser.add_argument('target', choices=sorted(TARGETS))
+    parser.add_argument('--models', nargs='+', choices=sorted(SEARCH_SPACES), default=sorted(SEARCH_SPACES))
+    parser.add_argument('--n-candidates', type=int, default=54)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=None, help='wall-clock budget in seconds')
+    parser.add_argument('--cpu-budget', type=float, default=None, help='budget on the summed job time in seconds')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--data', default='./data/f1_data_processed.csv')
+    parser.add_argument('--refresh-cache', action='store_true')
+    args = parser.parse_args()
+
+    run_search(args.target, args.data, models=args.models, n_candidates=args.n_candidates, eta=args.eta,
+               cv=args.cv, budget_seconds=args.budget, cpu_budget_seconds=args.cpu_budget, n_jobs=args.n_jobs,
+               refresh_cache=args.refresh_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+# Weather readings aligned to the race phases, per driver
+PHASE_WEATHER = ['AirTemp', 'TrackTemp', 'Rainfall']
+PHASES = ['Start', 'Final']
+WEATHER_FEATURE_COLUMNS = [f'{phase}{col}' for phase in PHASES for col in PHASE_WEATHER] + ['WetLapShare', 'WetStints']
+
+# Laps past this share of the race distance count as the final phase
+FINAL_PHASE_FROM = 2 / 3
+
+
+def asof_positions(reading_times, times):
+    """
+    Sorted as-of join: position of the latest reading taken at or before each time.
+
+    Parameters:
+    reading_times (np.ndarray): Session times of the readings, ascending
+    times (np.ndarray): Session times to align, in any order, NaT allowed
+
+    Returns:
+    np.ndarray: Reading positions, -1 where no reading precedes the time or the time is missing
+    """
+    positions = np.searchsorted(reading_times, times, side='right') - 1
+    positions[pd.isna(times)] = -1
+    return positions
+
+
+def lap_weather(laps, weather):
+    """
+    Align every lap with the latest weather reading taken at or before its start.
+
+    The readings are sorted on session time once and every lap of every driver is matched with
+    one binary search, there is no per-driver or per-lap loop.
+
+    Parameters:
+    laps (pd.DataFrame): FastF1 laps (session.laps)
+    weather (pd.DataFrame): FastF1 weather readings (session.weather_data)
+
+    Returns:
+    pd.DataFrame: The weather columns (Rainfall as 0/1) of every lap, on the laps' index, NaN where
+                  the lap start or a preceding reading is missing
+    """
+    readings = weather.sort_values('Time', kind='stable')
+    # Lap 1 has no lap time, later laps may miss their start time, so fall back on each other
+    start = laps['LapStartTime'].fillna(laps['Time'] - laps['LapTime']).to_numpy()
+    positions = asof_positions(readings['Time'].to_numpy(), start)
+    missing = positions < 0
+
+    aligned = {}
+    for col in readings.columns.drop('Time'):
+        values = readings[col].to_numpy(dtype=float)[positions]
+        values[missing] = np.nan
+        aligned[col] = values
+    return pd.DataFrame(aligned, index=laps.index)
+
+
+def weather_features(laps, weather):
+    """
+    Reduce the weather each driver actually raced in to per-phase and per-stint features.
+
+    The session mean hides changing conditions, a wet start and a dry finish look like a mild
+    drizzle throughout. These features keep the phases apart:
+
+    - StartAirTemp / StartTrackTemp / StartRainfall: conditions at the start of the first lap
+    - FinalAirTemp / FinalTrackTemp / FinalRainfall: mean over the driver's laps in the final third
+    - WetLapShare: share of the driver's laps started with rain
+    - WetStints: number of the driver's stints with at least one wet lap
+
+    All drivers are reduced at once with bincount over factorized driver and stint codes.
+
+    Parameters:
+    laps (pd.DataFrame): FastF1 laps (session.laps) of a race
+    weather (pd.DataFrame): FastF1 weather readings (session.weather_data) of the same race
+
+    Returns:
+    pd.DataFrame: One row per driver, keyed by Abbreviation, with WEATHER_FEATURE_COLUMNS
+    """
+    if len(laps) == 0 or weather is None or len(weather) == 0:
+        return pd.DataFrame(columns=['Abbreviation'] + WEATHER_FEATURE_COLUMNS)
+
+    aligned = lap_weather(laps, weather)
+    codes, drivers = pd.factorize(laps['Driver'])
+    n_drivers = len(drivers)
+    lap = laps['LapNumber'].to_numpy(dtype=float)
+    phase_masks = {'Start': lap == 1, 'Final': lap > FINAL_PHASE_FROM * np.nanmax(lap)}
+
+    def driver_mean(values, mask):
+        mask = mask & ~np.isnan(values)
+        counts = np.bincount(codes[mask], minlength=n_drivers)
+        sums = np.bincount(codes[mask], weights=values[mask], minlength=n_drivers)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    features = {'Abbreviation': drivers}
+    everywhere = np.ones(len(lap), dtype=bool)
+    for phase in PHASES:
+        for col in PHASE_WEATHER:
+            features[f'{phase}{col}'] = driver_mean(aligned[col].to_numpy(), phase_masks[phase])
+
+    rain = aligned['Rainfall'].to_numpy()
+    features['WetLapShare'] = driver_mean(rain, everywhere)
+    wet = rain > 0
+    stint = np.nan_to_num(laps['Stint'].to_numpy(dtype=float)).astype(np.intp)
+    stint_codes = pd.factorize(codes * (stint.max() + 1) + stint)[0]
+    wet_stint = np.bincount(stint_codes[wet], minlength=stint_codes.max() + 1) > 0
+    stint_driver = np.zeros(len(wet_stint), dtype=np.intp)
+    stint_driver[stint_codes] = codes
+    features['WetStints'] = np.bincount(stint_driver, weights=wet_stint, minlength=n_drivers)
+    return pd.DataFrame(features)[['Abbreviation'] + WEATHER_FEATURE_COLUMNS]
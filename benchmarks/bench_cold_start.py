@@ -0,0 +1,76 @@
+"""
+Cold start of the pipeline modules and of `Pipeline_CLI.py predict`, each in a fresh interpreter.
+
+The stored models are trained (or reused) first and the grid of the last race is written to a
+temporary file; the predict run is then timed end to end and checked against
+Pipeline_CLI.PREDICT_BUDGET_SECONDS. The import times show what each module costs on its own.
+
+Usage:
+python benchmarks/bench_cold_start.py [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Pipeline_CLI import PREDICT_BUDGET_SECONDS  # noqa: E402
+
+MODULES = ['Data_Preparation', 'Finish_Predictor', 'Time_Predictor', 'Model_Registry', 'Rating_Engine',
+           'Prediction_Server', 'Pipeline_CLI']
+# Modules a predict run must not import
+HEAVY_MODULES = ['fastf1', 'sklearn', 'matplotlib', 'xgboost']
+
+
+def timed_run(args, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=REPO_DIR, check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import Time_Predictor
+
+    subprocess.run([sys.executable, 'Pipeline_CLI.py', 'train'], cwd=REPO_DIR, check=True, capture_output=True)
+    df = Time_Predictor.load_dataset(os.path.join(REPO_DIR, 'data', 'f1_data_processed.csv'))
+    last = df.tail(1)[['Year', 'RaceName']].iloc[0]
+    grid = df[(df['Year'] == last['Year']) & (df['RaceName'] == last['RaceName'])]
+    grid = grid.drop(columns=['Time'])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        grid_path = os.path.join(tmp_dir, 'grid.csv')
+        grid.to_csv(grid_path, index=False)
+        predict = ['Pipeline_CLI.py', 'predict', '--input', grid_path, '--output', os.path.join(tmp_dir, 'out.csv')]
+
+        baseline = timed_run(['-c', 'pass'], args.repeat)
+        print(f"{'interpreter':<26} {baseline:6.3f} s")
+        for module in MODULES:
+            print(f"{'import ' + module:<26} {timed_run(['-c', f'import {module}'], args.repeat):6.3f} s")
+
+        probe = ('import runpy, sys; sys.argv = ' + repr(predict) + "; runpy.run_path('Pipeline_CLI.py', "
+                 "run_name='__main__'); print(' '.join(m for m in " + repr(HEAVY_MODULES) + " if m in sys.modules))")
+        loaded = subprocess.run([sys.executable, '-c', probe], cwd=REPO_DIR, check=True, capture_output=True,
+                                text=True).stdout.split()
+        elapsed = timed_run(predict, args.repeat)
+
+    print(f"{'predict (' + str(len(grid)) + ' rows)':<26} {elapsed:6.3f} s  budget {PREDICT_BUDGET_SECONDS:.3f} s")
+    print(f"heavy modules imported by predict: {', '.join(loaded) or 'none'}")
+    if elapsed > PREDICT_BUDGET_SECONDS or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
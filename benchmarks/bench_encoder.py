@@ -0,0 +1,103 @@
+"""
+Memory and fit time of the dense pd.get_dummies features against the sparse FeatureEncoder.
+
+The Finish_Predictor feature set is replicated `--scale` times with renamed drivers, teams
+and venues, so the one-hot width grows the way it does as more seasons are added.
+
+Usage:
+python benchmarks/bench_encoder.py [--scale 10] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Feature_Encoder import FeatureEncoder  # noqa: E402
+from Finish_Predictor import data_loader  # noqa: E402
+
+COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Year', 'Position_Qual', 'AirTemp', 'Humidity',
+           'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'RaceName', 'Finished']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+
+def load_features(scale):
+    """
+    Load the predictor features and replicate them with new category values.
+
+    Parameters:
+    scale (int): Number of copies, each with its own drivers, teams, venues and years
+
+    Returns:
+    pd.DataFrame: Features with the raw categorical columns
+    """
+    df = data_loader(os.path.join(REPO_DIR, 'data', 'f1_data_processed.csv'), COLUMNS, CATEGORICAL_COLS,
+                     encode=False)
+    df = df.drop(columns=['Finished'])
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        for col in ['DriverId', 'TeamId', 'RaceName']:
+            copy[col] = copy[col].astype(str) + f'_{i}'
+        copy['Year'] = copy['Year'] + 6 * i
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(func, repeat):
+    """
+    Median wall time of a function and its last result.
+
+    Parameters:
+    func (callable): Function without arguments
+    repeat (int): Number of runs
+
+    Returns:
+    tuple: Median seconds, result of the last run
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = load_features(args.scale)
+
+    dense_time, dense = timed(
+        lambda: pd.get_dummies(df, columns=CATEGORICAL_COLS, drop_first=True).astype(np.float32), args.repeat)
+    encoder = FeatureEncoder(CATEGORICAL_COLS)
+    sparse_time, matrix = timed(lambda: encoder.fit_transform(df), args.repeat)
+    codes_time, codes = timed(lambda: FeatureEncoder(CATEGORICAL_COLS, output='codes').fit_transform(df),
+                              args.repeat)
+
+    # Both encodings must hold the same values in the same column order
+    assert list(dense.columns) == encoder.get_feature_names()
+    assert np.array_equal(matrix.toarray(), dense.to_numpy())
+
+    dense_bytes = dense.memory_usage(deep=True).sum()
+    sparse_bytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    codes_bytes = codes.memory_usage(deep=True).sum()
+
+    print(f"{len(df)} rows, {matrix.shape[1]} encoded columns")
+    print(f"dense get_dummies:      {dense_time * 1000:8.1f} ms  {dense_bytes / 2**20:8.2f} MiB")
+    print(f"sparse FeatureEncoder:  {sparse_time * 1000:8.1f} ms  {sparse_bytes / 2**20:8.2f} MiB"
+          f"  ({dense_bytes / sparse_bytes:.1f}x smaller)")
+    print(f"codes FeatureEncoder:   {codes_time * 1000:8.1f} ms  {codes_bytes / 2**20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
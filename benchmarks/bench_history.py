@@ -0,0 +1,129 @@
+"""
+Pre-race history features of one grid: keyed lookup in the History_Store against scanning the results table.
+
+For every scale the synthetic generator builds a results table (scale x the 2018-2023 size), the
+store is built from all races but the last, and the features of the last grid are computed both
+ways: the store looks the 20 drivers up in its aggregate tables, the scan filters the whole
+history with boolean masks and groupbys as the notebooks do. Both must agree; the lookup time
+should stay flat while the scan grows with the history. Races sampled with --check are compared
+the same way against the features stored while building.
+
+Usage:
+python benchmarks/bench_history.py [--scales 1 4 16] [--repeat 20] [--check 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Data_Wrangling import NOT_FINISHED_CODES  # noqa: E402
+from History_Store import HISTORY_COLUMNS, HistoryStore, normalize_history  # noqa: E402
+from Rating_Engine import RACE_ID  # noqa: E402
+from Synthetic_Data import generate_raw  # noqa: E402
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def results_table(scale):
+    raw = generate_raw(scale)
+    raw['Finished'] = (~raw['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    return normalize_history(raw)
+
+
+def scan_features(history, race, window):
+    """
+    The features of HISTORY_COLUMNS for one grid, from the results of the races before it.
+    """
+    year, circuit = race['Year'].iloc[0], race['Circuit'].iloc[0]
+    drivers = history[history['DriverId'].isin(race['DriverId'])].sort_values('RaceDate', kind='stable')
+    by_driver = drivers.groupby('DriverId')
+    season = drivers[drivers['Year'] == year].groupby('DriverId')
+    at_circuit = drivers[drivers['Circuit'] == circuit].groupby('DriverId')
+    recent = drivers.groupby('DriverId').tail(window).groupby('DriverId')
+
+    teams = history[history['TeamId'].isin(race['TeamId'])]
+    teams = teams.groupby(RACE_ID + ['TeamId'], sort=False).agg(
+        RaceDate=('RaceDate', 'first'), Circuit=('Circuit', 'first'),
+        Position_Race=('Position_Race', 'mean'), Finished=('Finished', 'mean')).reset_index()
+    teams = teams.sort_values('RaceDate', kind='stable')
+    team_season = teams[teams['Year'] == year].groupby('TeamId')
+    team_recent = teams.groupby('TeamId').tail(window).groupby('TeamId')
+    team_circuit = teams[teams['Circuit'] == circuit].groupby('TeamId')
+
+    driver_ids, team_ids = race['DriverId'], race['TeamId']
+    return pd.DataFrame({
+        'DriverCareerRaces': driver_ids.map(by_driver.size()).fillna(0),
+        'DriverCareerAvgPosition': driver_ids.map(by_driver['Position_Race'].mean()),
+        'DriverCareerFinishRate': driver_ids.map(by_driver['Finished'].mean()),
+        'DriverSeasonRaces': driver_ids.map(season.size()).fillna(0),
+        'DriverSeasonAvgPosition': driver_ids.map(season['Position_Race'].mean()),
+        'DriverRecentAvgPosition': driver_ids.map(recent['Position_Race'].mean()),
+        'DriverRecentFinishRate': driver_ids.map(recent['Finished'].mean()),
+        'DriverCircuitRaces': driver_ids.map(at_circuit.size()).fillna(0),
+        'DriverCircuitAvgPosition': driver_ids.map(at_circuit['Position_Race'].mean()),
+        'DriverCircuitBestPosition': driver_ids.map(at_circuit['Position_Race'].min()),
+        'TeamSeasonAvgPosition': team_ids.map(team_season['Position_Race'].mean()),
+        'TeamRecentAvgPosition': team_ids.map(team_recent['Position_Race'].mean()),
+        'TeamCircuitRaces': team_ids.map(team_circuit.size()).fillna(0),
+        'TeamCircuitAvgPosition': team_ids.map(team_circuit['Position_Race'].mean()),
+        'TeamCircuitFinishRate': team_ids.map(team_circuit['Finished'].mean()),
+    }, index=race.index)[HISTORY_COLUMNS].astype(float)
+
+
+def check(results, store, n_races, seed=0):
+    # Stored features of sampled races against a scan of the races dated before each of them
+    races = results.drop_duplicates(RACE_ID)[RACE_ID + ['RaceDate']]
+    sample = races.sample(min(n_races, len(races)), random_state=seed)
+    for year, race_name, race_date in sample.itertuples(index=False):
+        race = results[(results['Year'] == year) & (results['RaceName'] == race_name)]
+        expected = scan_features(results[results['RaceDate'] < race_date], race, store.recent_races)
+        if not np.allclose(store.features(race).to_numpy(), expected.to_numpy(), equal_nan=True):
+            raise SystemExit(f"Stored features of {year} {race_name} differ from the scan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--check', type=int, default=20, help='races compared against the scan after building')
+    args = parser.parse_args()
+
+    print(f"{'history':>16} {'build':>10} {'lookup':>10} {'scan':>10}")
+    for scale in args.scales:
+        results = results_table(scale)
+        last = results['RaceDate'] == results['RaceDate'].max()
+        history, race = results[~last], results[last]
+
+        store = HistoryStore()
+        start = time.perf_counter()
+        store.process(history)
+        build = time.perf_counter() - start
+        if args.check:
+            check(history, store, args.check)
+
+        lookup = store.lookup(race['DriverId'], race['TeamId'], race['Circuit'].iloc[0], race['Year'].iloc[0])
+        scan = scan_features(history, race, store.recent_races)
+        if not np.allclose(lookup.to_numpy(), scan.to_numpy(), equal_nan=True):
+            raise SystemExit(f"Lookup differs from the scan at scale {scale}")
+
+        lookup_ms = best_of(lambda: store.lookup(race['DriverId'], race['TeamId'], race['Circuit'].iloc[0],
+                                                 race['Year'].iloc[0]), args.repeat)
+        scan_ms = best_of(lambda: scan_features(history, race, store.recent_races), args.repeat)
+        print(f"{len(history):>11,} rows {build:8.2f} s {lookup_ms:7.2f} ms {scan_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
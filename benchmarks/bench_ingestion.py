@@ -0,0 +1,53 @@
+"""
+Time prepare_f1_data end to end against the offline replay store, with no network access.
+
+Each run starts from an empty output folder and an empty session cache, so every event is
+fetched, parsed, merged and written again.
+
+Usage:
+python benchmarks/bench_ingestion.py [--store ./cache] [--start 2023] [--end 2023] [--n-jobs 1] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+import fastf1  # noqa: E402
+
+import Data_Preparation  # noqa: E402
+from Offline_Replay import DEFAULT_STORE, replay_mode  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    parser.add_argument('--start', type=int, default=2023)
+    parser.add_argument('--end', type=int, default=2023)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # FastF1 logs every cache hit, which would dominate the timings on small stores
+    fastf1.set_log_level(logging.ERROR)
+
+    timings = []
+    for run in range(args.repeat):
+        with tempfile.TemporaryDirectory() as out_dir, replay_mode(args.store) as server:
+            start = time.perf_counter()
+            Data_Preparation.prepare_f1_data(args.start, args.end, out_dir, n_jobs=args.n_jobs)
+            timings.append(time.perf_counter() - start)
+            print(f"run {run + 1}: {timings[-1]:.3f} s, Ergast stand-in served {dict(server.stats)}")
+
+    spread = statistics.stdev(timings) if len(timings) > 1 else 0.0
+    print(f"median {statistics.median(timings):.3f} s, min {min(timings):.3f} s, "
+          f"max {max(timings):.3f} s, stdev {spread:.3f} s over {len(timings)} runs")
+
+
+if __name__ == "__main__":
+    main()
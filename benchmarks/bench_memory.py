@@ -0,0 +1,75 @@
+"""
+Memory of a prepared dataset as parsed from CSV against its compact form, and the cost of grouping and joining on it.
+
+The per-column report of Columnar_Storage.memory_report is printed for the data file; with
+--scale the synthetic generator builds a larger raw table (scale x the 2018-2023 size) and the
+totals and timings are repeated on it.
+
+Usage:
+python benchmarks/bench_memory.py [--data data/f1_data_2018_2023.csv] [--scale 20] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Columnar_Storage import compact, memory_report, read_table  # noqa: E402
+from Synthetic_Data import generate_raw  # noqa: E402
+
+KEYS = ['Year', 'RaceName']
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def operations(df):
+    """
+    Grouping and joining as the pipeline does them: per-race aggregates and a per-driver join.
+    """
+    return {
+        'groupby race': lambda: df.groupby(KEYS, sort=False, observed=True)['GridPosition'].transform('min'),
+        'groupby driver': lambda: df.groupby('DriverId', sort=False, observed=True)['AirTemp'].mean(),
+        'merge on keys': lambda: df[KEYS + ['DriverId']].merge(
+            df[KEYS + ['DriverId', 'Points']].drop_duplicates(KEYS + ['DriverId']), on=KEYS + ['DriverId']),
+    }
+
+
+def compare(label, before, after, repeat):
+    total_before = before.memory_usage(deep=True).sum()
+    total_after = after.memory_usage(deep=True).sum()
+    print(f"{label}: {len(before):,} rows, {total_before / 1e6:.2f} MB -> {total_after / 1e6:.2f} MB "
+          f"({total_before / total_after:.1f}x less)")
+    for (name, plain), compacted in zip(operations(before).items(), operations(after).values()):
+        print(f"  {name:<15} {best_of(plain, repeat):8.2f} ms -> {best_of(compacted, repeat):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--data', default=os.path.join(REPO_DIR, 'data', 'f1_data_2018_2023.csv'))
+    parser.add_argument('--scale', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    before = read_table(args.data, compact_types=False)
+    after = read_table(args.data)
+    print(memory_report(before, after).to_string())
+    compare(os.path.basename(args.data), before, after, args.repeat)
+
+    if args.scale:
+        raw = generate_raw(args.scale)
+        compare(f'synthetic x{args.scale}', raw, compact(raw), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Model zoo of the Time_Predictor notebook: a serial cross_val_score loop against compare_models.
+
+Both runs use the same 5 folds of the Time_Predictor feature matrix, so the scores must agree;
+the parallel run only changes the wall time.
+
+Usage:
+python benchmarks/bench_model_comparison.py [--n-jobs -1] [--cv 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.model_selection import cross_val_score
+from xgboost import XGBRegressor
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Model_Comparison import compare_models, summarize  # noqa: E402
+from Time_Predictor import data_loader  # noqa: E402
+
+COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual', 'AirTemp',
+           'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year', 'RaceName',
+           'TotalLength', 'Time']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+
+def model_zoo():
+    """
+    The regressors compared in the Time_Predictor notebook, single-threaded so the serial loop is a fair baseline.
+
+    Returns:
+    dict: Model name -> unfitted estimator
+    """
+    return {
+        'Linear Regression': LinearRegression(),
+        'Ridge Regression': Ridge(alpha=1.0),
+        'Lasso Regression': Lasso(alpha=0.1),
+        'Random Forest': RandomForestRegressor(random_state=42, n_jobs=1),
+        'XGBoost': XGBRegressor(random_state=42, n_jobs=1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--cv', type=int, default=5)
+    args = parser.parse_args()
+
+    df = data_loader(os.path.join(REPO_DIR, 'data', 'f1_data_processed.csv'), COLUMNS, CATEGORICAL_COLS).dropna()
+    X, y = df.drop(columns=['Time']).astype(np.float64), df['Time']
+
+    # The notebook style: one model after another, each cross_val_score copying the matrix
+    start = time.perf_counter()
+    serial = {name: cross_val_score(model, X, y, cv=args.cv, scoring='neg_mean_absolute_error')
+              for name, model in model_zoo().items()}
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = compare_models(model_zoo(), X, y, ['neg_mean_absolute_error', 'r2'], cv=args.cv,
+                             n_jobs=args.n_jobs)
+    parallel_time = time.perf_counter() - start
+
+    for name, scores in serial.items():
+        assert np.allclose(scores, results.loc[results['Model'] == name, 'neg_mean_absolute_error'], rtol=1e-6)
+    workers = results['Worker'].nunique()
+    print(f"{len(results)} (model x fold) jobs on a {X.shape[0]} x {X.shape[1]} matrix")
+    print(f"serial cross_val_score loop:        {serial_time:8.1f} s")
+    print(f"compare_models, {workers} workers:        {parallel_time:8.1f} s  ({serial_time / parallel_time:.1f}x)")
+    print(summarize(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Time and memory profile of every pipeline stage on synthetic data at growing scales.
+
+Each scale multiplies the 2018-2023 data (seasons, drivers and events) with Synthetic_Data.
+The stages are the ones the real data goes through: update_times, the imputation,
+data_loader, get_dummies, train_model and evaluate_model. Times are the best of `--repeat`
+runs; the peak memory is traced in one extra run. Results are written as JSON, and two
+result files can be compared to flag regressions.
+
+Usage:
+python benchmarks/bench_pipeline.py run [--scales 1 10 100] [--stages ...] [--repeat 3] [--output FILE]
+python benchmarks/bench_pipeline.py compare BASE.json NEW.json [--threshold 0.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Data_Preparation import update_times  # noqa: E402
+from Data_Wrangling import RACE_KEYS, impute_qual, impute_time, race_codes, sort_by_race  # noqa: E402
+from Synthetic_Data import generate_raw, to_processed  # noqa: E402
+import Time_Predictor  # noqa: E402
+
+RESULTS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'results')
+COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual', 'AirTemp',
+           'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year', 'RaceName',
+           'TotalLength', 'Time']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+STAGES = ['generate', 'update_times', 'impute', 'data_loader', 'get_dummies', 'train_model', 'evaluate_model']
+
+
+def leader_gaps(raw):
+    """
+    Turn complete race times back into the leader gaps the FastF1 results hold.
+
+    Parameters:
+    raw (pd.DataFrame): Output of generate_raw
+
+    Returns:
+    pd.DataFrame: Year, RaceName and Time (timedelta), the leader keeping the full time
+    """
+    df = raw[RACE_KEYS].copy()
+    df['Time'] = pd.to_timedelta(raw['Time'], errors='coerce')
+    leader = df.groupby(RACE_KEYS, sort=False, observed=True)['Time'].transform('first')
+    df['Time'] = df['Time'].where(df['Time'] == leader, df['Time'] - leader)
+    return df
+
+
+def impute_input(raw):
+    """
+    The columns the imputation works on, as the wrangling chain prepares them.
+
+    Parameters:
+    raw (pd.DataFrame): Output of generate_raw
+
+    Returns:
+    pd.DataFrame: Race keys, Status, TotalLaps, Time and MinQualTime in seconds
+    """
+    df = raw[RACE_KEYS + ['Status', 'TotalLaps']].copy()
+    df['Time'] = pd.to_timedelta(raw['Time'], errors='coerce').dt.total_seconds()
+    qual = [pd.to_timedelta(raw[col], errors='coerce').dt.total_seconds() for col in ['Q1_Qual', 'Q2_Qual', 'Q3_Qual']]
+    df['MinQualTime'] = pd.concat(qual, axis=1).min(axis=1, skipna=True)
+    return df
+
+
+def impute(df):
+    """
+    The imputation of impute_times on prepared columns: sort by race, then both imputations on
+    one numbering of the races.
+
+    Parameters:
+    df (pd.DataFrame): Output of impute_input
+
+    Returns:
+    pd.DataFrame: The imputed rows, sorted by race
+    """
+    df = sort_by_race(df)
+    codes = race_codes(df)
+    return impute_time(impute_qual(df, RACE_KEYS, codes), RACE_KEYS, codes)
+
+
+def stage_inputs(scale, folder, stages, max_train_rows):
+    """
+    Build the inputs of the requested stages for one scale, outside the timed sections.
+
+    Parameters:
+    scale (int): Synthetic data scale
+    folder (str): Folder for the processed CSV
+    stages (list): Stages that will be measured
+    max_train_rows (int): Rows sampled for train_model and evaluate_model
+
+    Returns:
+    dict: Stage name -> (function, arguments, number of rows processed)
+    """
+    raw = generate_raw(scale)
+    path = os.path.join(folder, f'synthetic_{scale}.csv')
+    to_processed(raw).to_csv(path)
+    loaded = Time_Predictor.data_loader(path, COLUMNS, CATEGORICAL_COLS, encode=False)
+    inputs = {
+        'generate': (generate_raw, (scale,), len(raw)),
+        'data_loader': (Time_Predictor.data_loader, (path, COLUMNS, CATEGORICAL_COLS, False), len(raw)),
+        'get_dummies': (lambda: pd.get_dummies(loaded, columns=CATEGORICAL_COLS, drop_first=True), (), len(loaded)),
+    }
+    if 'update_times' in stages:
+        gaps = leader_gaps(raw)
+        inputs['update_times'] = (lambda: update_times(gaps.copy(), RACE_KEYS), (), len(raw))
+    if 'impute' in stages:
+        inputs['impute'] = (impute, (impute_input(raw),), len(raw))
+
+    if 'train_model' in stages or 'evaluate_model' in stages:
+        # The one-hot width still grows with the scale, only the rows are capped
+        sample = loaded.sample(min(max_train_rows, len(loaded)), random_state=42)
+        sample = pd.get_dummies(sample, columns=CATEGORICAL_COLS, drop_first=True)
+        X_train, X_test, y_train, y_test = Time_Predictor.split_data(sample, 'Time')
+        inputs['train_model'] = (Time_Predictor.train_model, (X_train, y_train), len(X_train))
+    if 'evaluate_model' in stages:
+        model = Time_Predictor.train_model(X_train, y_train)
+
+        def evaluate():
+            # evaluate_model prints its metrics, which is not part of the measurement
+            with contextlib.redirect_stdout(io.StringIO()):
+                Time_Predictor.evaluate_model(model, X_test, y_test)
+
+        inputs['evaluate_model'] = (evaluate, (), len(X_test))
+    return inputs
+
+
+def measure(func, args, repeat):
+    """
+    Best wall time of several runs, and the peak traced memory of one more run.
+
+    Parameters:
+    func (callable): The stage
+    args (tuple): Its arguments
+    repeat (int): Number of timed runs
+
+    Returns:
+    tuple: Seconds, peak MB
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 2 ** 20
+
+
+def run(args):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for scale in args.scales:
+            inputs = stage_inputs(scale, folder, args.stages, args.max_train_rows)
+            for stage in args.stages:
+                func, func_args, rows = inputs[stage]
+                seconds, peak_mb = measure(func, func_args, args.repeat)
+                results.append({'scale': scale, 'stage': stage, 'rows': rows,
+                                'seconds': round(seconds, 6), 'peak_mb': round(peak_mb, 3)})
+                print(f"scale {scale:>5}  {stage:<15} {rows:>9} rows  {seconds:9.4f} s  {peak_mb:9.1f} MB")
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                        'sklearn': sklearn.__version__},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved as '{output}'.")
+
+
+def compare(args):
+    frames = []
+    for path in (args.base, args.new):
+        with open(path, 'r', encoding='utf-8') as f:
+            frames.append(pd.DataFrame(json.load(f)['results']).set_index(['scale', 'stage']))
+    table = frames[0][['seconds', 'peak_mb']].join(frames[1][['seconds', 'peak_mb']], how='inner',
+                                                   lsuffix='_base', rsuffix='_new')
+    regressions = pd.Series(False, index=table.index)
+    for metric, floor in (('seconds', args.min_seconds), ('peak_mb', args.min_mb)):
+        ratio = table[f'{metric}_new'] / table[f'{metric}_base']
+        table[f'{metric}_ratio'] = ratio.round(3)
+        # Changes below the floor are noise, whatever the ratio
+        grown = table[f'{metric}_new'] - table[f'{metric}_base'] > floor
+        regressions |= (ratio > 1 + args.threshold) & grown
+    table['regression'] = regressions
+
+    print(table.to_string())
+    if regressions.any():
+        print(f"{regressions.sum()} regressions over {args.threshold:.0%}: {list(table.index[regressions])}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='profile the stages and save the results')
+    run_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    run_parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--max-train-rows', type=int, default=50_000,
+                            help='rows sampled for train_model and evaluate_model')
+    run_parser.add_argument('--output', default=None)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='relative growth flagged as regression')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.01)
+    compare_parser.add_argument('--min-mb', type=float, default=1.0)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of the session-results post-processing: the per-row path against postprocess_results.
+
+The per-row path is the one Data_Preparation used before: `Time.apply` per event, a
+CIRCUIT_LENGTHS dict hit per event and `ClassifiedPosition.apply` for the Finished flag.
+
+Usage:
+python benchmarks/bench_postprocess.py [--scale 10] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Data_Preparation import CIRCUIT_LENGTHS, postprocess_results  # noqa: E402
+
+
+def load_events(scale):
+    """
+    Rebuild raw per-event results (leader gaps, text qualifying times) from the 2018-2023 table.
+
+    Parameters:
+    scale (int): Number of copies of the six seasons, each shifted to new years
+
+    Returns:
+    pd.DataFrame: Raw merged results of all events
+    """
+    df = pd.read_csv(os.path.join(REPO_DIR, 'data', 'f1_data_2018_2023.csv'))
+    df = df.drop(columns=['LapLength'])
+    df['Time'] = pd.to_timedelta(df['Time'], errors='coerce')
+    leader = df.groupby(['Year', 'RaceName'], sort=False, observed=True)['Time'].transform('first')
+    df['Time'] = df['Time'].where(df['Time'] == leader, df['Time'] - leader)
+    df = pd.concat([df.assign(Year=df['Year'] + 6 * i) for i in range(scale)], ignore_index=True)
+    return df
+
+
+def per_row_postprocess(event):
+    """
+    The previous per-row post-processing of a single event.
+
+    Parameters:
+    event (pd.DataFrame): Raw merged results of one event
+
+    Returns:
+    pd.DataFrame: The processed event
+    """
+    if not pd.isnull(event.iloc[0]['Time']):
+        base_time = event.iloc[0]['Time']
+        event['Time'] = event['Time'].apply(
+            lambda x: base_time + x if pd.notnull(x) and x != base_time else x
+        )
+    circuit_id = event['CircuitId'].iloc[0].lower().replace(' ', '')
+    event['LapLength'] = CIRCUIT_LENGTHS.get(circuit_id, None)
+    event['Finished'] = event['ClassifiedPosition'].apply(lambda x: 0 if x in ['R', 'W', 'D'] else 1)
+    for col in ['Q1_Qual', 'Q2_Qual', 'Q3_Qual']:
+        event[f'{col}_Seconds'] = pd.to_timedelta(event[col], errors='coerce').dt.total_seconds()
+    return event
+
+
+def timed(func, repeat):
+    """
+    Median wall time of a function.
+
+    Parameters:
+    func (callable): Function without arguments
+    repeat (int): Number of runs
+
+    Returns:
+    float: Median seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = load_events(args.scale)
+    events = [event.copy() for _, event in df.groupby(['Year', 'RaceName'], sort=False, observed=True)]
+    print(f"{len(df)} rows, {len(events)} events")
+
+    per_row = timed(lambda: [per_row_postprocess(event.copy()) for event in events], args.repeat)
+    whole = timed(lambda: postprocess_results(df.copy()), args.repeat)
+
+    print(f"per-row path, per event:           {per_row * 1000:10.1f} ms")
+    print(f"postprocess_results, whole table:  {whole * 1000:10.1f} ms  ({per_row / whole:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
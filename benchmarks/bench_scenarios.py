@@ -0,0 +1,73 @@
+"""
+What-if sweep of the Finish_Predictor model: per-row predict_proba calls against run_scenarios.
+
+The sweep covers grid slot x driver x rainfall x track temperature for every race of the
+last season, scored with the forest and encoder the predictor trains.
+
+Usage:
+python benchmarks/bench_scenarios.py [--rows-per-call 2000] [--chunk-size 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Feature_Encoder import FeatureEncoder  # noqa: E402
+from Finish_Predictor import data_loader  # noqa: E402
+from Scenario_Engine import iter_scenarios, run_scenarios, score  # noqa: E402
+
+COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Year', 'Position_Qual', 'AirTemp', 'Humidity',
+           'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'RaceName', 'Finished']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows-per-call', type=int, default=2000,
+                        help='scenarios timed with the per-row loop, the full sweep time is extrapolated')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = data_loader(os.path.join(REPO_DIR, 'data', 'f1_data_processed.csv'), COLUMNS, CATEGORICAL_COLS,
+                     encode=False)
+    X, y = df.drop(columns=['Finished']), df['Finished']
+    encoder = FeatureEncoder(CATEGORICAL_COLS)
+    model = RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=1).fit(encoder.fit_transform(X), y)
+
+    # One base row per race of the last season, swept over the driver, grid, rain and track temperature
+    last_season = X[X['Year'] == X['Year'].max()]
+    base = last_season.groupby('RaceName', observed=True).head(1)
+    axes = {
+        'DriverId': last_season['DriverId'].unique(),
+        'GridPosition': np.arange(1, 21),
+        'Rainfall': [0, 1],
+        'TrackTemp': np.linspace(15, 55, 9),
+    }
+
+    start = time.perf_counter()
+    result = run_scenarios(model, base, axes, encoder=encoder, columns=['RaceName'], chunk_size=args.chunk_size)
+    batched = time.perf_counter() - start
+
+    # The notebook style: one predict_proba call per scenario
+    rows = next(iter_scenarios(base, axes, chunk_size=args.rows_per_call))
+    features = rows[encoder.numeric_cols_ + encoder.categorical_cols]
+    start = time.perf_counter()
+    per_row = [score(model, encoder.transform(features.iloc[[i]]))[0] for i in range(len(features))]
+    per_row_time = (time.perf_counter() - start) / len(features) * len(result)
+
+    assert np.allclose(per_row, result['Prediction'].to_numpy()[:len(per_row)])
+    print(f"{len(result)} scenarios ({len(base)} races)")
+    print(f"per-row predict_proba (extrapolated): {per_row_time:8.1f} s")
+    print(f"run_scenarios, chunks of {args.chunk_size}:  {batched:8.1f} s  ({per_row_time / batched:.0f}x)")
+    print(result.groupby(['RaceName', 'GridPosition'], observed=True)['Prediction'].mean().head())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Latency of the prediction server for a 20-driver grid, from one client and from concurrent clients.
+
+The Finished and Time forests are trained like the predictors do (ratings for the Finished one) and
+served in-process; every client posts the grid of the last race over a keep-alive connection
+and times the round trip. The server's own counters are printed at the end.
+
+Usage:
+python benchmarks/bench_server.py [--requests 500] [--clients 1 4 16] [--max-wait-ms 0]
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Feature_Encoder import FeatureEncoder  # noqa: E402
+import Finish_Predictor  # noqa: E402
+from Prediction_Server import PredictionServer  # noqa: E402
+from Rating_Engine import RatingEngine, checkpoint_path, load_rating_features  # noqa: E402
+import Time_Predictor  # noqa: E402
+
+DATA = os.path.join(REPO_DIR, 'data', 'f1_data_processed.csv')
+FINISH_COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Year', 'Position_Qual', 'AirTemp', 'Humidity',
+                  'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'RaceName', 'Finished']
+TIME_COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual', 'AirTemp',
+                'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year', 'RaceName',
+                'TotalLength', 'Time']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+
+def fit(loader, columns, target, estimator, ratings=False):
+    df = loader(DATA, columns, CATEGORICAL_COLS, encode=False)
+    if ratings:
+        df = df.join(load_rating_features(DATA))
+    encoder = FeatureEncoder(CATEGORICAL_COLS)
+    model = estimator.fit(encoder.fit_transform(df.drop(columns=[target])), df[target])
+    return model, encoder, df
+
+
+def client(url, body, n_requests, latencies):
+    host, port = url.split('//')[1].split(':')
+    connection = http.client.HTTPConnection(host, int(port))
+    headers = {'Content-Type': 'application/json'}
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        connection.request('POST', '/predict', body, headers)
+        response = connection.getresponse()
+        payload = response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(payload.decode('utf-8'))
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500, help='requests per client')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--max-wait-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    finish_model, finish_encoder, _ = fit(Finish_Predictor.data_loader, FINISH_COLUMNS, 'Finished',
+                                          RandomForestClassifier(random_state=42, n_jobs=1), ratings=True)
+    time_model, time_encoder, timed = fit(Time_Predictor.data_loader, TIME_COLUMNS, 'Time',
+                                          RandomForestRegressor(random_state=42, n_jobs=1))
+    ratings = RatingEngine.load(checkpoint_path(RatingEngine()))
+
+    # The grid of the last race, without the rating columns: the server fills them in
+    last = timed.tail(1)[['Year', 'RaceName']].iloc[0]
+    grid = timed[(timed['Year'] == last['Year']) & (timed['RaceName'] == last['RaceName'])]
+    grid = grid.drop(columns=['Time'])
+    grid = grid.reindex(np.resize(grid.index, 20))
+    body = json.dumps({'columns': list(grid.columns), 'data': grid.to_numpy().tolist()}, default=str)
+
+    server = PredictionServer({'finished': (finish_model, finish_encoder), 'time': (time_model, time_encoder)},
+                              ratings, port=0, max_wait=args.max_wait_ms / 1000).start()
+    client(server.url, body, 20, [])  # warm-up
+
+    for n_clients in args.clients:
+        latencies = []
+        threads = [threading.Thread(target=client, args=(server.url, body, args.requests, latencies))
+                   for _ in range(n_clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        ms = np.array(latencies) * 1000
+        print(f"{n_clients:>3} clients: p50 {np.percentile(ms, 50):6.2f} ms  p99 {np.percentile(ms, 99):6.2f} ms  "
+              f"max {ms.max():6.2f} ms  {len(ms) / elapsed:8.1f} grids/s")
+
+    print(json.dumps(server.stats.snapshot(), indent=2))
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Monte Carlo race simulation: a per-race Python loop against the vectorized simulate_race.
+
+The grid is the last race of the processed data, scored with the Finish and Time forests
+the predictors train; the race-time spread is the Time model's residual spread on its test split.
+
+Usage:
+python benchmarks/bench_simulator.py [--n-sims 1000000] [--loop-sims 20000] [--n-jobs 1]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+from Feature_Encoder import FeatureEncoder  # noqa: E402
+import Finish_Predictor  # noqa: E402
+from Race_Simulator import model_inputs, residual_std, simulate_grid  # noqa: E402
+import Time_Predictor  # noqa: E402
+
+DATA = os.path.join(REPO_DIR, 'data', 'f1_data_processed.csv')
+FINISH_COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Year', 'Position_Qual', 'AirTemp', 'Humidity',
+                  'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'RaceName', 'Finished']
+TIME_COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Position_Qual', 'Q1_Qual', 'Q2_Qual', 'Q3_Qual', 'AirTemp',
+                'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year', 'RaceName',
+                'TotalLength', 'Time']
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+
+
+def loop_simulation(dnf_prob, time_mean, time_std, n_sims, seed=0):
+    """
+    Reference implementation: one race at a time, one draw per driver.
+    """
+    rng = np.random.default_rng(seed)
+    n_drivers = len(time_mean)
+    counts = np.zeros((n_drivers, n_drivers), dtype=np.int64)
+    for _ in range(n_sims):
+        keys = []
+        for driver in range(n_drivers):
+            if rng.random() < dnf_prob[driver]:
+                keys.append(1e6 + rng.random())
+            else:
+                keys.append(time_mean[driver] + time_std * rng.standard_normal())
+        for position, driver in enumerate(np.argsort(keys)):
+            counts[driver, position] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-sims', type=int, default=1_000_000)
+    parser.add_argument('--loop-sims', type=int, default=20_000,
+                        help='races timed with the per-race loop, its rate is extrapolated')
+    parser.add_argument('--n-jobs', type=int, default=1)
+    args = parser.parse_args()
+
+    finish = Finish_Predictor.data_loader(DATA, FINISH_COLUMNS, CATEGORICAL_COLS, encode=False)
+    X, y = finish.drop(columns=['Finished']), finish['Finished']
+    finish_encoder = FeatureEncoder(CATEGORICAL_COLS)
+    finish_model = RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=1)
+    finish_model.fit(finish_encoder.fit_transform(X), y)
+
+    timed = Time_Predictor.data_loader(DATA, TIME_COLUMNS, CATEGORICAL_COLS, encode=False)
+    X_train, X_test, y_train, y_test = Time_Predictor.split_data(timed, 'Time')
+    time_encoder = FeatureEncoder(CATEGORICAL_COLS)
+    time_model = RandomForestRegressor(n_estimators=50, random_state=42, n_jobs=1)
+    time_model.fit(time_encoder.fit_transform(X_train), y_train)
+    spread = residual_std(time_model, X_test, y_test, time_encoder)
+
+    # The last race of the data, drivers with a race time (the Time loader drops the others)
+    last = timed.tail(1)[['Year', 'RaceName']].iloc[0]
+    grid = timed[(timed['Year'] == last['Year']) & (timed['RaceName'] == last['RaceName'])]
+    print(f"{last['Year']} {last['RaceName']}: {len(grid)} drivers, race-time spread {spread:.1f} s")
+
+    start = time.perf_counter()
+    result = simulate_grid(grid, finish_model, time_model, spread, finish_encoder, time_encoder,
+                           n_sims=args.n_sims, seed=0, n_jobs=args.n_jobs)
+    vectorized = time.perf_counter() - start
+
+    dnf_prob = 1.0 - model_inputs(finish_model, grid, finish_encoder)
+    time_mean = model_inputs(time_model, grid, time_encoder)
+    start = time.perf_counter()
+    loop_simulation(dnf_prob, time_mean, spread, args.loop_sims)
+    loop = time.perf_counter() - start
+
+    print(result.iloc[:, :9].round(3).to_string(index=False))
+    print(f"per-race loop:  {args.loop_sims / loop:12,.0f} races/s")
+    print(f"simulate_race:  {args.n_sims / vectorized:12,.0f} races/s ({args.n_sims:,} races in {vectorized:.2f} s, "
+          f"n_jobs={args.n_jobs}, model scoring included)")
+
+
+if __name__ == "__main__":
+    main()
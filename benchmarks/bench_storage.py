@@ -0,0 +1,169 @@
+"""
+Benchmark loading predictor columns from the CSVs in data/ against typed Parquet and Arrow IPC copies.
+
+Every variant runs in a fresh interpreter so peak RSS is not polluted by earlier loads.
+
+Usage:
+python benchmarks/bench_storage.py [--repeat 5]
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_DIR)
+
+# Columns used by Time_Predictor.main, the wider of the two predictor column sets
+PREDICTOR_COLUMNS = ['DriverId', 'TeamId', 'GridPosition', 'Position_Qual', 'Q1_Qual',
+                     'Q2_Qual', 'Q3_Qual', 'AirTemp', 'Humidity', 'Pressure',
+                     'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed', 'Year',
+                     'RaceName', 'Time']
+
+VARIANTS = ['csv_full', 'csv_usecols', 'parquet', 'arrow']
+
+
+def _reset_peak_rss():
+    """
+    Reset the kernel's peak RSS counter (Linux only) so the import cost is not counted.
+
+    Returns:
+    bool: True if the counter could be reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb():
+    """
+    Read the peak RSS of the current process.
+
+    Returns:
+    int: Peak resident set size in KiB
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _current_rss_kb():
+    """
+    Read the current RSS of the current process.
+
+    Returns:
+    int: Resident set size in KiB
+    """
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def run_worker(path, variant, columns, repeat):
+    """
+    Time a single load variant and report peak RSS, run inside a child process.
+
+    Parameters:
+    path (str): The file to load
+    variant (str): One of VARIANTS
+    columns (list): Columns to load
+    repeat (int): Number of timed loads
+    """
+    import pandas as pd
+    import pyarrow  # noqa: F401  (imported up front so it is not part of the load cost)
+    from Columnar_Storage import csv_separator, read_table
+
+    def load():
+        if variant == 'csv_full':
+            # The current predictor path: parse everything, then select
+            df = pd.read_csv(path, sep=csv_separator(path))[columns]
+            for col in ['Q1_Qual', 'Q2_Qual', 'Q3_Qual']:
+                if col in df.columns:
+                    df[col] = pd.to_timedelta(df[col], errors='coerce')
+            return df
+        return read_table(path, columns)
+
+    # Warm-up load so lazily loaded reader code is not counted as data memory
+    load()
+    _reset_peak_rss()
+    rss_before = _current_rss_kb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = load()
+        timings.append(time.perf_counter() - start)
+        del df
+    rss_after = _peak_rss_kb()
+    print(json.dumps({'median_s': statistics.median(timings),
+                      'peak_rss_delta_kb': rss_after - rss_before}))
+
+
+def bench_file(csv_path, work_dir, repeat):
+    """
+    Benchmark all variants for one CSV file.
+
+    Parameters:
+    csv_path (str): The CSV file from data/
+    work_dir (str): Folder for the temporary columnar copies
+    repeat (int): Number of timed loads per variant
+
+    Returns:
+    list: One result dict per variant
+    """
+    from Columnar_Storage import convert_csv, read_table
+
+    local_csv = os.path.join(work_dir, os.path.basename(csv_path))
+    shutil.copy(csv_path, local_csv)
+    paths = {'csv_full': local_csv, 'csv_usecols': local_csv,
+             'parquet': convert_csv(local_csv, 'parquet'), 'arrow': convert_csv(local_csv, 'arrow')}
+
+    available = list(read_table(paths['parquet']).columns)
+    columns = [col for col in PREDICTOR_COLUMNS if col in available]
+
+    results = []
+    for variant in VARIANTS:
+        out = subprocess.run([sys.executable, __file__, '--worker', paths[variant], variant,
+                              '--columns', json.dumps(columns), '--repeat', str(repeat)],
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        result.update({'file': os.path.basename(csv_path), 'variant': variant,
+                       'size_kb': os.path.getsize(paths[variant]) // 1024})
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--worker', nargs=2, metavar=('PATH', 'VARIANT'))
+    parser.add_argument('--columns', default=json.dumps(PREDICTOR_COLUMNS))
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], json.loads(args.columns), args.repeat)
+        return
+
+    print(f"{'file':<58} {'variant':<12} {'size_kb':>8} {'median_ms':>10} {'peak_rss_kb':>12}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for csv_path in sorted(glob.glob(os.path.join(REPO_DIR, 'data', '*.csv'))):
+            for r in bench_file(csv_path, work_dir, args.repeat):
+                print(f"{r['file']:<58} {r['variant']:<12} {r['size_kb']:>8} "
+                      f"{r['median_s'] * 1000:>10.2f} {r['peak_rss_delta_kb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
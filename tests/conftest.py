@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The pipeline modules live at the repo root and are imported by name
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error
+
+from Backtest import IncrementalRidge, backtest
+
+
+def race_data(races=16, drivers=10, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(races * drivers, 4)), columns=['a', 'b', 'c', 'd'])
+    y = pd.Series(X.to_numpy() @ [1.0, -2.0, 0.5, 0.0] + rng.normal(scale=0.1, size=len(X)))
+    dates = pd.Series(np.repeat(pd.date_range('2023-03-05', periods=races, freq='14D'), drivers))
+    # Shuffle the rows so the backtest has to order them by race date itself
+    order = rng.permutation(len(X))
+    return X.iloc[order], y.iloc[order], dates.iloc[order]
+
+
+def test_incremental_ridge_matches_a_refit_per_race():
+    X, y, dates = race_data()
+    results = backtest(IncrementalRidge(alpha=1.0), X, y, dates, {'MAE': mean_absolute_error}, min_train_races=5)
+
+    order = np.argsort(dates.to_numpy(), kind='stable')
+    X, y, dates = X.iloc[order], y.iloc[order], dates.iloc[order]
+    expected = []
+    for date in sorted(dates.unique())[5:]:
+        train, test = (dates < date).to_numpy(), (dates == date).to_numpy()
+        model = Ridge(alpha=1.0).fit(X[train], y[train])
+        expected.append(mean_absolute_error(y[test], model.predict(X[test])))
+
+    assert (results['Strategy'] == 'partial_fit').all()
+    np.testing.assert_allclose(results['MAE'], expected)
+
+
+def test_grown_forest_is_refitted_at_its_tree_cap():
+    X, y, dates = race_data()
+    results = backtest(RandomForestRegressor(n_estimators=5, random_state=0), X, y, dates,
+                       {'MAE': mean_absolute_error}, min_train_races=2, trees_per_race=4, max_trees=15)
+
+    # The forest grows 5 -> 9 -> 13, then restarts from 5 trees on the current window
+    assert results['Trees'].tolist()[:5] == [5, 9, 13, 5, 9]
+    assert results['Strategy'].tolist()[:5] == ['grow', 'grow', 'grow', 'refit', 'grow']
+    assert results['Trees'].max() <= 15
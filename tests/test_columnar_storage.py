@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Columnar_Storage import compact, read_table, write_columnar
+
+
+@pytest.mark.parametrize('suffix', ['parquet', 'arrow'])
+def test_float64_columns_keep_their_precision_on_disk(tmp_path, suffix):
+    df = pd.DataFrame({'AirTemp': [21.473509933774835, 19.1, np.nan], 'DriverId': ['a', 'b', 'a']})
+    path = str(tmp_path / f'data.{suffix}')
+    write_columnar(df, path)
+
+    stored = read_table(path, compact_types=False)
+    assert stored['AirTemp'].dtype == 'float64'
+    np.testing.assert_array_equal(stored['AirTemp'].to_numpy(), df['AirTemp'].to_numpy())
+    # Loading into memory still downcasts
+    assert read_table(path)['AirTemp'].dtype == 'float32'
+
+
+def test_compact_without_float_downcast_is_lossless():
+    df = pd.DataFrame({'AirTemp': [21.473509933774835], 'GridPosition': [3]})
+    kept = compact(df, downcast_floats=False)
+    assert kept['AirTemp'].dtype == 'float64' and kept['AirTemp'].iloc[0] == df['AirTemp'].iloc[0]
+    assert compact(df)['AirTemp'].dtype == 'float32'
+
+
+def processed_frame():
+    return pd.DataFrame({
+        'DriverId': ['hamilton', 'verstappen', 'hamilton', 'norris'],
+        'RaceName': ['Bahrain Grand Prix'] * 2 + ['Monaco Grand Prix'] * 2,
+        'RaceDate': ['2023-03-05', '2023-03-05', '2023-05-28', '2023-05-28'],
+        'Time': ['0 days 01:33:56.736000', '0 days 01:33:58.123000', None, '0 days 01:48:51.980000'],
+        'GridPosition': [1, 2, 3, 20],
+        'Position_Qual': [1.0, 2.0, np.nan, 4.0],
+        'AirTemp': [27.5, 27.5, 21.25, 21.0],
+    })
+
+
+@pytest.mark.parametrize('suffix', ['parquet', 'arrow', 'csv'])
+def test_round_trip_keeps_types_values_and_projection(tmp_path, suffix):
+    csv_path = str(tmp_path / 'data.csv')
+    processed_frame().to_csv(csv_path, index=False)
+    path = csv_path if suffix == 'csv' else str(tmp_path / f'data.{suffix}')
+    if suffix != 'csv':
+        write_columnar(pd.read_csv(csv_path), path)
+
+    df = read_table(path)
+    assert isinstance(df['DriverId'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['RaceName'].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df['RaceDate'])
+    assert pd.api.types.is_timedelta64_dtype(df['Time'])
+    assert df['GridPosition'].dtype == 'int8'
+    assert df['Position_Qual'].dtype == 'float32'
+    assert df['AirTemp'].dtype == 'float32'
+
+    # The values are those the loaders used to get from pd.read_csv
+    original = pd.read_csv(csv_path)
+    assert df['DriverId'].astype(str).tolist() == original['DriverId'].tolist()
+    assert (df['RaceDate'] == pd.to_datetime(original['RaceDate'])).all()
+    pd.testing.assert_series_equal(df['Time'], pd.to_timedelta(original['Time']), check_dtype=False)
+    np.testing.assert_array_equal(df['Position_Qual'], original['Position_Qual'].astype('float32'))
+
+    projected = read_table(path, ['AirTemp', 'DriverId'])
+    assert projected.columns.tolist() == ['AirTemp', 'DriverId']
+    pd.testing.assert_frame_equal(projected, df[['AirTemp', 'DriverId']])
@@ -0,0 +1,82 @@
+import multiprocessing
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import Data_Preparation
+from Offline_Replay import DEFAULT_STORE, replay_mode
+
+EVENTS = [(2023, 'British Grand Prix'), (2023, 'Abu Dhabi Grand Prix')]
+
+
+def raw_events():
+    # Leader time then gaps, as the extractors return them, for three races of one table
+    return pd.DataFrame({
+        'Year': [2023] * 7,
+        'RaceName': ['Australian Grand Prix'] * 3 + ['Monaco Grand Prix'] * 2 + ['Testing Grand Prix'] * 2,
+        'CircuitId': ['melbourne'] * 3 + ['monaco'] * 2 + ['nowhere'] * 2,
+        'Time': pd.to_timedelta(['01:32:38.371', '00:00:00.179', None, None, '00:00:27.921',
+                                 '01:40:00', '00:00:05']),
+        'ClassifiedPosition': ['1', '2', 'R', '1', 'W', '1', 'D'],
+        'Q1_Qual': ['0 days 00:01:17.384000', None, '0 days 00:01:18.001000', None, None, None, None],
+        'Q2_Qual': [None] * 7,
+        'Q3_Qual': [None] * 7,
+    })
+
+
+def per_event_postprocess(event):
+    # The per-row path Data_Preparation ran on every event before postprocess_results
+    if not pd.isnull(event.iloc[0]['Time']):
+        base_time = event.iloc[0]['Time']
+        event['Time'] = event['Time'].apply(lambda x: base_time + x if pd.notnull(x) and x != base_time else x)
+    event['LapLength'] = Data_Preparation.CIRCUIT_LENGTHS.get(event['CircuitId'].iloc[0], None)
+    event['Finished'] = event['ClassifiedPosition'].apply(lambda x: 0 if x in ['R', 'W', 'D'] else 1)
+    for col in ['Q1_Qual', 'Q2_Qual', 'Q3_Qual']:
+        event[f'{col}_Seconds'] = pd.to_timedelta(event[col], errors='coerce').dt.total_seconds()
+    return event
+
+
+def test_postprocess_matches_the_per_event_path():
+    raw = raw_events()
+    expected = pd.concat([per_event_postprocess(event.copy()) for _, event in raw.groupby('RaceName', sort=False)])
+    result = Data_Preparation.postprocess_results(raw.copy())
+
+    pd.testing.assert_series_equal(result['Time'], expected['Time'])
+    np.testing.assert_array_equal(result['LapLength'], expected['LapLength'].astype(float))
+    pd.testing.assert_series_equal(result['Finished'], expected['Finished'], check_dtype=False)
+    assert (result['DNF'] == 1 - expected['Finished']).all()
+    for col in ['Q1_Qual_Seconds', 'Q2_Qual_Seconds', 'Q3_Qual_Seconds']:
+        pd.testing.assert_series_equal(result[col], expected[col])
+
+
+def test_spawned_workers_prepare_events_like_the_parent(tmp_path):
+    store = tmp_path / 'cache'
+    shutil.copytree(DEFAULT_STORE, store, ignore=shutil.ignore_patterns('ergast'))
+    with replay_mode(str(store)):
+        serial = {idx: (frame, error) for idx, frame, error, _ in Data_Preparation.iter_event_frames(EVENTS)}
+        # Spawned workers start from a fresh import, the replay setup only reaches them through the pool
+        spawned = {idx: (frame, error) for idx, frame, error, _ in Data_Preparation.iter_event_frames(
+            EVENTS, n_jobs=2, mp_context=multiprocessing.get_context('spawn'))}
+
+    assert sorted(spawned) == [0, 1]
+    for idx in serial:
+        assert serial[idx][1] is None and spawned[idx][1] is None
+        pd.testing.assert_frame_equal(spawned[idx][0], serial[idx][0])
+
+
+def test_prepared_files_keep_full_float_precision(tmp_path):
+    store = tmp_path / 'cache'
+    shutil.copytree(DEFAULT_STORE, store, ignore=shutil.ignore_patterns('ergast'))
+    with replay_mode(str(store)):
+        frames = [frame for _, frame, _, _ in Data_Preparation.iter_event_frames(EVENTS)]
+        Data_Preparation.prepare_f1_data(2023, 2023, str(tmp_path))
+
+    air_temp = np.concatenate([frame['AirTemp'].to_numpy(dtype=float) for frame in frames])
+    # Session means are not representable in float32, the files must hold them exactly
+    assert (air_temp.astype(np.float32) != air_temp).any()
+    for name in ('f1_data_2023_2023.csv', 'f1_data_2023_2023.parquet'):
+        path = tmp_path / name
+        written = pd.read_csv(path, float_precision='round_trip') if name.endswith('.csv') else pd.read_parquet(path)
+        assert written['AirTemp'].dtype == 'float64'
+        np.testing.assert_array_equal(np.sort(written['AirTemp'].to_numpy()), np.sort(air_temp))
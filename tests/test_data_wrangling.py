@@ -0,0 +1,50 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from Columnar_Storage import compact
+from Data_Wrangling import RACE_KEYS, impute_qual, impute_time, parse_laps_behind, wrangle
+from Synthetic_Data import generate_raw
+
+
+def race_frame():
+    raw = generate_raw(1)
+    df = raw[RACE_KEYS + ['Status', 'TotalLaps']].copy()
+    df['Time'] = pd.to_timedelta(raw['Time'], errors='coerce').dt.total_seconds()
+    df['MinQualTime'] = pd.to_timedelta(raw['Q1_Qual'], errors='coerce').dt.total_seconds()
+    # Shuffled, so the races are not contiguous, and one race without any qualifying time
+    df = df.sample(frac=1, random_state=0).reset_index(drop=True)
+    first_race = (df['Year'] == df['Year'].iloc[0]) & (df['RaceName'] == df['RaceName'].iloc[0])
+    df.loc[first_race, 'MinQualTime'] = np.nan
+    return df
+
+
+def test_imputation_matches_the_groupby_transforms():
+    df = race_frame()
+    grouped = df.groupby(RACE_KEYS, sort=False)
+
+    expected_qual = df['MinQualTime'].fillna(grouped['MinQualTime'].transform('max') * 1.05)
+    pd.testing.assert_series_equal(impute_qual(df)['MinQualTime'], expected_qual)
+
+    max_time, min_time = grouped['Time'].transform('max'), grouped['Time'].transform('min')
+    n_laps = parse_laps_behind(df['Status'])
+    imputed = (max_time / grouped['TotalLaps'].transform('first') * n_laps + min_time).clip(lower=max_time)
+    expected_time = df['Time'].where(df['Time'].notna() | n_laps.isna(), imputed)
+    assert n_laps.notna().any()
+    pd.testing.assert_series_equal(impute_time(df)['Time'], expected_time.rename('Time'))
+
+
+def test_compacted_frame_wrangles_like_the_plain_one():
+    raw = generate_raw(1)
+    expected = wrangle(raw)
+    with warnings.catch_warnings():
+        # Grouping categorical keys without observed=True warns on pandas 2.1+
+        warnings.simplefilter('error', FutureWarning)
+        result = wrangle(compact(raw))
+    keys = ['Year', 'RaceName', 'DriverId']
+    values = ['GridPosition', 'Position_Race', 'TotalLength', 'MaxQualSpeed', 'Time', 'Speed', 'Finished']
+    pd.testing.assert_frame_equal(result[keys].astype(str).reset_index(drop=True),
+                                  expected[keys].astype(str).reset_index(drop=True))
+    pd.testing.assert_frame_equal(result[values].astype(float).reset_index(drop=True),
+                                  expected[values].astype(float).reset_index(drop=True), rtol=1e-5)
@@ -0,0 +1,132 @@
+import importlib
+import linecache
+import sys
+
+import pandas as pd
+
+from Dataset_Graph import DatasetGraph, Source, Step
+
+HELPERS_V1 = '''
+def scale(values):
+    return values * 2
+
+
+def scaled(df):
+    return df.assign(Value=scale(df['Value']))
+'''
+
+
+def write_module(path, source):
+    path.write_text(source)
+    linecache.checkcache(str(path))
+
+
+def load_steps(tmp_path, monkeypatch, source):
+    write_module(tmp_path / 'graph_steps.py', source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    if 'graph_steps' in sys.modules:
+        return importlib.reload(sys.modules['graph_steps'])
+    return importlib.import_module('graph_steps')
+
+
+def build_graph(tmp_path, module):
+    graph = DatasetGraph(str(tmp_path / 'cache'))
+    graph.add('raw', Source(str(tmp_path / 'raw.csv')))
+    graph.add('scaled', Step(module.scaled, ['raw'], helpers=[module.scale]))
+    return graph
+
+
+def test_cached_until_a_helper_changes(tmp_path, monkeypatch):
+    pd.DataFrame({'Value': [1, 2, 3]}).to_csv(tmp_path / 'raw.csv', index=False)
+    module = load_steps(tmp_path, monkeypatch, HELPERS_V1)
+
+    graph = build_graph(tmp_path, module)
+    assert graph.load('scaled')['Value'].tolist() == [2, 4, 6]
+    assert graph.stats['built'] == 1
+
+    graph = build_graph(tmp_path, module)
+    assert graph.load('scaled')['Value'].tolist() == [2, 4, 6]
+    assert graph.stats == {'cached': 1}
+
+    # Only the helper changes, the step function keeps its source
+    module = load_steps(tmp_path, monkeypatch, HELPERS_V1.replace('values * 2', 'values * 3'))
+    graph = build_graph(tmp_path, module)
+    assert graph.load('scaled')['Value'].tolist() == [3, 6, 9]
+    assert graph.stats['built'] == 1
+
+
+def test_changed_source_rebuilds_downstream_only_on_new_content(tmp_path, monkeypatch):
+    raw = tmp_path / 'raw.csv'
+    pd.DataFrame({'Value': [1, 2, 3], 'Other': [0, 0, 0]}).to_csv(raw, index=False)
+    module = load_steps(tmp_path, monkeypatch, HELPERS_V1)
+
+    def graph_with_projection():
+        graph = build_graph(tmp_path, module)
+        graph.add('values', Step(lambda df: df[['Value']], ['raw']))
+        graph.add('projected', Step(module.scaled, ['values'], helpers=[module.scale]))
+        return graph
+
+    graph_with_projection().load('projected')
+    # The source changes in a column the projection drops: the projection runs again, its
+    # output is unchanged and the step after it stays cached
+    pd.DataFrame({'Value': [1, 2, 3], 'Other': [1, 1, 1]}).to_csv(raw, index=False)
+    graph = graph_with_projection()
+    graph.load('projected')
+    assert graph.stats == {'built': 1, 'deduplicated': 1, 'cached': 1}
+
+
+def test_byte_identical_exports_are_written_once(tmp_path, monkeypatch):
+    pd.DataFrame({'Value': [1, 2, 3]}).to_csv(tmp_path / 'raw.csv', index=False)
+    module = load_steps(tmp_path, monkeypatch, HELPERS_V1)
+    graph = build_graph(tmp_path, module)
+    exports = [('scaled', str(tmp_path / 'out.csv'), ','),
+               ('scaled', str(tmp_path / 'out_semi-colon.csv'), ';'),
+               ('scaled', str(tmp_path / 'twin_semi-colon.csv'), ';')]
+
+    outcome = graph.materialize(exports)
+    assert outcome[str(tmp_path / 'out.csv')] == 'written'
+    assert outcome[str(tmp_path / 'twin_semi-colon.csv')].startswith('alias of')
+    assert not (tmp_path / 'twin_semi-colon.csv').exists()
+
+    outcome = build_graph(tmp_path, module).materialize(exports)
+    assert outcome[str(tmp_path / 'out.csv')] == 'unchanged'
+
+
+CONSTANTS_V1 = '''
+FACTOR = 2
+
+
+def scaled(df, offset=0):
+    return df.assign(Value=df['Value'] * FACTOR + offset)
+'''
+
+
+def test_cached_until_a_constant_or_default_changes(tmp_path, monkeypatch):
+    pd.DataFrame({'Value': [1, 2, 3]}).to_csv(tmp_path / 'raw.csv', index=False)
+
+    def load(source):
+        module = load_steps(tmp_path, monkeypatch, source)
+        graph = DatasetGraph(str(tmp_path / 'cache'))
+        graph.add('raw', Source(str(tmp_path / 'raw.csv')))
+        graph.add('scaled', Step(module.scaled, ['raw']))
+        return graph, graph.load('scaled')['Value'].tolist()
+
+    graph, values = load(CONSTANTS_V1)
+    assert values == [2, 4, 6] and graph.stats['built'] == 1
+    graph, values = load(CONSTANTS_V1)
+    assert graph.stats == {'cached': 1}
+
+    # The function source is unchanged in both edits, only the values it reads differ
+    graph, values = load(CONSTANTS_V1.replace('FACTOR = 2', 'FACTOR = 3'))
+    assert values == [3, 6, 9] and graph.stats['built'] == 1
+    graph, values = load(CONSTANTS_V1.replace('FACTOR = 2', 'FACTOR = 3').replace('offset=0', 'offset=1'))
+    assert values == [4, 7, 10] and graph.stats['built'] == 1
+
+
+def test_wrangling_steps_are_keyed_by_their_column_lists(monkeypatch):
+    import Data_Wrangling
+
+    step = Step(Data_Wrangling.clean_results, ['raw'])
+    key = step.key(['input'])
+    monkeypatch.setattr(Data_Wrangling, 'COLUMNS_TO_DROP', Data_Wrangling.COLUMNS_TO_DROP[:-1])
+    assert step.key(['input']) != key
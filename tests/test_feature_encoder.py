@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from Feature_Encoder import FeatureEncoder
+
+CATEGORICAL_COLS = ['DriverId', 'TeamId']
+
+
+def features():
+    return pd.DataFrame({
+        'DriverId': ['verstappen', 'hamilton', 'norris', 'hamilton', 'alonso'],
+        'TeamId': ['red_bull', 'mercedes', 'mclaren', 'mercedes', 'aston_martin'],
+        'GridPosition': [1.0, 3.0, 2.0, 5.0, 4.0],
+    })
+
+
+def test_training_rows_encode_like_get_dummies():
+    df = features()
+    encoder = FeatureEncoder(CATEGORICAL_COLS)
+    encoded = encoder.fit_transform(df)
+
+    # The predictors encoded with get_dummies(drop_first=True) before the encoder
+    expected = pd.get_dummies(df, columns=CATEGORICAL_COLS, drop_first=True, dtype=np.float32)
+    assert encoder.get_feature_names() == expected.columns.tolist()
+    np.testing.assert_array_equal(encoded.toarray(), expected.to_numpy())
+
+
+def test_reloaded_encoder_keeps_the_training_columns(tmp_path):
+    encoder = FeatureEncoder(CATEGORICAL_COLS).fit(features())
+    new_race = pd.DataFrame({
+        'DriverId': ['piastri', 'hamilton'],
+        'TeamId': ['mclaren', 'ferrari'],
+        'GridPosition': [7.0, 1.0],
+    })
+    path = str(tmp_path / 'encoder.pkl')
+    encoder.save(path)
+    reloaded = FeatureEncoder.load(path)
+
+    encoded = reloaded.transform(new_race)
+    assert encoded.shape == (2, len(encoder.get_feature_names()))
+    np.testing.assert_array_equal(encoded.toarray(), encoder.transform(new_race).toarray())
+    # Unseen categories get no active column, seen ones their training column
+    row = dict(zip(reloaded.get_feature_names(), encoded.toarray()[1]))
+    assert row['DriverId_hamilton'] == 1 and row['GridPosition'] == 1
+    assert sum(value for name, value in row.items() if name.startswith('TeamId_')) == 0
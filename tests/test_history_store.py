@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from Data_Wrangling import NOT_FINISHED_CODES
+from History_Store import HISTORY_COLUMNS, HistoryStore, history_features, normalize_history
+from Rating_Engine import RACE_ID, RESULT_COLUMNS
+from Synthetic_Data import generate_raw
+
+
+def raw_results(seed=0):
+    raw = generate_raw(1, seed=seed)
+    raw['Finished'] = (~raw['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    return raw[RESULT_COLUMNS + ['CircuitId']]
+
+
+def race_order(results):
+    # Position of every row's race in date order
+    races = results.drop_duplicates(RACE_ID).sort_values('RaceDate', kind='stable')
+    order = pd.Series(np.arange(len(races)), index=pd.MultiIndex.from_frame(races[RACE_ID]))
+    return order.reindex(pd.MultiIndex.from_frame(results[RACE_ID])).to_numpy()
+
+
+def results_table(seed=0):
+    return normalize_history(raw_results(seed))
+
+
+def test_extending_the_checkpoint_matches_a_full_rebuild(tmp_path, monkeypatch):
+    results = raw_results()
+    order = race_order(results)
+    half = order < order.max() // 2
+    history_features(results[half], history_dir=str(tmp_path / 'incremental'))
+
+    applied = []
+    update = HistoryStore.update
+    monkeypatch.setattr(HistoryStore, 'update', lambda self, race: applied.append(1) or update(self, race))
+    incremental = history_features(results, history_dir=str(tmp_path / 'incremental'))
+    # Only the races missing from the checkpoint were applied
+    assert len(applied) == order.max() + 1 - order.max() // 2
+    monkeypatch.undo()
+
+    pd.testing.assert_frame_equal(incremental, history_features(results, history_dir=str(tmp_path / 'full')))
+    # A changed race already in the checkpoint rebuilds it
+    changed = results.copy()
+    first_race = order == 0
+    changed.loc[first_race, 'Position_Race'] = changed.loc[first_race, 'Position_Race'].to_numpy()[::-1]
+    pd.testing.assert_frame_equal(history_features(changed, history_dir=str(tmp_path / 'incremental')),
+                                  history_features(changed, history_dir=str(tmp_path / 'changed')))
+
+
+def test_features_of_a_race_do_not_depend_on_its_results(tmp_path):
+    results = raw_results()
+    order = race_order(results)
+    cut = order.max() // 2
+    # The race at the cut and every later one get other results
+    changed = results.copy()
+    later = order >= cut
+    rng = np.random.default_rng(1)
+    changed.loc[later, 'Position_Race'] = rng.permutation(changed.loc[later, 'Position_Race'].to_numpy())
+    changed.loc[later, 'Finished'] = 1 - changed.loc[later, 'Finished']
+
+    original = history_features(results, history_dir=str(tmp_path / 'original'))
+    perturbed = history_features(changed, history_dir=str(tmp_path / 'perturbed'))
+    up_to_cut = order <= cut
+    pd.testing.assert_frame_equal(perturbed[up_to_cut], original[up_to_cut])
+    assert not np.allclose(perturbed[order > cut].to_numpy(), original[order > cut].to_numpy(), equal_nan=True)
+
+
+def test_duplicate_drivers_count_once():
+    results = results_table()
+    races = results[RACE_ID].drop_duplicates()
+    race = races.iloc[len(races) // 2]
+    # The first driver of a race in the middle of the history listed again with another result
+    in_race = ((results['Year'] == race['Year']) & (results['RaceName'] == race['RaceName'])).to_numpy()
+    duplicate = results[in_race].head(1).assign(Position_Race=20.0, Finished=0)
+    position = np.flatnonzero(in_race)[-1] + 1
+    with_duplicate = pd.concat([results.iloc[:position], duplicate, results.iloc[position:]], ignore_index=True)
+
+    store, expected = HistoryStore(), HistoryStore()
+    store.process(with_duplicate)
+    expected.process(results)
+    for name in ['drivers', 'driver_seasons', 'driver_circuits', 'teams', 'team_seasons', 'team_circuits']:
+        np.testing.assert_array_equal(getattr(store, name).frame().to_numpy(),
+                                      getattr(expected, name).frame().to_numpy())
+    np.testing.assert_array_equal(store.features(results)[HISTORY_COLUMNS].to_numpy(),
+                                  expected.features(results)[HISTORY_COLUMNS].to_numpy())
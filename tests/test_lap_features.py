@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastf1.core import Session
+
+from Lap_Features import DataNotLoadedError, LAP_FEATURE_COLUMNS, lap_features, loaded_data, session_lap_features
+from Weather_Features import WEATHER_FEATURE_COLUMNS, weather_features
+
+
+def race_laps(drivers=('VER', 'HAM', 'LEC'), n_laps=12):
+    rows = []
+    for d, driver in enumerate(drivers):
+        for lap in range(1, n_laps + 1):
+            lap_time = pd.Timedelta(seconds=90 + d + 0.05 * lap)
+            rows.append({'Driver': driver, 'LapNumber': float(lap), 'LapTime': lap_time,
+                         'Time': pd.Timedelta(seconds=95 * lap + d),
+                         'LapStartTime': pd.Timedelta(seconds=95 * (lap - 1) + d),
+                         'PitInTime': pd.Timedelta(seconds=95 * lap) if lap == 6 else pd.NaT,
+                         'PitOutTime': pd.Timedelta(seconds=95 * lap) if lap == 7 else pd.NaT,
+                         'IsAccurate': True, 'TrackStatus': '1', 'Stint': 1.0 if lap <= 6 else 2.0,
+                         'TyreLife': float(lap if lap <= 6 else lap - 6),
+                         'Compound': 'MEDIUM' if lap <= 6 else 'HARD'})
+    return pd.DataFrame(rows)
+
+
+def race_weather(n_readings=30):
+    times = pd.to_timedelta(np.arange(n_readings) * 60.0, unit='s')
+    return pd.DataFrame({'Time': times, 'AirTemp': np.linspace(20, 25, n_readings),
+                         'TrackTemp': np.linspace(30, 40, n_readings), 'Rainfall': np.arange(n_readings) > 20})
+
+
+def unloaded_session():
+    # A session object as FastF1 builds it, before Session.load
+    return Session.__new__(Session)
+
+
+def test_sessions_without_laps_contribute_no_features():
+    session = unloaded_session()
+    assert loaded_data(session, 'laps') is None
+    features = session_lap_features(session)
+    assert features.empty
+    assert list(features.columns) == ['Abbreviation'] + LAP_FEATURE_COLUMNS + WEATHER_FEATURE_COLUMNS
+
+
+def test_features_are_read_through_the_public_properties_and_the_laps_released():
+    session = unloaded_session()
+    laps, weather = race_laps(), race_weather()
+    session._laps, session._weather_data = laps, weather
+
+    features = session_lap_features(session).set_index('Abbreviation')
+    expected = pd.concat([lap_features(laps).set_index('Abbreviation'),
+                          weather_features(laps, weather).set_index('Abbreviation')], axis=1)
+    pd.testing.assert_frame_equal(features, expected, check_names=False)
+    assert features.loc['VER', 'PitStops'] == 1
+
+    # The laps are gone, the features stay on the session for the next request
+    assert loaded_data(session, 'laps') is None
+    assert session_lap_features(session) is session_lap_features(session)
+    with pytest.raises(DataNotLoadedError):
+        session.laps
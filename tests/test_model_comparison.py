@@ -0,0 +1,40 @@
+import tracemalloc
+
+import numpy as np
+from sklearn.dummy import DummyRegressor
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold, cross_val_score
+
+import Model_Comparison
+from Model_Comparison import compare_models, shared_pool
+
+
+def regression_data(rows=2000, cols=20, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, cols))
+    return X, X @ rng.normal(size=cols) + rng.normal(scale=0.1, size=rows)
+
+
+def test_scores_match_cross_validation():
+    X, y = regression_data()
+    cv = KFold(5, shuffle=True, random_state=0)
+    results = compare_models({'ridge': Ridge(alpha=1.0)}, X, y, 'neg_mean_absolute_error', cv=cv, n_jobs=1)
+    expected = cross_val_score(Ridge(alpha=1.0), X, y, scoring='neg_mean_absolute_error', cv=cv)
+    np.testing.assert_allclose(results['neg_mean_absolute_error'], expected)
+
+
+def test_buffer_holds_the_largest_training_fold_only():
+    X, y = regression_data(rows=20000, cols=50)
+    folds = list(KFold(5).split(X))
+    jobs = [('dummy', fold, DummyRegressor(), train_idx, test_idx, ['r2'])
+            for fold, (train_idx, test_idx) in enumerate(folds)]
+    with shared_pool(X, y, n_jobs=1) as run:
+        tracemalloc.start()
+        run(jobs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        buffer = Model_Comparison._SHARED['buffer']
+
+    assert buffer.shape == (max(len(train_idx) for train_idx, _ in folds), X.shape[1])
+    # The training rows are gathered once, the contiguous test rows are a view of the memmap
+    assert peak < 0.9 * X.nbytes
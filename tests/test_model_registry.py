@@ -0,0 +1,114 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from Fast_Inference import CompiledForest, DenseEncoder
+from Feature_Encoder import FeatureEncoder
+from Model_Registry import ModelRegistry
+
+
+def training_frame(rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'DriverId': rng.choice(['hamilton', 'verstappen', 'norris', 'leclerc'], rows),
+        'TeamId': rng.choice(['mercedes', 'red_bull', 'mclaren'], rows),
+        'GridPosition': rng.integers(1, 21, rows).astype(float),
+        'AirTemp': rng.normal(25, 5, rows),
+    })
+    y = X['GridPosition'] * 3 + X['AirTemp'] + (X['DriverId'] == 'verstappen') * 10 + rng.normal(0, 1, rows)
+    return X, y
+
+
+def test_fingerprints_hit_on_the_same_fit_and_miss_on_any_change(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    X, y = training_frame()
+
+    def fit(X, y, **params):
+        estimator = RandomForestRegressor(n_estimators=5, random_state=0).set_params(**params)
+        return registry.fit_or_load(estimator, X, y, encoder=FeatureEncoder(['DriverId', 'TeamId']))
+
+    _, _, cached = fit(X, y)
+    assert not cached
+    reused, reused_encoder, cached = fit(X.copy(), y.copy())
+    assert cached
+    # A hit predicts exactly like the fresh fit the predictors ran before the registry
+    fresh_encoder = FeatureEncoder(['DriverId', 'TeamId'])
+    fresh = RandomForestRegressor(n_estimators=5, random_state=0).fit(fresh_encoder.fit_transform(X), y)
+    np.testing.assert_array_equal(reused.predict(reused_encoder.transform(X)),
+                                  fresh.predict(fresh_encoder.transform(X)))
+
+    changed = X.copy()
+    changed.loc[0, 'AirTemp'] += 0.5
+    assert not fit(changed, y)[2]
+    assert not fit(X, y + 1)[2]
+    assert not fit(X, y, max_depth=3)[2]
+    assert len(registry.entries()) == 4
+
+
+def test_compiled_copy_is_written_when_the_model_is_stored(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    X, y = training_frame()
+    model, encoder, cached = registry.fit_or_load(RandomForestRegressor(n_estimators=5, random_state=0), X, y,
+                                                  encoder=FeatureEncoder(['DriverId', 'TeamId']))
+    assert not cached
+    key = registry.entries()['key'].iloc[0]
+    assert (tmp_path / 'compiled' / f'{key}.pkl').exists()
+
+    compiled = registry.load_compiled(key)
+    assert isinstance(compiled['model'], CompiledForest)
+    assert isinstance(compiled['encoder'], DenseEncoder)
+
+
+def test_reused_artifact_gets_its_missing_compiled_copy(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    X, y = training_frame()
+    X = X[['GridPosition', 'AirTemp']]
+    registry.fit_or_load(RandomForestRegressor(n_estimators=5, random_state=0), X, y)
+    key = registry.entries()['key'].iloc[0]
+    (tmp_path / 'compiled' / f'{key}.pkl').unlink()
+
+    # Predicting from an artifact without a copy falls back to the stored model instead of compiling
+    assert isinstance(registry.load_compiled(key)['model'], RandomForestRegressor)
+    assert not (tmp_path / 'compiled' / f'{key}.pkl').exists()
+
+    _, _, cached = registry.fit_or_load(RandomForestRegressor(n_estimators=5, random_state=0), X, y)
+    assert cached
+    assert isinstance(registry.load_compiled(key)['model'], CompiledForest)
+
+
+def test_compiled_forest_predicts_like_the_forest(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    X, y = training_frame()
+    X_test, _ = training_frame(rows=50, seed=1)
+    # An unseen driver gets no active column, as in FeatureEncoder
+    X_test.loc[0, 'DriverId'] = 'piastri'
+
+    regressor, encoder, _ = registry.fit_or_load(RandomForestRegressor(n_estimators=10, random_state=0), X, y,
+                                                 encoder=FeatureEncoder(['DriverId', 'TeamId']))
+    classifier, _, _ = registry.fit_or_load(RandomForestClassifier(n_estimators=10, random_state=0), X, y > y.median(),
+                                            encoder=FeatureEncoder(['DriverId', 'TeamId']))
+    keys = registry.entries().set_index('estimator')['key']
+    compiled_regressor = registry.load_compiled(keys['RandomForestRegressor'])
+    compiled_classifier = registry.load_compiled(keys['RandomForestClassifier'])
+
+    expected_X = encoder.transform(X_test)
+    dense_X = compiled_regressor['encoder'].transform(X_test)
+    np.testing.assert_array_equal(dense_X, expected_X.toarray())
+    np.testing.assert_allclose(compiled_regressor['model'].predict(dense_X), regressor.predict(expected_X))
+    np.testing.assert_allclose(compiled_classifier['model'].predict_proba(dense_X),
+                               classifier.predict_proba(expected_X))
+    np.testing.assert_array_equal(compiled_classifier['model'].predict(dense_X), classifier.predict(expected_X))
+
+
+def test_loading_the_compiled_copy_needs_no_sklearn(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path))
+    X, y = training_frame()
+    registry.fit_or_load(RandomForestRegressor(n_estimators=5, random_state=0), X, y,
+                         encoder=FeatureEncoder(['DriverId', 'TeamId']))
+    key = registry.entries()['key'].iloc[0]
+    # Any import of scikit-learn while unpickling the copy fails
+    for name in [name for name in sys.modules if name == 'sklearn' or name.startswith('sklearn.')]:
+        monkeypatch.setitem(sys.modules, name, None)
+    assert isinstance(registry.load_compiled(key)['model'], CompiledForest)
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+import Pipeline_CLI
+from Data_Wrangling import NOT_FINISHED_CODES
+from Feature_Encoder import FeatureEncoder
+from Model_Registry import ModelRegistry
+from Rating_Engine import RATING_COLUMNS, RATINGS_SUBDIR, RatingEngine, checkpoint_path, normalize_results
+from Synthetic_Data import generate_raw
+
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+FEATURES = ['DriverId', 'TeamId', 'RaceName', 'Year', 'GridPosition', 'AirTemp', 'Rainfall']
+
+
+def test_predict_reads_the_ratings_of_its_registry(tmp_path, monkeypatch):
+    raw = generate_raw(1)
+    raw['Finished'] = (~raw['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    results = normalize_results(raw)
+    last = results['RaceDate'] == results['RaceDate'].max()
+    engine = RatingEngine()
+    engine.process(results[~last])
+    train = raw[~last].join(engine.features(results[~last]))
+
+    registry_dir = str(tmp_path / 'registry')
+    model, encoder, _ = ModelRegistry(registry_dir).fit_or_load(
+        RandomForestClassifier(n_estimators=10, random_state=0), train[FEATURES + RATING_COLUMNS],
+        train['Finished'], encoder=FeatureEncoder(CATEGORICAL_COLS))
+    engine.save(checkpoint_path(engine, os.path.join(registry_dir, RATINGS_SUBDIR)))
+    grid = raw.loc[last, FEATURES].reset_index(drop=True)
+    grid.to_csv(tmp_path / 'grid.csv', index=False)
+
+    # Nothing is stored under the default ./models of the working directory
+    monkeypatch.chdir(tmp_path)
+    Pipeline_CLI.main(['predict', '--input', 'grid.csv', '--output', 'predictions.csv', '--registry', registry_dir])
+
+    predictions = pd.read_csv(tmp_path / 'predictions.csv')
+    expected_ratings = engine.pre_race(grid[['DriverId', 'TeamId']])
+    np.testing.assert_allclose(predictions[RATING_COLUMNS], expected_ratings[RATING_COLUMNS])
+    features = grid.join(expected_ratings[RATING_COLUMNS])
+    expected = model.predict_proba(encoder.transform(features[encoder.numeric_cols_ + encoder.categorical_cols]))
+    np.testing.assert_allclose(predictions['FinishProbability'], expected[:, 1])
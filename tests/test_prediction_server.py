@@ -0,0 +1,143 @@
+import http.client
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from Data_Wrangling import NOT_FINISHED_CODES
+from Feature_Encoder import FeatureEncoder
+from Prediction_Server import PredictionServer, RatingCache, fill_ratings
+from Rating_Engine import RATING_COLUMNS, RatingEngine, normalize_results
+from Synthetic_Data import generate_raw
+
+CATEGORICAL_COLS = ['DriverId', 'TeamId', 'RaceName', 'Year']
+FEATURES = ['DriverId', 'TeamId', 'RaceName', 'Year', 'GridPosition', 'AirTemp', 'Rainfall']
+
+
+@pytest.fixture(scope='module')
+def served():
+    raw = generate_raw(1)
+    raw['Finished'] = (~raw['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    results = normalize_results(raw)
+    last = results['RaceDate'] == results['RaceDate'].max()
+    engine = RatingEngine()
+    engine.process(results[~last])
+
+    train = raw[~last].copy()
+    train = train.join(engine.features(results[~last]))
+    train['Time'] = pd.to_timedelta(train['Time']).dt.total_seconds()
+    finish_encoder, time_encoder = FeatureEncoder(CATEGORICAL_COLS), FeatureEncoder(CATEGORICAL_COLS)
+    finished = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        finish_encoder.fit_transform(train[FEATURES + RATING_COLUMNS]), train['Finished'])
+    timed = train.dropna(subset=['Time'])
+    time = RandomForestRegressor(n_estimators=10, random_state=0).fit(
+        time_encoder.fit_transform(timed[FEATURES]), timed['Time'])
+
+    server = PredictionServer({'finished': (finished, finish_encoder), 'time': (time, time_encoder)},
+                              engine, port=0).start()
+    grid = raw.loc[last, FEATURES].reset_index(drop=True)
+    yield server, engine, grid, (finished, finish_encoder), (time, time_encoder)
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body):
+    host, port = server.server_address
+    connection = http.client.HTTPConnection(host, port)
+    connection.request('POST', '/predict', json.dumps(body), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def expected(grid, engine, finished, timed):
+    def encoded(frame, encoder):
+        return encoder.transform(frame[encoder.numeric_cols_ + encoder.categorical_cols])
+
+    model, encoder = finished
+    p_finish = model.predict_proba(encoded(fill_ratings(grid, engine), encoder))[:, 1]
+    model, encoder = timed
+    return p_finish, model.predict(encoded(grid, encoder))
+
+
+def test_both_request_layouts_score_like_the_fitted_models(served):
+    server, engine, grid, finished, timed = served
+    p_finish, time = expected(grid, engine, finished, timed)
+
+    rows = json.loads(grid.to_json(orient='records'))
+    columnar = {'columns': list(grid.columns), 'data': json.loads(grid.to_json(orient='values'))}
+    for body in (rows, columnar):
+        status, payload = post(server, body if 'columns' in body else {'rows': body})
+        assert status == 200
+        np.testing.assert_allclose(payload['predictions']['finished'], p_finish)
+        np.testing.assert_allclose(payload['predictions']['time'], time)
+
+
+def test_missing_values_and_unknown_drivers(served):
+    server, engine, grid, finished, timed = served
+    rows = json.loads(grid.head(3).to_json(orient='records'))
+    rows[0]['DriverId'] = 'rookie'
+    del rows[1]['AirTemp']
+    status, payload = post(server, {'rows': rows})
+    assert status == 200
+
+    assert len(payload['predictions']['finished']) == 3
+    # The forests take no missing values, the complete rows are compared with them
+    frame = pd.DataFrame.from_records([rows[0], rows[2]])
+    p_finish, time = expected(frame, engine, finished, timed)
+    np.testing.assert_allclose(np.array(payload['predictions']['finished'])[[0, 2]], p_finish)
+    np.testing.assert_allclose(np.array(payload['predictions']['time'])[[0, 2]], time)
+
+
+def test_bad_requests_are_rejected(served):
+    server, _, grid, _, _ = served
+    assert post(server, {'rows': []})[0] == 400
+    assert post(server, {'columns': ['GridPosition'], 'data': [[1]]})[0] == 400
+    assert post(server, {'columns': list(grid.columns), 'data': [[1, 2]]})[0] == 400
+
+
+class FailingModel:
+    feature_names_in_ = np.array(['GridPosition'])
+
+    def predict(self, X):
+        raise RuntimeError('model file is corrupt')
+
+
+def test_a_failing_model_answers_every_request_with_an_error():
+    server = PredictionServer({'broken': (FailingModel(), None)}, port=0).start()
+    try:
+        batcher = server.batchers['broken']
+        handles = [batcher.submit({'GridPosition': [float(i)]}) for i in range(3)]
+        for handle in handles:
+            with pytest.raises(RuntimeError, match='corrupt'):
+                batcher.result(handle)
+
+        # Over HTTP the failure is a 500 reply, and the worker keeps serving later batches
+        for _ in range(2):
+            status, payload = post(server, {'rows': [{'GridPosition': 1}]})
+            assert status == 500
+            assert payload['error'] == 'RuntimeError: model file is corrupt'
+        assert server.stats.snapshot()['errors'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rating_rows_are_looked_up_once_per_pair(served, monkeypatch):
+    _, engine, grid, _, _ = served
+    cache = RatingCache(engine)
+    expected_ratings = engine.pre_race(grid[['DriverId', 'TeamId']])
+
+    calls = []
+    pre_race = engine.pre_race
+    monkeypatch.setattr(engine, 'pre_race', lambda race: calls.append(len(race)) or pre_race(race))
+    first = cache.lookup(grid['DriverId'].tolist(), grid['TeamId'].tolist())
+    second = cache.lookup(grid['DriverId'].tolist(), grid['TeamId'].tolist())
+
+    assert len(calls) == grid[['DriverId', 'TeamId']].drop_duplicates().shape[0]
+    for col in RATING_COLUMNS:
+        np.testing.assert_allclose(first[col], expected_ratings[col].to_numpy())
+        np.testing.assert_array_equal(first[col], second[col])
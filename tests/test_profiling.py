@@ -0,0 +1,51 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import Profiling
+from Profiling import Profiler, read_records, stage, summarize
+
+
+def test_stages_are_shared_no_ops_while_profiling_is_off(monkeypatch):
+    monkeypatch.setattr(Profiling, '_PROFILER', None)
+    with stage('fit', rows=10) as record:
+        record.set(cached=True)
+    assert stage('fit') is stage('predict')
+
+
+@pytest.fixture
+def traced():
+    yield
+    # The profiler starts tracemalloc for its memory peaks, later tests should not pay for it
+    tracemalloc.stop()
+
+
+def test_nested_stages_record_time_memory_tags_and_fields(tmp_path, monkeypatch, traced):
+    output = str(tmp_path / 'profile.jsonl')
+    monkeypatch.setattr(Profiling, '_PROFILER', Profiler(output, memory=True))
+
+    for event in ('Bahrain', 'Monaco'):
+        with stage('prepare_event', event=event):
+            with stage('merge', rows=20) as record:
+                buffer = np.ones(2 ** 20)  # 8 MB
+                time.sleep(0.01)
+                record.set(session_hits=2)
+                del buffer
+    with pytest.raises(ValueError):
+        with stage('assemble'):
+            raise ValueError('no events')
+
+    records = read_records(output)
+    assert records['stage'].tolist() == ['merge', 'prepare_event', 'merge', 'prepare_event', 'assemble']
+    merges = records[records['stage'] == 'merge']
+    assert merges['event'].tolist() == ['Bahrain', 'Monaco']
+    assert (merges['rows'] == 20).all() and (merges['session_hits'] == 2).all()
+    assert (merges['wall_s'] >= 0.01).all()
+    # A parent's peak includes the memory its children allocated
+    assert (records.loc[records['stage'] != 'assemble', 'peak_mb'] >= 8).all()
+
+    summary = summarize(records)
+    assert summary.loc['merge', 'runs'] == 2 and summary.loc['merge', 'rows'] == 40
+    assert summary.loc['prepare_event', 'wall_s'] >= summary.loc['merge', 'wall_s']
@@ -0,0 +1,65 @@
+import numpy as np
+
+from Race_Simulator import POINTS, simulate_counts, simulate_race
+
+N_DRIVERS = 12
+
+
+def grid(seed=0):
+    rng = np.random.default_rng(seed)
+    dnf_prob = rng.uniform(0.05, 0.3, N_DRIVERS).astype(np.float32)
+    time_mean = (5400 + np.arange(N_DRIVERS) * 4).astype(np.float32)
+    time_std = np.full(N_DRIVERS, 10, dtype=np.float32)
+    return dnf_prob, time_mean, time_std
+
+
+def test_probabilities_are_distributions_over_drivers_and_positions():
+    summary = simulate_race(*grid(), n_sims=20_000, seed=1, chunk_size=3_000)
+    positions = summary[[f'P{i}' for i in range(1, N_DRIVERS + 1)]].to_numpy()
+
+    np.testing.assert_allclose(positions.sum(axis=1), 1)
+    np.testing.assert_allclose(positions.sum(axis=0), 1)
+    np.testing.assert_allclose(summary['Win'].sum(), 1)
+    np.testing.assert_allclose(summary['Podium'].sum(), 3)
+    np.testing.assert_allclose(summary['ExpectedPoints'].sum(), POINTS.sum())
+    assert ((summary['DNF'] >= 0) & (summary['DNF'] <= 1)).all()
+
+
+def test_counts_match_a_race_by_race_loop():
+    dnf_prob, time_mean, time_std = grid()
+    n_sims = 500
+    counts = simulate_counts(dnf_prob, time_mean, time_std, n_sims, seed=3, chunk_size=n_sims)
+
+    # The same draws, classified one race and one driver at a time
+    rng = np.random.default_rng(3)
+    times = rng.standard_normal((n_sims, N_DRIVERS), dtype=np.float32) * time_std + time_mean
+    retire = rng.random((n_sims, N_DRIVERS), dtype=np.float32)
+    positions = np.zeros((N_DRIVERS, N_DRIVERS), dtype=np.int64)
+    dnf = np.zeros(N_DRIVERS)
+    points = np.zeros(N_DRIVERS)
+    for race in range(n_sims):
+        finishers = sorted((t, d) for d, t in enumerate(times[race]) if retire[race, d] >= dnf_prob[d])
+        retired = sorted((r, d) for d, r in enumerate(retire[race]) if r < dnf_prob[d])
+        for position, (_, driver) in enumerate(finishers + retired):
+            positions[driver, position] += 1
+            points[driver] += POINTS[position] if position < len(POINTS) else 0
+        for _, driver in retired:
+            dnf[driver] += 1
+
+    np.testing.assert_array_equal(counts['positions'], positions)
+    np.testing.assert_array_equal(counts['dnf'], dnf)
+    np.testing.assert_allclose(counts['points'], points)
+
+
+def test_certain_outcomes_and_missing_predictions():
+    dnf_prob, time_mean, time_std = grid()
+    dnf_prob[:] = 0
+    dnf_prob[3] = 1
+    time_mean[7] = 5000
+    time_mean[5] = np.nan
+    summary = simulate_race(dnf_prob, time_mean, 1.0, n_sims=2_000, seed=0)
+
+    assert summary.loc[7, 'Win'] == 1
+    # A driver without a prediction is treated as a certain retirement
+    assert summary.loc[3, 'DNF'] == 1 and summary.loc[5, 'DNF'] == 1
+    assert summary.loc[[3, 5], 'ExpectedPosition'].mean() == N_DRIVERS - 0.5
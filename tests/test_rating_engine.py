@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from Data_Wrangling import NOT_FINISHED_CODES
+from Rating_Engine import RACE_ID, RATING_COLUMNS, RESULT_COLUMNS, RatingEngine, checkpoint_path, rating_features
+from Synthetic_Data import generate_raw
+
+
+def results_table(seed=0):
+    raw = generate_raw(1, seed=seed)
+    raw['Finished'] = (~raw['ClassifiedPosition'].isin(NOT_FINISHED_CODES)).astype(int)
+    raw['RaceDate'] = pd.to_datetime(raw['RaceDate'])
+    return raw[RESULT_COLUMNS]
+
+
+def race_order(results):
+    # Position of every row's race in date order
+    races = results.drop_duplicates(RACE_ID).sort_values('RaceDate', kind='stable')
+    order = pd.Series(np.arange(len(races)), index=pd.MultiIndex.from_frame(races[RACE_ID]))
+    return order.reindex(pd.MultiIndex.from_frame(results[RACE_ID])).to_numpy()
+
+
+def test_extending_the_checkpoint_matches_a_full_rebuild(tmp_path, monkeypatch):
+    results = results_table()
+    order = race_order(results)
+    half = order < order.max() // 2
+    rating_features(results[half], rating_dir=str(tmp_path / 'incremental'))
+
+    applied = []
+    update = RatingEngine.update
+    monkeypatch.setattr(RatingEngine, 'update', lambda self, race: applied.append(1) or update(self, race))
+    incremental = rating_features(results, rating_dir=str(tmp_path / 'incremental'))
+    # Only the races missing from the checkpoint were applied
+    assert len(applied) == order.max() + 1 - order.max() // 2
+    monkeypatch.undo()
+
+    full = rating_features(results, rating_dir=str(tmp_path / 'full'))
+    pd.testing.assert_frame_equal(incremental, full)
+    engine = RatingEngine.load(checkpoint_path(RatingEngine(), str(tmp_path / 'incremental')))
+    assert len(engine.races) == order.max() + 1
+
+
+def test_a_changed_race_rebuilds_the_checkpoint(tmp_path):
+    results = results_table()
+    rating_features(results, rating_dir=str(tmp_path))
+    changed = results.copy()
+    first_race = race_order(changed) == 0
+    changed.loc[first_race, 'Position_Race'] = changed.loc[first_race, 'Position_Race'].to_numpy()[::-1]
+
+    cached = rating_features(changed, rating_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(cached, rating_features(changed, rating_dir=str(tmp_path), refresh=True))
+    assert not np.allclose(cached.to_numpy(), rating_features(results, rating_dir=str(tmp_path / 'other')).to_numpy())
+
+
+def test_features_of_a_race_do_not_depend_on_its_results(tmp_path):
+    results = results_table()
+    order = race_order(results)
+    cut = order.max() // 2
+    # The race at the cut and every later one get other results
+    changed = results.copy()
+    later = order >= cut
+    rng = np.random.default_rng(1)
+    changed.loc[later, 'Position_Race'] = rng.permutation(changed.loc[later, 'Position_Race'].to_numpy())
+    changed.loc[later, 'Finished'] = 1 - changed.loc[later, 'Finished']
+
+    original = rating_features(results, rating_dir=str(tmp_path / 'original'))
+    perturbed = rating_features(changed, rating_dir=str(tmp_path / 'perturbed'))
+    up_to_cut = order <= cut
+    pd.testing.assert_frame_equal(perturbed[up_to_cut], original[up_to_cut])
+    assert not np.allclose(perturbed[order > cut][RATING_COLUMNS].to_numpy(),
+                           original[order > cut][RATING_COLUMNS].to_numpy())
@@ -0,0 +1,39 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from Feature_Encoder import FeatureEncoder
+from Scenario_Engine import run_scenarios, scenario_shape
+
+
+def fitted_model(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'DriverId': rng.choice(['hamilton', 'verstappen', 'norris'], rows),
+        'GridPosition': rng.integers(1, 21, rows).astype(float),
+        'Rainfall': rng.integers(0, 2, rows),
+    })
+    y = (X['GridPosition'] + 5 * X['Rainfall'] + rng.normal(0, 3, rows) < 12).astype(int)
+    encoder = FeatureEncoder(['DriverId'])
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(encoder.fit_transform(X), y)
+    return model, encoder, X
+
+
+def test_sweep_matches_scoring_every_scenario_on_its_own():
+    model, encoder, X = fitted_model()
+    base = X.iloc[:3]
+    axes = {'GridPosition': [1.0, 10.0, 20.0], 'Rainfall': [0, 1]}
+    # A chunk size that does not divide the 18 scenarios, so a chunk ends inside a base row
+    results = run_scenarios(model, base, axes, encoder=encoder, columns=['DriverId'], chunk_size=5)
+
+    assert len(results) == np.prod(scenario_shape(base, axes))
+    expected = []
+    for base_row, (_, row) in enumerate(base.iterrows()):
+        for grid, rain in itertools.product(*axes.values()):
+            scenario = row.to_frame().T.infer_objects().assign(GridPosition=grid, Rainfall=rain)
+            expected.append((base_row, row['DriverId'], grid, rain,
+                             model.predict_proba(encoder.transform(scenario))[0, 1]))
+    expected = pd.DataFrame(expected, columns=['BaseRow', 'DriverId', 'GridPosition', 'Rainfall', 'Prediction'])
+    pd.testing.assert_frame_equal(results, expected, check_dtype=False)
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+import Shard_Store
+from Shard_Store import ShardStore
+
+EVENTS = [(2023, 'Bahrain Grand Prix'), (2023, 'Emilia Romagna Grand Prix'), (2023, 'Monaco Grand Prix')]
+
+
+def event_frame(race_name, rows=3):
+    return pd.DataFrame({
+        'DriverId': [f'driver_{i}' for i in range(rows)],
+        'RaceName': race_name,
+        'ClassifiedPosition': [str(i + 1) for i in range(rows - 1)] + ['R'],
+        'GridPosition': [float(i + 1) for i in range(rows)],
+    })
+
+
+def test_written_events_are_current_and_assembled_in_order(tmp_path):
+    store = ShardStore(str(tmp_path))
+    for year, race in reversed(EVENTS[::2]):
+        store.write(year, race, event_frame(race))
+
+    assert store.pending(EVENTS) == [EVENTS[1]]
+    assert store.pending(EVENTS, refresh=[EVENTS[0]]) == [EVENTS[0], EVENTS[1]]
+    assembled = store.assemble(EVENTS)
+    assert assembled['RaceName'].unique().tolist() == ['Bahrain Grand Prix', 'Monaco Grand Prix']
+    # Positions keep their string type even for a race without retirements in a shard
+    assert assembled['ClassifiedPosition'].map(type).eq(str).all()
+
+    # A reopened store resumes from the manifest
+    assert ShardStore(str(tmp_path)).pending(EVENTS) == [EVENTS[1]]
+
+
+def test_tampered_or_missing_shards_are_rebuilt(tmp_path):
+    store = ShardStore(str(tmp_path))
+    for year, race in EVENTS:
+        store.write(year, race, event_frame(race))
+    with open(store.shard_path(*EVENTS[0]), 'a', encoding='utf-8') as f:
+        f.write('extra,row,,\n')
+    (tmp_path / store.manifest['events']['2023|Monaco Grand Prix']['shard']).unlink()
+
+    # The next build opens the store again and hashes the shards anew
+    assert ShardStore(str(tmp_path)).pending(EVENTS) == [EVENTS[0], EVENTS[2]]
+
+
+def test_every_shard_is_hashed_once_per_build(tmp_path, monkeypatch):
+    store = ShardStore(str(tmp_path))
+    for year, race in EVENTS[:2]:
+        store.write(year, race, event_frame(race))
+
+    hashed = []
+    file_sha256 = Shard_Store.file_sha256
+    monkeypatch.setattr(Shard_Store, 'file_sha256', lambda path: hashed.append(path) or file_sha256(path))
+    store = ShardStore(str(tmp_path))
+    store.pending(EVENTS)
+    store.backing_off(EVENTS)
+    store.write(*EVENTS[2], event_frame(EVENTS[2][1]))
+    assert len(store.assemble(EVENTS)) == 9
+    assert len(hashed) == 2
+
+
+def test_assembling_without_any_built_event_fails_clearly(tmp_path):
+    store = ShardStore(str(tmp_path))
+    store.record_failure(*EVENTS[1], 'Session not found')
+    with pytest.raises(ValueError, match='None of the 3 events has been built'):
+        store.assemble(EVENTS)
+
+
+def test_failures_are_recorded_with_error_and_time(tmp_path):
+    store = ShardStore(str(tmp_path))
+    before = datetime.now(timezone.utc).replace(microsecond=0)
+    store.record_failure(*EVENTS[1], 'Session not found')
+
+    with open(tmp_path / 'manifest.json', encoding='utf-8') as f:
+        entry = json.load(f)['failures']['2023|Emilia Romagna Grand Prix']
+    assert entry['error'] == 'Session not found'
+    assert entry['attempts'] == 1
+    assert before <= datetime.fromisoformat(entry['failed_at']) <= datetime.now(timezone.utc)
+
+
+def test_failed_events_wait_for_their_backoff_or_a_refresh(tmp_path):
+    store = ShardStore(str(tmp_path), retry_backoff=timedelta(hours=1))
+    store.record_failure(*EVENTS[1], 'Session not found')
+    failed_at = datetime.fromisoformat(store.manifest['failures']['2023|Emilia Romagna Grand Prix']['failed_at'])
+
+    assert store.pending(EVENTS, now=failed_at + timedelta(minutes=30)) == [EVENTS[0], EVENTS[2]]
+    assert store.backing_off(EVENTS, now=failed_at + timedelta(minutes=30)) == [EVENTS[1]]
+    assert EVENTS[1] in store.pending(EVENTS, refresh=[EVENTS[1]], now=failed_at)
+    assert store.backing_off(EVENTS, refresh=[EVENTS[1]], now=failed_at) == []
+    assert EVENTS[1] in store.pending(EVENTS, now=failed_at + timedelta(hours=1))
+
+    # Every further failure doubles the wait, and the backoff survives reopening the store
+    store.record_failure(*EVENTS[1], 'Session not found')
+    failed_at = datetime.fromisoformat(store.manifest['failures']['2023|Emilia Romagna Grand Prix']['failed_at'])
+    reopened = ShardStore(str(tmp_path), retry_backoff=timedelta(hours=1))
+    assert reopened.retry_at(*EVENTS[1]) == failed_at + timedelta(hours=2)
+    assert EVENTS[1] not in reopened.pending(EVENTS, now=failed_at + timedelta(hours=1))
+
+
+def test_a_successful_write_clears_the_failure(tmp_path):
+    store = ShardStore(str(tmp_path))
+    store.record_failure(*EVENTS[0], 'Timeout')
+    store.write(*EVENTS[0], event_frame(EVENTS[0][1]))
+
+    assert store.retry_at(*EVENTS[0]) is None
+    assert ShardStore(str(tmp_path)).manifest['failures'] == {}
+    assert EVENTS[0] not in store.pending(EVENTS)
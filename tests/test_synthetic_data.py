@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from Data_Wrangling import NOT_FINISHED_CODES
+from Synthetic_Data import (DRIVERS_PER_RACE, PROCESSED_COLUMNS, RAW_COLUMNS, _duration_text, generate_raw,
+                            to_processed)
+
+
+def test_durations_are_formatted_like_timedelta_strings():
+    seconds = np.array([5371.283, 0.0, 89.0005, 86399.999, np.nan])
+    text = _duration_text(seconds)
+
+    expected = [str(pd.Timedelta(seconds=round(value, 3))) for value in seconds[:-1]]
+    # str(Timedelta) drops a zero fraction, the files always carry six digits
+    expected = [value if '.' in value else f'{value}.000000' for value in expected]
+    assert text[:-1].tolist() == expected
+    assert pd.isna(text[-1])
+
+
+def test_seasons_have_the_schema_and_shape_of_the_real_data():
+    raw = generate_raw(1)
+    assert raw.columns.tolist() == RAW_COLUMNS
+    assert len(raw) == 6 * 22 * DRIVERS_PER_RACE
+    pd.testing.assert_frame_equal(raw, generate_raw(1))
+
+    races = raw.groupby(['Year', 'RaceName'], sort=False)
+    assert races.ngroups == 6 * 22
+    assert races['Position_Race'].apply(lambda p: sorted(p.astype(int)) == list(range(1, 21))).all()
+    # Retired drivers have no time, and the text durations parse back
+    retired = raw['ClassifiedPosition'].isin(NOT_FINISHED_CODES)
+    assert 0 < retired.mean() < 0.3
+    assert raw.loc[retired, 'Time'].isna().all()
+    assert pd.to_timedelta(raw['Time'], errors='coerce').notna().sum() == raw['Time'].notna().sum()
+
+    processed = to_processed(raw)
+    assert processed.columns.tolist() == PROCESSED_COLUMNS
+    assert (processed['Finished'] == (~retired).astype(int)).all()
+
+
+def test_scale_adds_parallel_series_of_drivers_and_events():
+    small, large = generate_raw(1), generate_raw(3)
+    assert len(large) == 3 * len(small)
+    assert large['DriverId'].nunique() >= 3 * small['DriverId'].nunique() * 0.9
+    assert large.groupby(['Year', 'RaceName']).ngroups == 3 * small.groupby(['Year', 'RaceName']).ngroups
+    assert large['Year'].between(small['Year'].min(), small['Year'].max()).all()
@@ -0,0 +1,42 @@
+import numpy as np
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold
+
+from Tuning import successive_halving
+
+
+def search_data(rows=900, cols=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, cols))
+    y = X @ rng.normal(size=cols) + rng.normal(scale=0.5, size=rows)
+    folds = [(rng.permutation(train_idx), test_idx) for train_idx, test_idx in KFold(3).split(X)]
+    candidates = [('ridge', {'alpha': alpha}, Ridge(alpha=alpha)) for alpha in np.logspace(-2, 4, 9)]
+    return candidates, X, y, folds
+
+
+def test_rounds_keep_the_best_third_on_three_times_the_rows():
+    candidates, X, y, folds = search_data()
+    leaderboard = successive_halving(candidates, X, y, folds, 'neg_mean_absolute_error', eta=3, n_jobs=1)
+
+    assert leaderboard.groupby('Round').size().to_dict() == {0: 6, 1: 2, 2: 1}
+    # 600 training rows per fold, a ninth of them in the first round and a third in the second
+    assert sorted(leaderboard['TrainRows'].unique()) == [66, 200, 600]
+
+    # The winner's last-round score is its plain cross-validation score on the full training folds
+    winner = leaderboard.iloc[0]
+    model = candidates[winner['Candidate']][2]
+    scores = [-mean_absolute_error(y[test_idx], model.fit(X[train_idx], y[train_idx]).predict(X[test_idx]))
+              for train_idx, test_idx in folds]
+    assert winner['Round'] == 2
+    np.testing.assert_allclose(winner['Score'], np.mean(scores))
+
+
+def test_search_stops_once_the_cpu_budget_is_spent():
+    candidates, X, y, folds = search_data()
+    leaderboard = successive_halving(candidates, X, y, folds, 'neg_mean_absolute_error', eta=3,
+                                     cpu_budget_seconds=0, n_jobs=1)
+
+    # The first round always completes, no candidate is promoted past it
+    assert len(leaderboard) == len(candidates)
+    assert (leaderboard['Round'] == 0).all()
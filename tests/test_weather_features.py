@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from Weather_Features import FINAL_PHASE_FROM, PHASE_WEATHER, WEATHER_FEATURE_COLUMNS, lap_weather, weather_features
+
+
+def race(seed=0, drivers=('VER', 'HAM', 'NOR'), n_laps=30):
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(60)
+    weather = pd.DataFrame({
+        'Time': pd.to_timedelta(minutes * 60 + 30, unit='s'),
+        'AirTemp': 20 + rng.normal(0, 1, len(minutes)),
+        'TrackTemp': 35 + rng.normal(0, 2, len(minutes)),
+        # Rain for the first quarter of an hour only
+        'Rainfall': minutes < 15,
+    }).sample(frac=1, random_state=seed)
+
+    laps = []
+    for d, driver in enumerate(drivers):
+        lap_times = rng.uniform(85, 95, n_laps)
+        ends = 60 + d + np.cumsum(lap_times)
+        laps.append(pd.DataFrame({
+            'Driver': driver,
+            'LapNumber': np.arange(1, n_laps + 1, dtype=float),
+            'Stint': np.where(np.arange(n_laps) < 12, 1.0, 2.0),
+            'Time': pd.to_timedelta(ends, unit='s'),
+            'LapTime': pd.to_timedelta(lap_times, unit='s'),
+            'LapStartTime': pd.to_timedelta(ends - lap_times, unit='s'),
+        }))
+    laps = pd.concat(laps, ignore_index=True)
+    # Lap 1 has no start time and one lap is missing both, as in FastF1 sessions
+    laps.loc[laps['LapNumber'] == 1, 'LapStartTime'] = pd.NaT
+    laps.loc[5, ['LapStartTime', 'LapTime']] = pd.NaT
+    return laps, weather
+
+
+def test_laps_get_the_latest_reading_like_merge_asof():
+    laps, weather = race()
+    aligned = lap_weather(laps, weather)
+
+    start = laps['LapStartTime'].fillna(laps['Time'] - laps['LapTime']).rename('Start')
+    expected = pd.merge_asof(start.dropna().sort_values().reset_index(), weather.sort_values('Time'),
+                             left_on='Start', right_on='Time', direction='backward').set_index('index')
+    expected = expected.reindex(laps.index)[aligned.columns].astype(float)
+    pd.testing.assert_frame_equal(aligned, expected, check_names=False)
+    assert aligned.loc[5].isna().all()
+
+
+def test_driver_features_match_a_per_driver_loop():
+    laps, weather = race()
+    features = weather_features(laps, weather).set_index('Abbreviation')
+    aligned = lap_weather(laps, weather)
+    final_from = FINAL_PHASE_FROM * laps['LapNumber'].max()
+
+    for driver, driver_laps in laps.groupby('Driver'):
+        readings = aligned.loc[driver_laps.index]
+        for col in PHASE_WEATHER:
+            start = readings.loc[driver_laps['LapNumber'] == 1, col].mean()
+            final = readings.loc[driver_laps['LapNumber'] > final_from, col].mean()
+            np.testing.assert_allclose(features.loc[driver, f'Start{col}'], start)
+            np.testing.assert_allclose(features.loc[driver, f'Final{col}'], final)
+        np.testing.assert_allclose(features.loc[driver, 'WetLapShare'], readings['Rainfall'].mean())
+        wet_stints = (readings['Rainfall'] > 0).groupby(driver_laps['Stint']).any().sum()
+        assert features.loc[driver, 'WetStints'] == wet_stints
+
+    # The race started wet and finished dry, which the session mean would blur
+    assert (features['StartRainfall'] == 1).all() and (features['FinalRainfall'] == 0).all()
+    assert features.columns.tolist() == WEATHER_FEATURE_COLUMNS